@@ -1,5 +1,39 @@
+import logging
+
+from apis.httpClient import AsyncHttpClient
+from util.metrics import MetricsRegistry
+
+
 class BaseAPI:
+    # (calls, period in seconds) allowed by the source's host, or None if the host has no rate limit
+    rate_limit = None
+
     def fetch_metadata(self, identifier, input_type):
+        # Thin synchronous wrapper for callers that are not running an event loop, such as the GUI
+        return AsyncHttpClient.get_client().run(self.fetch_metadata_async(identifier, input_type))
+
+    async def fetch_metadata_async(self, identifier, input_type):
+        try:
+            return await self.lookup_async(identifier, input_type)
+        except Exception as e:
+            # Log the error and continue with the search
+            logging.debug(f"Error fetching metadata for identifier {identifier} from {self.name}: {e}")
+            return None
+
+    def lookup(self, identifier, input_type):
+        # Synchronous wrapper of lookup_async
+        return AsyncHttpClient.get_client().run(self.lookup_async(identifier, input_type))
+
+    async def lookup_async(self, identifier, input_type):
+        # Like fetch_metadata_async, but a failed request raises instead of looking like a missing record
+        url = self.build_url(identifier, input_type)
+        if not url:
+            return None
+        response = await AsyncHttpClient.get_client().get_json(url, self.rate_limit)
+        with MetricsRegistry.get_registry().timer('harvester_stage_seconds', stage='parse'):
+            return self.parse_response(response, identifier, input_type)
+
+    def build_url(self, identifier, input_type):
         raise NotImplementedError
 
     def parse_response(self, response, identifier, input_type):
@@ -1,36 +1,21 @@
-import requests
-
 import re
-from ratelimit import limits, sleep_and_retry
 import util.dictionaryValidationMethod as vd
 from apis.baseAPI import BaseAPI
 import isbnlib
 
 
 class GoogleBooksAPI(BaseAPI):
+    rate_limit = (1, 1)  # Allow 1 request per second
+
     def __init__(self):
         self.base_url = "https://www.googleapis.com/books/v1/volumes?q="
         self.name = "GoogleBooks"
-        self.catalog_data = {
-            'ISBN': [],
-            'OCN': '',
-            'LCCN': [],
-            'LCCN_Source': []
-        }
 
-    @sleep_and_retry
-    @limits(calls=1, period=1)  # Allow 1 request per second
-    def fetch_metadata(self, identifier, input_type):
-        url = f"{self.base_url}{input_type}:{identifier}"
-        try:
-            response = requests.get(url)
-            response.raise_for_status()  # Check for HTTP request errors
-            return self.parse_response(response.json(), identifier, input_type)
-        except Exception as e:
-            # print(f"Error fetching metadata for identifier {identifier} from {self.name}: {e}")
-            return None
+    def build_url(self, identifier, input_type):
+        return f"{self.base_url}{input_type}:{identifier}"
 
     def parse_response(self, response, identifier, input_type):
+        catalog_data = {'ISBN': [], 'OCN': '', 'LCCN': [], 'LCCN_Source': []}
         items = response.get('items')
         if items:
             volume_info = items[0].get('volumeInfo', {})
@@ -43,13 +28,13 @@ class GoogleBooksAPI(BaseAPI):
             lccn = self.get_identifiers(industry_identifiers, ['LCCN'])
 
             # Compile the results into a dictionary
-            self.catalog_data['ISBN'] = isbn
-            self.catalog_data['OCN'] = ocn
-            self.catalog_data['LCCN'] = lccn
-            self.catalog_data['LCCN_Source'] = ['Google Books'] * len(lccn)
+            catalog_data['ISBN'] = isbn
+            catalog_data['OCN'] = ocn
+            catalog_data['LCCN'] = lccn
+            catalog_data['LCCN_Source'] = ['Google Books'] * len(lccn)
 
-            self.catalog_data = vd.optimize_dictionary(self.catalog_data)
-            return {k.lower(): v for k, v in self.catalog_data.items()}
+            catalog_data = vd.optimize_dictionary(catalog_data)
+            return {k.lower(): v for k, v in catalog_data.items()}
         return None
 
     def get_identifiers(self, results, types, remove_hyphens=False):
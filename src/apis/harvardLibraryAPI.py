@@ -1,60 +1,43 @@
 import re
-import requests
-from ratelimit import limits, sleep_and_retry
 import util.dictionaryValidationMethod as vd
 from apis.baseAPI import BaseAPI
 
 
 
 class HarvardLibraryAPI(BaseAPI):
+    rate_limit = (1, 1)  # Allow 1 request per second
+
     def __init__(self):
         self.base_url = "https://api.lib.harvard.edu/v2/items"
         self.name = "Harvard"
-        self.catalog_data = {
-            'ISBN': [],
-            'OCN': '',
-            'LCCN': [],
-            'LCCN_Source': []
-        }
-
-    @sleep_and_retry
-    @limits(calls=1, period=1)  # Allow 1 request per second
-    def fetch_metadata(self, identifier, input_type):
 
-        url = f"{self.base_url}.json?identifier={identifier}"
-        try:
-            response = requests.get(url)
-            response.raise_for_status()  # Raise an exception for HTTP errors (status code >= 400)
-            if response.status_code == 200:
-                return self.parse_response(response.json(), identifier, input_type)
-            else:
-                raise Exception(f"API request failed with status code: {response.status_code}")
-        except Exception as e:
-            # Log the error and continue with the search
-            # print(f"Error fetching metadata for identifier {identifier} from {self.name}: {e}")
-            return None
+    def build_url(self, identifier, input_type):
+        return f"{self.base_url}.json?identifier={identifier}"
 
     def parse_response(self, response, identifier, input_type):
-        if response.get('items'):
+        catalog_data = {'ISBN': [], 'OCN': '', 'LCCN': [], 'LCCN_Source': []}
+        if isinstance(response, dict) and response.get('items'):
             mods = response.get('items', {}).get('mods', {})
 
+            # A single record is an object, several are a list, and none may be an empty list
             if isinstance(mods, list):
-                results = mods[0]
-            elif isinstance(mods, dict):
-                results = mods
+                results = mods[0] if mods else None
+            else:
+                results = mods if isinstance(mods, dict) else None
+            if not results:
+                return None
 
-            if results:
-                self.catalog_data['ISBN'] = self.get_isbn(results.get('identifier', []))
-                self.catalog_data['OCN'] = self.get_ocn(results.get('identifier', ''))
-                self.catalog_data['LCCN'] = self.get_lccn(results.get('classification', []))
-                self.catalog_data['LCCN_Source'] = ["Harvard"] * len(self.catalog_data['LCCN'])
+            catalog_data['ISBN'] = self.get_isbn(results.get('identifier', []))
+            catalog_data['OCN'] = self.get_ocn(results.get('identifier', ''))
+            catalog_data['LCCN'] = self.get_lccn(results.get('classification', []))
+            catalog_data['LCCN_Source'] = ["Harvard"] * len(catalog_data['LCCN'])
 
             if input_type == "ocn":
-                if identifier != self.catalog_data['OCN']:
+                if identifier != catalog_data['OCN']:
                     return None
 
-            self.catalog_data = vd.optimize_dictionary(self.catalog_data)
-            return {k.lower(): v for k, v in self.catalog_data.items()}
+            catalog_data = vd.optimize_dictionary(catalog_data)
+            return {k.lower(): v for k, v in catalog_data.items()}
 
         return None
 
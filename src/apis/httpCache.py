@@ -0,0 +1,160 @@
+import re
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+_MAX_AGE = re.compile(r'(?:^|,)\s*max-age\s*=\s*"?(\d+)"?', re.IGNORECASE)
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+class CachedResponse:
+    """A response body held by the HttpCache, with its validators and the time it stays fresh."""
+    __slots__ = ('body', 'etag', 'last_modified', 'expires')
+
+    def __init__(self, body, etag, last_modified, expires):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires
+
+    @property
+    def fresh(self):
+        return time.time() < self.expires
+
+    def validators(self):
+        """Return the headers of a conditional request revalidating the response."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """
+    Persistent cache of HTTP responses in an SQLite file, keyed by normalized URL.
+
+    Responses are kept with their ETag and Last-Modified validators and an expiry worked out
+    from their Cache-Control max-age or Expires headers, or `default_ttl` seconds when they
+    have neither. A fresh response is served without a request. A stale one with validators
+    is revalidated with a conditional request, and served again if the server answers 304.
+    Responses marked no-store are not kept. Once the bodies take more than `max_size` bytes,
+    the least recently used responses are evicted.
+
+    The cache may be used from any thread. Hits, misses, revalidations, stores and evictions
+    are counted in `stats`.
+    """
+
+    def __init__(self, path, max_size=100 * 1024 * 1024, default_ttl=24 * 3600):
+        self.path = str(path)
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        # Every lookup records its use, so keep those writes cheap
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS responses (Url TEXT PRIMARY KEY, Body BLOB, Etag TEXT, "
+                                 "Last_modified TEXT, Expires REAL, Last_used REAL, Size INTEGER)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (Last_used)")
+        self._connection.commit()
+        self._size = self._connection.execute("SELECT COALESCE(SUM(Size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def normalize_url(url):
+        """Return the cache key of a URL: lower-case scheme and host, no default port or fragment, sorted query."""
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or '').lower()
+        if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+            host = f'{host}:{parts.port}'
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+    def get(self, url):
+        """Return the cached response of a URL, fresh or stale, or None. Counts a hit when it is fresh."""
+        key = self.normalize_url(url)
+        with self._lock:
+            row = self._connection.execute("SELECT Body, Etag, Last_modified, Expires FROM responses WHERE Url = ?",
+                                           (key,)).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            self._connection.execute("UPDATE responses SET Last_used = ? WHERE Url = ?", (time.time(), key))
+            self._connection.commit()
+            response = CachedResponse(*row)
+            self.stats['hits' if response.fresh else 'misses'] += 1
+            return response
+
+    def store(self, url, body, headers):
+        """Keep the body of a successful response, unless its headers forbid it."""
+        expires = self._expiry(headers)
+        if expires is None:
+            return
+        key = self.normalize_url(url)
+        with self._lock:
+            previous = self._connection.execute("SELECT Size FROM responses WHERE Url = ?", (key,)).fetchone()
+            self._connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                     (key, body, headers.get('ETag'), headers.get('Last-Modified'), expires,
+                                      time.time(), len(body)))
+            self._size += len(body) - (previous[0] if previous else 0)
+            self.stats['stored'] += 1
+            self._evict()
+            self._connection.commit()
+
+    def revalidated(self, url, headers):
+        """Record that the server confirmed a stale response is still valid (304), refreshing its expiry."""
+        expires = self._expiry(headers)
+        key = self.normalize_url(url)
+        with self._lock:
+            if expires is None:
+                self._connection.execute("DELETE FROM responses WHERE Url = ?", (key,))
+            else:
+                self._connection.execute("UPDATE responses SET Expires = ? WHERE Url = ?", (expires, key))
+            self._connection.commit()
+            self.stats['revalidated'] += 1
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _expiry(self, headers):
+        # Time the response stays fresh, or None if it must not be stored
+        cache_control = headers.get('Cache-Control', '')
+        directives = cache_control.lower()
+        if 'no-store' in directives:
+            return None
+        now = time.time()
+        if 'no-cache' in directives:
+            return now
+        max_age = _MAX_AGE.search(cache_control)
+        if max_age:
+            age = headers.get('Age', '')
+            return now + int(max_age.group(1)) - (int(age) if age.isdigit() else 0)
+        if headers.get('Expires'):
+            try:
+                expires = parsedate_to_datetime(headers['Expires']).timestamp()
+                date = parsedate_to_datetime(headers['Date']).timestamp() if headers.get('Date') else now
+                return now + expires - date
+            except (TypeError, ValueError):
+                # An invalid date means the response is already expired
+                return now
+        return now + self.default_ttl
+
+    def _evict(self):
+        # Called with the lock held
+        while self._size > self.max_size:
+            rows = self._connection.execute("SELECT Url, Size FROM responses ORDER BY Last_used LIMIT 100").fetchall()
+            if not rows:
+                self._size = 0
+                return
+            for url, size in rows:
+                if self._size <= self.max_size:
+                    break
+                self._connection.execute("DELETE FROM responses WHERE Url = ?", (url,))
+                self._size -= size
+                self.stats['evicted'] += 1
@@ -0,0 +1,180 @@
+import asyncio
+import atexit
+import json
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from apis.retryPolicy import RetryPolicy
+from util.connectivityMonitor import ConnectivityMonitor
+from util.httpSessions import HttpSessionRegistry
+from util.rateScheduler import RateScheduler
+
+
+class AsyncHttpClient:
+    """
+    Shared asyncio HTTP client used by the REST API sources.
+
+    The client owns an event loop running on a background thread and a single aiohttp session,
+    so connections are pooled across every source and any number of lookups can be in flight
+    at once. Coroutines can be awaited from any event loop, or run from ordinary threads with run().
+
+    When a cache is set with use_cache(), responses are kept in it and fresh ones are served
+    without a request, nor a wait for the rate limit.
+
+    Connections are kept alive for `keepalive_timeout` seconds between requests, and the number
+    of connections to each host and the connect and read timeouts follow HttpSessionRegistry.
+
+    Failed requests are retried as `retry_policy` decides. When a host throttles the client
+    (429 or 503), the RateScheduler holds back every request to it for the time the host asked
+    for in its Retry-After header, or for the backoff delay. The host is held back even when
+    the request gives up because it asked for longer than the policy's `max_delay`.
+    """
+    keepalive_timeout = 30
+    # HttpCache of the responses, shared by every client
+    cache = None
+    # RetryPolicy of the requests, shared by every client
+    retry_policy = RetryPolicy()
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, limit=100, limit_per_host=None):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='http-client', daemon=True)
+        self._thread.start()
+        self._session = None
+
+    @classmethod
+    def get_client(cls):
+        """Return the shared client, creating it on first use."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                atexit.register(cls.close_client)
+            return cls._instance
+
+    @classmethod
+    def close_client(cls):
+        """Close the shared session and stop its event loop."""
+        with cls._instance_lock:
+            client, cls._instance = cls._instance, None
+        if client:
+            try:
+                client.run(client._close_session(), timeout=5)
+            except Exception as e:
+                logging.error(f"Error closing the HTTP client: {e}")
+            client.loop.call_soon_threadsafe(client.loop.stop)
+
+    @classmethod
+    def use_retry_policy(cls, retry_policy):
+        """Retry the failed requests as a RetryPolicy decides."""
+        cls.retry_policy = retry_policy
+
+    @classmethod
+    def use_cache(cls, cache):
+        """Cache the responses in an HttpCache, or stop caching them with None."""
+        previous, cls.cache = cls.cache, cache
+        if previous is not None and previous is not cache:
+            previous.close()
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the client's event loop from synchronous code and wait for its result."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("AsyncHttpClient.run() cannot be called from the client's own event loop; await the coroutine instead.")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def get_json(self, url, rate_limit=None):
+        """
+        Fetch a URL and decode its JSON body.
+
+        Requests wait for a permit from the shared RateScheduler, which throttles each host
+        separately without blocking the event loop.
+        Args:
+            url: The URL to request.
+            rate_limit: Optional (calls, period) tuple limiting how often the URL's host may be requested.
+        Returns:
+            The decoded JSON document.
+        Raises:
+            aiohttp.ClientError: If the request fails or does not return status 200, once it is not retried any more.
+        """
+        coro = self._get_json(url, rate_limit)
+        if asyncio.get_running_loop() is self.loop:
+            return await coro
+        # The session belongs to the client's loop, so hand the request over to it
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    async def _get_json(self, url, rate_limit):
+        cache = self.cache
+        cached = await asyncio.to_thread(cache.get, url) if cache else None
+        if cached and cached.fresh:
+            return json.loads(cached.body)
+
+        host = urlsplit(url).hostname
+        scheduler = RateScheduler.get_scheduler()
+        if rate_limit:
+            scheduler.configure(host, *rate_limit)
+        attempt = 0
+        while True:
+            await scheduler.acquire_async(host)
+            try:
+                return await self._request_json(url, cached)
+            except Exception as error:
+                delay = self.retry_policy.delay(attempt, error)
+                throttled = self.retry_policy.is_throttling(error)
+                if throttled:
+                    # Slow down every request to the host, for as long as it asked even when this request
+                    # gives up; the next permit waits for the pause
+                    pause = delay if delay is not None else self.retry_policy.retry_after(error)
+                    if pause:
+                        scheduler.penalize(host, pause)
+                if delay is None:
+                    raise
+                attempt += 1
+                logging.info(f"Retrying {url} in {delay:.1f} seconds (attempt {attempt}) after: {error}")
+                if not throttled:
+                    await asyncio.sleep(delay)
+
+    async def _request_json(self, url, cached):
+        cache = self.cache
+        session = await self._get_session()
+        monitor = ConnectivityMonitor.get_monitor()
+        try:
+            # A stale response is revalidated rather than fetched again
+            response = await session.get(url, headers=cached.validators() if cached else None)
+        except aiohttp.ClientConnectionError:
+            monitor.report_failure()
+            raise
+        monitor.report_success()
+        async with response:
+            if response.status == 304 and cached:
+                await asyncio.to_thread(cache.revalidated, url, response.headers)
+                return json.loads(cached.body)
+            response.raise_for_status()
+            if response.status != 200:
+                raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status,
+                                                  message=f"API request failed with status code: {response.status}")
+            body = await response.read()
+            document = json.loads(body)
+            if cache:
+                await asyncio.to_thread(cache.store, url, body, response.headers)
+            return document
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit,
+                                             limit_per_host=self.limit_per_host or HttpSessionRegistry.pool_size,
+                                             keepalive_timeout=self.keepalive_timeout, ttl_dns_cache=300)
+            timeout = aiohttp.ClientTimeout(sock_connect=HttpSessionRegistry.connect_timeout,
+                                            sock_read=HttpSessionRegistry.read_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                                  headers={'Accept-Encoding': 'gzip, deflate'})
+        return self._session
+
+    async def _close_session(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
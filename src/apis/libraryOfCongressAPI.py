@@ -1,6 +1,4 @@
-import requests
 import re
-from ratelimit import limits, sleep_and_retry
 import util.dictionaryValidationMethod as vd
 
 from apis.baseAPI import BaseAPI
@@ -9,39 +7,23 @@ from apis.baseAPI import BaseAPI
 # The LOC API does not have a dedicated endpoint for fetching metadata by identifier, so we use the search API
 # The API does not return ISBNs, so we return an empty list for ISBNs if the input is OCN
 class LibraryOfCongressAPI(BaseAPI):
+    rate_limit = (10, 10)  # Allow 10 requests every 10 seconds for burst limit
+
     def __init__(self):
         self.base_url = "https://www.loc.gov/search/"
         self.name = "LOC"
-        self.catalog_data = {
-            'ISBN': [],
-            'OCN': '',
-            'LCCN': [],
-            'LCCN_Source': []
-        }
-
-    @sleep_and_retry
-    @limits(calls=10, period=10)  # Allow 10 requests every 10 seconds for burst limit
-    def fetch_metadata(self, identifier, input_type):
 
+    def build_url(self, identifier, input_type):
         # The LOC API does not have a dedicated endpoint for fetching metadata by identifier, so we use the search API
-        url = f"{self.base_url}?fo=json&q={identifier}"
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            if response.status_code == 200:
-                return self.parse_response(response.json(), identifier, input_type)
-            else:
-                raise Exception(f"API request failed with status code: {response.status_code}")
-        except Exception as e:
-            # Log the error and continue with the search
-            # print(f"Error fetching metadata for identifier {identifier} from {self.name}: {e}")
-            return None
+        return f"{self.base_url}?fo=json&q={identifier}"
 
     def parse_response(self, response, identifier, input_type):
+        catalog_data = {'ISBN': [], 'OCN': '', 'LCCN': [], 'LCCN_Source': []}
         # Parses the response and returns a dictionary with the metadata
         lccns = []
         ocns = []
-        results = response.get('results')
+        isbns = [identifier] if input_type == 'isbn' else []
+        results = response.get('results') if isinstance(response, dict) else None
 
         if results:
             for item in results:
@@ -53,15 +35,14 @@ class LibraryOfCongressAPI(BaseAPI):
                 # Check if the OCN input matches the record OCN
                 if input_type == "ocn" and identifier not in ocns:
                     break
-                isbns = [identifier] if input_type == 'isbn' else []
 
-            self.catalog_data['ISBN'] = isbns
-            self.catalog_data['OCN'] = str(ocns[0]) if ocns else ''
-            self.catalog_data['LCCN'] = lccns
-            self.catalog_data['LCCN_Source'] = ["Library of Congress"] * len(lccns)
+            catalog_data['ISBN'] = isbns
+            catalog_data['OCN'] = str(ocns[0]) if ocns else ''
+            catalog_data['LCCN'] = lccns
+            catalog_data['LCCN_Source'] = ["Library of Congress"] * len(lccns)
 
-            self.catalog_data = vd.optimize_dictionary(self.catalog_data)
-            return {k.lower(): v for k, v in self.catalog_data.items()}
+            catalog_data = vd.optimize_dictionary(catalog_data)
+            return {k.lower(): v for k, v in catalog_data.items()}
 
         return None
 
@@ -0,0 +1,72 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+
+# Statuses meaning the server is overloaded or throttling us, after which the whole host is slowed down
+THROTTLING_STATUSES = {429, 503}
+# Statuses of errors that may go away on their own
+RETRYABLE_STATUSES = THROTTLING_STATUSES | {408, 425, 500, 502, 504}
+
+
+class RetryPolicy:
+    """
+    Decides which failed requests are tried again, and when.
+
+    Connection errors, timeouts and the statuses in RETRYABLE_STATUSES are retried up to
+    `retries` times. The n-th retry waits a random time of up to `backoff` * 2**n seconds, but
+    no more than `max_delay` ("full jitter"), so that clients failing together do not retry
+    together. A Retry-After header sets the wait instead. When it asks for more than
+    `max_delay` seconds, the request fails rather than holding up the search, but the
+    AsyncHttpClient still holds back the host for that long if it was throttling.
+    """
+
+    def __init__(self, retries=3, backoff=0.5, max_delay=30.0):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+
+    @staticmethod
+    def is_retryable(error):
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status in RETRYABLE_STATUSES
+        return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+    @staticmethod
+    def is_throttling(error):
+        """Return whether the error asks the client to slow down its requests to the host."""
+        return isinstance(error, aiohttp.ClientResponseError) and error.status in THROTTLING_STATUSES
+
+    @staticmethod
+    def retry_after(error):
+        """Return the seconds the server asked to wait in the Retry-After header of an error response, or None."""
+        headers = getattr(error, 'headers', None)
+        value = headers.get('Retry-After') if headers else None
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def delay(self, attempt, error):
+        """
+        Return the seconds to wait before retrying a request that failed with `error`.
+
+        Args:
+            attempt (int): The number of retries made already.
+            error (Exception): The error of the last attempt.
+        Returns:
+            float: The delay, or None if the request should not be retried.
+        """
+        if attempt >= self.retries or not self.is_retryable(error):
+            return None
+        retry_after = self.retry_after(error)
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.backoff * 2 ** attempt))
@@ -1,16 +1,9 @@
 import os
-import platform
-from pathlib import Path
 import sys
 import logging
 import threading
 import time
-import csv
-import webbrowser
 import subprocess
-import queue
-from selenium.common.exceptions import WebDriverException
-import json
 
 
 
@@ -22,28 +15,17 @@ from tkinter import filedialog, messagebox, ttk, scrolledtext
 from tkinter.filedialog import asksaveasfile
 
 # Importing custom modules for processing files and handling GUI elements
-from util.fileProcessor import verifyFileFormat
+from util.fileProcessor import streamFileFormat
+from util.settings import get_app_data_directory, load_settings, save_settings
 from gui.priorityList import PriorityList
 
 # Database management imports for application data handling
 from db.databaseManager import DatabaseManager
 
-# API modules for gathering library metadata from various sources
-from apis.harvardLibraryAPI import HarvardLibraryAPI
-from apis.libraryOfCongressAPI import LibraryOfCongressAPI
-from apis.googleBooksAPI import GoogleBooksAPI
-from apis.openLibraryAPI import OpenLibraryAPI
-
-# Web scraping modules for extracting data from various university libraries
-from webScraping.columbiaLibraryAPI import ColumbiaLibraryAPI
-from webScraping.cornellLibraryAPI import CornellLibraryAPI
-from webScraping.dukeLibraryAPI import DukeLibraryAPI
-from webScraping.indianaLibraryAPI import IndianaLibraryAPI
-from webScraping.johnsHopkinsLibraryAPI import JohnsHopkinsLibraryAPI
-from webScraping.northCarolinaStateLibraryAPI import NorthCarolinaStateLibraryAPI
-from webScraping.pennStateLibraryAPI import PennStateLibraryAPI
-from webScraping.yaleLibraryAPI import YaleLibraryAPI
-from webScraping.stanfordLibraryAPI import StanfordLibraryAPI
+# The harvesting pipeline and the sources it queries
+from core.metadataHarvester import MetadataHarvester
+from core.sources import DEFAULT_PRIORITY_LIST, initialize_sources, load_source_lists, save_source_lists
+from core.checkpoint import JobCheckpoint, hash_file
 
 class LibraryMetadataHarvesterApp(tk.Tk):
     """A GUI application for harvesting library metadata from different sources.
@@ -52,11 +34,11 @@ class LibraryMetadataHarvesterApp(tk.Tk):
         source_mapping (dict): An initially empty mapping that will be populated with library names as keys and their respective API class instances as values.
         source_threads (dict): A dictionary holding threading objects corresponding to the initialization of each API class. This allows for asynchronous initialization and tracking of each API's loading status.
         db_manager (DatabaseManager): An object that handles interactions with the application's database for storing and retrieving metadata.
+        harvester (MetadataHarvester): The harvesting pipeline that performs the searches started from the GUI.
         priority_list (list): An ordered list of library names representing the user's preference order for metadata source selection.
         search_status_var (tk.StringVar): A tkinter StringVar used to track and display the status of ongoing metadata searches within the GUI.
         search_active (bool): A boolean flag indicating whether a metadata search is currently in progress.
-        total_identifiers (int): The total number of unique identifiers (e.g., ISBNs) to be searched in the metadata harvesting process.
-        current_identifier (int): The index of the current identifier being searched in the list of total identifiers.
+        settings (dict): User-tunable settings such as the number of identifiers searched concurrently.
         
     """
     
@@ -64,22 +46,14 @@ class LibraryMetadataHarvesterApp(tk.Tk):
         """Initialize the application, its variables, and UI components."""
         super().__init__()
         self.app_data_dir = self.get_app_data_directory()
+        self.settings = load_settings(self.app_data_dir)
         self.output_file_path = None
         self.log_window_open = False
         self.log_file_last_size = 0
         self.update_log_task = None 
         self.priority_window_open = False
-        self.last_processed = None
         self.source_mapping = {}
-        self.priority_list = [
-        'Google Books (API)', 'Harvard Library (API)',
-        'Library of Congress (API)', 'Open Library (API)',
-        'Columbia Library (Blacklight)', 'Cornell Library (Blacklight)',
-        'Duke Library (Blacklight)', 'Indiana Library (Blacklight)',
-        'Johns Hopkins Library (Blacklight)', 'North Carolina State Library (Blacklight)',
-        'Pennsylvania State Library (Blacklight)', 'Stanford Library (Blacklight)',
-        'Yale Library (Blacklight)'
-    ]
+        self.priority_list = list(DEFAULT_PRIORITY_LIST)
         self.setup_logging()
         self.configure_app()
         self.initialize_database()
@@ -91,23 +65,16 @@ class LibraryMetadataHarvesterApp(tk.Tk):
         self.search_status_var = tk.StringVar(self)
         self.search_status_label = tk.Label(self, textvariable=self.search_status_var, font=("Helvetica", 16), bg='#202020', fg='white')
         self.search_active = False
-        self.total_identifiers = 0
-        self.current_identifier = 0
         self.search_start_time = None
         self.search_total_time = None
+        self.harvester = MetadataHarvester(self.db_manager, self.source_mapping, self.priority_list, self.settings)
+        self.harvester.initialize_planner(self.app_data_dir)
+        self.harvester.initialize_metrics(self.app_data_dir)
 
 
     def get_app_data_directory(self):
         """Get the path to the application's data directory."""
-        if platform.system() == "Windows":
-            app_data_path = Path(os.getenv('APPDATA')) / 'LibraryMetadataHarvester'
-        elif platform.system() == "Darwin":
-            app_data_path = Path.home() / 'Library' / 'Application Support' / 'LibraryMetadataHarvester'
-        else:  # Linux and other Unix-like OSes
-            app_data_path = Path.home() / '.LibraryMetadataHarvester'
-
-        app_data_path.mkdir(parents=True, exist_ok=True)
-        return app_data_path
+        return get_app_data_directory()
 
     def configure_app(self):
         """Configure the main window settings and styles."""
@@ -165,9 +132,8 @@ class LibraryMetadataHarvesterApp(tk.Tk):
         """Initialize the application's database and required tables."""
         db_path = self.get_app_data_directory()
         self.db_manager = DatabaseManager(db_path=db_path)
-        self.db_manager.create_table("books", "Isbn TEXT PRIMARY KEY, Ocn TEXT")
-        self.db_manager.create_table("lccn", "Lccn_id INTEGER PRIMARY KEY AUTOINCREMENT, Lccn TEXT, Source TEXT")
-        self.db_manager.create_table("book_lccn", "Isbn TEXT, Lccn_id INTEGER, FOREIGN KEY (Isbn) REFERENCES books (Isbn), FOREIGN KEY (Lccn_id) REFERENCES lccn (Lccn_id)")
+        MetadataHarvester.initialize_database(self.db_manager)
+        MetadataHarvester.initialize_http_cache(db_path, self.settings)
 
     def setup_ui(self):
         """Setup the user interface for the application."""
@@ -205,6 +171,10 @@ class LibraryMetadataHarvesterApp(tk.Tk):
         self.file_entry.grid(row=4, column=0, sticky='w')
         ttk.Button(self.input_frame, text="Browse", command=self.browse_file).grid(row=4, column=1, padx=5)
 
+        ttk.Label(self.input_frame, text="Concurrent Searches:", style='TLabel').grid(row=5, column=0, sticky='w', pady=(10, 0))
+        self.max_workers_var = tk.IntVar(value=self.settings['max_workers'])
+        ttk.Spinbox(self.input_frame, from_=1, to=32, textvariable=self.max_workers_var, width=5).grid(row=6, column=0, sticky='w')
+
     def update_checkbox_state(self):
         """Update the state of checkboxes based on the input file type selection."""
         if self.input_file_type.get() == 1:  # ISBN selected
@@ -319,7 +289,7 @@ class LibraryMetadataHarvesterApp(tk.Tk):
                 elapsed_time = time.time() -self.search_start_time
                 elapsed_time_str = time.strftime("%H:%M:%S", time.gmtime(elapsed_time))
 
-                self.search_status_var.set(f"{self.current_identifier}/{self.total_identifiers}\n{initial_message}{'.' * dot_count}\nElapsed Time: {elapsed_time_str}")
+                self.search_status_var.set(f"{self.harvester.progress()}\n{initial_message}{'.' * dot_count}\nElapsed Time: {elapsed_time_str}")
                 dot_count = (dot_count + 1) % 4
                 time.sleep(0.5)  # Wait before updating again to avoid high CPU usage
 
@@ -328,35 +298,14 @@ class LibraryMetadataHarvesterApp(tk.Tk):
             threading.Thread(target=update_message, daemon=True).start() 
     
     def initialize_sources(self):
-        """Initialize source API objects in separate threads."""
-        sources = {
-            "Google Books (API)": GoogleBooksAPI,
-            "Harvard Library (API)": HarvardLibraryAPI,
-            "Library of Congress (API)": LibraryOfCongressAPI,
-            "Open Library (API)": OpenLibraryAPI,
-            "Columbia Library (Blacklight)": ColumbiaLibraryAPI,
-            "Cornell Library (Blacklight)": CornellLibraryAPI,
-            "Duke Library (Blacklight)": DukeLibraryAPI,
-            "Indiana Library (Blacklight)": IndianaLibraryAPI,
-            "Johns Hopkins Library (Blacklight)": JohnsHopkinsLibraryAPI,
-            "North Carolina State Library (Blacklight)": NorthCarolinaStateLibraryAPI,
-            "Pennsylvania State Library (Blacklight)": PennStateLibraryAPI,
-            "Yale Library (Blacklight)": YaleLibraryAPI,
-            "Stanford Library (Blacklight)": StanfordLibraryAPI
-        }
-        
-        for key, api_class in sources.items():
-            try:
-                api_instance = api_class()  # Instantiate the API class
-                self.source_mapping[key] = api_instance  # Add instance to source mapping
-            except RuntimeError as e:
-                logging.error(f"WebDriver error initializing {key}: {e}\nPlease make sure Google Chrome and ChromeDriver are installed and updated.")
+        """Initialize source API objects, reporting the first failure to the user."""
+        def show_error(key, error):
+            if isinstance(error, RuntimeError):
                 messagebox.showerror("Initialization Error", f"An error occurred initializing {key}. Please make sure Google Chrome is installed and up to date.")
-                break  # Stop further initialization
-            except Exception as e:
-                logging.error(f"An error occurred initializing {key}: {e}")
+            else:
                 messagebox.showerror("Initialization Error", f"An unspecified error occurred initializing {key}. Please check your setup.")
-                break  # Stop further initialization
+
+        self.source_mapping.update(initialize_sources(on_error=show_error))
 
 
 
@@ -367,147 +316,6 @@ class LibraryMetadataHarvesterApp(tk.Tk):
             self.file_entry.delete(0, tk.END)
             self.file_entry.insert(0, filename)
 
-    def get_existing_data(self, identifier, file_type):
-        """Retrieve existing data from the database based on the identifier and file type."""
-        # Prepare initial data structure
-        existing_data = {}
-
-        # Format database query condition based on file type
-        condition = f"Isbn = '{identifier}'" if file_type == 'ISBN' else f"Ocn = '{identifier}'"
-        logging.info(f"Querying database for {file_type} {identifier}.")
-
-        # Fetch and unpack book data
-        book_data = self.db_manager.fetch_data("books", f"WHERE {condition}")
-        if book_data:
-            isbn, ocn = book_data[0][:2]  # Unpack first row's ISBN and OCN
-            found_items = []
-            if isbn:
-                existing_data['isbn'] = [isbn]
-                found_items.append(f"ISBN={isbn}")
-            if ocn:
-                existing_data['ocn'] = ocn
-                found_items.append(f"OCN={ocn}")
-            if found_items:
-                logging.info(f"Found database record for {file_type} {identifier}: " + ', '.join(found_items))
-            else:
-                logging.info(f"Record found for {file_type} {identifier} but no ISBN or OCN data available.")
-        else:
-            logging.info(f"No database record found for {file_type} {identifier}.")
-
-        # Determine correct ISBN identifier for LCCN data retrieval based on file_type
-        lccn_identifier = existing_data.get('isbn', [''])[0] if file_type == 'ISBN' or 'isbn' in existing_data else ''
-        if not lccn_identifier and file_type == 'OCN':  # Resolve ISBN for OCN if not already found
-            book_data_from_ocn = self.db_manager.fetch_data("books", f"WHERE Ocn = '{identifier}'")
-            if book_data_from_ocn:
-                lccn_identifier = book_data_from_ocn[0][0]  # Assuming ISBN is the first column
-
-        # Fetch and compile LCCN data if necessary
-        if lccn_identifier and (self.output_value_lccn.get() or self.output_value_lccn_source.get()):
-            lccn_query = f"JOIN book_lccn ON lccn.Lccn_id = book_lccn.Lccn_id WHERE book_lccn.Isbn = '{lccn_identifier}'"
-            lccn_data = self.db_manager.fetch_data("lccn", lccn_query)
-            if lccn_data:
-                # Update here to only fetch the first LCCN and LCCN source
-                first_lccn_row = lccn_data[0]  # Assuming the first row has the necessary data
-                existing_data['lccn'] = [str(first_lccn_row[1])] if first_lccn_row[1] else None
-                existing_data['lccn_source'] = [str(first_lccn_row[2])] if first_lccn_row[2] else None
-                if existing_data['lccn']:
-                    logging.info(f"LCCN data found for {file_type} {identifier}: {existing_data['lccn']}")
-                if existing_data['lccn_source']:
-                    logging.info(f"LCCN Source data found for {file_type} {identifier}: {existing_data['lccn_source']}")
-            else:
-                logging.info(f"No LCCN data found for {file_type} {identifier}.")
-
-
-        return existing_data
-    
-    def write_data_to_output_file(self, identifier, data):
-        """
-        Writes the collected metadata for a given identifier to the configured output file.
-        
-        This method compiles data into a format consistent with user-selected options and 
-        writes this information into a tab-delimited file. If the file doesn't exist, it will be created. 
-        If it does, data will be appended. This method considers user settings to determine 
-        which data should be included in the output file, such as ISBN, OCN, LCCN, and LCCN Source.
-
-        Args:
-            identifier (str): The unique identifier for the item being processed. 
-                            This could be an ISBN, OCN, or any other defined identifier.
-            data (dict): A dictionary containing metadata for the item associated 
-                        with the identifier. Keys should match the user-selected 
-                        output options (e.g., 'isbn', 'ocn', 'lccn', 'lccn_source').
-
-        Returns:
-            None: The function performs file I/O operations and does not return a value. 
-                It logs a message upon successful writing of the data.
-        """
-        if not hasattr(self, 'output_file_path') or not self.output_file_path:
-            return
-        
-        # Determine data type based on user selection
-        input_type = 'ISBN' if self.input_file_type.get() == 1 else 'OCN'
-
-        # Initialize headers based on user selections
-        headers = []
-        if self.output_value_isbn.get():
-            headers.append('ISBN')
-        if self.output_value_ocn.get():
-            headers.append('OCN')
-        if self.output_value_lccn.get():
-            headers.append('LCCN')
-        if self.output_value_lccn_source.get():
-            headers.append('LCCN_Source')
-
-
-        # Write data to file, creating it if necessary
-        file_exists = os.path.isfile(self.output_file_path) and os.path.getsize(self.output_file_path) > 0
-        with open(self.output_file_path, 'a', newline='') as file:
-            # Change to csv.writer with delimiter as tab
-            tsv_writer = csv.writer(file, delimiter='\t')
-            if not file_exists:
-                tsv_writer.writerow(headers)
-
-            # Prepare the data row based on the chosen options
-            row_data = []
-            for header in headers:
-                if header == 'ISBN':
-                    # Ensure isbn_data is a list; if identifier is a single ISBN (str), convert it to a list
-                    isbn_data = [identifier] if input_type == 'ISBN' else data.get('isbn', [])
-                    # Remove any potential non-string or empty elements
-                    isbn_data = [str(isbn) for isbn in isbn_data if isbn]
-                    # Join the ISBN data, ensuring all elements are strings
-                    #formatted_data = '; '.join(isbn_data)
-                    formatted_data = isbn_data[0] if isbn_data else ''
-                elif header == 'OCN':
-                    # Ensure OCN data is extracted properly; default to an empty list if not found
-                    ocn_data = identifier if input_type == 'OCN' else data.get('ocn', '')
-                    # Assuming OCN is always a single value, take the first element, if available
-                    formatted_data = str(ocn_data) if ocn_data else ''
-                elif header == 'LCCN':
-                    # Extract LCCN data, ensuring it's in list form
-                    lccn_data = data.get('lccn', [])
-                    # Remove any potential non-string or empty elements
-                    lccn_data = [str(lccn) for lccn in lccn_data if lccn]
-                    # Join the LCCN data
-                    #formatted_data = '; '.join(lccn_data)
-                    formatted_data = lccn_data[0] if lccn_data else ''
-                elif header == 'LCCN_Source':
-                    # Similarly handle LCCN source data
-                    lccn_source_data = data.get('lccn_source', [])
-                    lccn_source_data = [str(source) for source in lccn_source_data if source]
-                    #formatted_data = '; '.join(lccn_source_data)
-                    formatted_data = lccn_source_data[0] if lccn_source_data else ''
-                else:
-                    continue 
-                
-                row_data.append(formatted_data)
-            
-            row_data = [item if item not in [None, 'None'] else '' for item in row_data]
-            # Check if all elements are empty, if not then write to the file
-            if any(row_data):
-                tsv_writer.writerow(row_data)
-                logging.info(f"Write completed for {input_type} {identifier}")
-                self.last_processed = identifier
-    
     def start_search(self):
         """Validate output options and start the search process."""
         if sum([self.output_value_isbn.get(), self.output_value_ocn.get(), self.output_value_lccn.get(), self.output_value_lccn_source.get()]) <= 1:
@@ -515,7 +323,7 @@ class LibraryMetadataHarvesterApp(tk.Tk):
             return
 
         file_type = 'ISBN' if self.input_file_type.get() == 1 else 'OCN'
-        validation_result, data = verifyFileFormat(self.file_entry.get(), file_type)
+        validation_result, data = streamFileFormat(self.file_entry.get(), file_type, self.settings['mmap_input'])
         
         if validation_result == 'Invalid':
             messagebox.showerror("Error", "Invalid file format or contents. Please check the file.")
@@ -528,8 +336,40 @@ class LibraryMetadataHarvesterApp(tk.Tk):
         if not self.output_file_path:
             messagebox.showwarning("Warning", "Please set the output file path")
             return
-        
-        if os.path.exists(self.output_file_path) and os.path.getsize(self.output_file_path) > 0:
+
+        try:
+            max_workers = self.max_workers_var.get()
+        except tk.TclError:
+            max_workers = 0
+        if max_workers < 1:
+            messagebox.showwarning("Warning", "Please enter a whole number of concurrent searches greater than zero.")
+            return
+        self.settings['max_workers'] = max_workers
+        save_settings(self.app_data_dir, self.settings)
+
+        output_options = {
+        'isbn': self.output_value_isbn.get(),
+        'ocn': self.output_value_ocn.get(),
+        'lccn': self.output_value_lccn.get(),
+        'lccn_source': self.output_value_lccn_source.get()
+                }
+        input_type = file_type.lower()
+
+        # Offer to resume an unfinished search of the same file into the same output file
+        input_hash = hash_file(self.file_entry.get())
+        checkpoint = JobCheckpoint.find(self.app_data_dir, input_hash, self.output_file_path)
+        if checkpoint and checkpoint.input_type == input_type:
+            resume = messagebox.askyesno("Resume Search", f"An unfinished search of this file into the selected output file was found ({checkpoint.completed_count} processed). Do you wish to resume it?")
+            if resume:
+                # Keep the columns of the rows already written
+                output_options = checkpoint.output_options
+            else:
+                checkpoint.delete()
+                checkpoint = None
+        else:
+            checkpoint = None
+
+        if checkpoint is None and os.path.exists(self.output_file_path) and os.path.getsize(self.output_file_path) > 0:
             # Prompt the user about overwriting the file
             overwrite = messagebox.askyesno("Confirm Overwrite", "The output file already has content. Do you wish to overwrite it?")
             if not overwrite:
@@ -539,226 +379,53 @@ class LibraryMetadataHarvesterApp(tk.Tk):
             else:
                 with open(self.output_file_path, 'w') as file:
                     pass
-        
+
+        if checkpoint is None:
+            checkpoint = JobCheckpoint.create(self.app_data_dir, input_hash, input_path=self.file_entry.get(), input_type=input_type,
+                                              output_path=self.output_file_path, output_options=output_options)
 
         if self.priority_window_open:
             self.on_priority_window_close()
-        logging.info(f"Search started for {file_type} with {len(data)} items and priority list: {self.priority_list}")
-
         self.toggle_ui_for_search(True)
         self.search_start_time = time.time()
         self.search_active = True
         self.search_in_progress = True
-        self.search_thread = threading.Thread(target=self.perform_search, args=(data,), daemon=True)
+        self.search_thread = threading.Thread(target=self.perform_search, args=(data, input_type, output_options, checkpoint), daemon=True)
         self.search_thread.start()
         
-    def perform_search(self, data):
-        """Perform the search operation based on the provided data."""
-        self.total_identifiers = len(data)
+    def perform_search(self, data, input_type, output_options, checkpoint=None):
+        """Perform the search operation based on the provided data on the harvester."""
         self.animate_search_status("Searching")
         self.search_in_progress = True
 
-        output_options = {
-        'isbn': self.output_value_isbn.get(),
-        'ocn': self.output_value_ocn.get(),
-        'lccn': self.output_value_lccn.get(),
-        'lccn_source': self.output_value_lccn_source.get()
-                }
-        
-        input_type = 'isbn' if self.input_file_type.get() == 1 else 'ocn'
-        
-        for index,identifier in enumerate(data):
-            self.current_identifier = index + 1
-            logging.info(f"{index}/{self.total_identifiers}. Searching metadata for {identifier}")
-            
-            if not self.search_active: # Check if the search was stopped
-                break
-                 
-            # Fetch existing data for the identifier
-            existing_data = self.get_existing_data(identifier, 'ISBN' if self.input_file_type.get() == 1 else 'OCN')
-
-            # Ensure that the identifier is properly represented in existing_data
-            if input_type == 'isbn':
-                # If the identifier is not already in the list, add it; otherwise, keep the existing list.
-                existing_data['isbn'] = [str(identifier)] if str(identifier) not in existing_data.get('isbn', []) else existing_data.get('isbn', [])
-            elif input_type == 'ocn':
-                # Set the OCN to the identifier if it's different; otherwise, keep the existing OCN.
-                existing_data['ocn'] = str(identifier) if existing_data.get('ocn', '') != str(identifier) else existing_data.get('ocn', '')
-
-            # Update existing data based on missing fields and priority list
-            self.fetch_and_update_missing_data(existing_data, identifier, input_type, output_options)
-
-            # Write updated data to the output file and database
-            self.update_database_with_existing_data(identifier, existing_data, input_type)
-            self.write_data_to_output_file(identifier, existing_data)
-
-        if self.search_active:
-            logging.info(f"Search thread completed successfully for {len(data)} items.")
+        self.harvester.priority_list = self.priority_list
+        if self.harvester.run(data, input_type, output_options, self.output_file_path, checkpoint):
             self.finalize_search()
-        else:
-            logging.info(f"Search thread stopped manually after processing {self.current_identifier} out of {len(data)} items.")
 
     def finalize_search(self,manually_stopped=None):
         """Finalize the search operation by resetting states and notifying the user."""
         self.search_active = False
+        self.harvester.stop()
         self.toggle_ui_for_search(False)
         if self.search_start_time:
             self.search_total_time = time.time() - self.search_start_time  # Calculate total time
             total_time_str = time.strftime("%H:%M:%S", time.gmtime(self.search_total_time))
             if manually_stopped:
                 logging.info("Search stopped manually")
-                last_processed_info = f"\nLast identifier processed: {self.last_processed}." if self.last_processed else ""
-                messagebox.showinfo("Search Stopped", f"Search stopped manually at {total_time_str}.\nProcessed {self.current_identifier - 1}/{self.total_identifiers}.{last_processed_info}")
+                last_processed_info = f"\nLast identifier processed: {self.harvester.last_processed}." if self.harvester.last_processed else ""
+                messagebox.showinfo("Search Stopped", f"Search stopped manually at {total_time_str}.\nProcessed {self.harvester.progress()}.{last_processed_info}\nStart the same search again to resume it.")
             else:
                 logging.info("Search completed")
                 messagebox.showinfo("Search Completed", f"Search completed in {total_time_str}.")
         else:
             if manually_stopped:
                 logging.info("Search stopped manually")
-                last_processed_info = f"\nLast identifier processed: {self.last_processed}." if self.last_processed else ""
-                messagebox.showinfo("Search Stopped", f"Search stopped manually.\nProcessed {self.current_identifier - 1}/{self.total_identifiers}.{last_processed_info}")
+                last_processed_info = f"\nLast identifier processed: {self.harvester.last_processed}." if self.harvester.last_processed else ""
+                messagebox.showinfo("Search Stopped", f"Search stopped manually.\nProcessed {self.harvester.progress()}.{last_processed_info}\nStart the same search again to resume it.")
             else:
                 logging.info("Search completed")
                 messagebox.showinfo("Search Completed", "Search completed.")
-        self.current_identifier = 0
-        self.last_processed = None
-
-    def fetch_and_update_missing_data(self, existing_data, identifier, input_type, output_options):
-        """
-        Fetches missing metadata for a given identifier from various data sources 
-        based on a priority list and updates the existing data accordingly.
-
-        This method iterates over the priority list of sources and queries each 
-        source for missing metadata. When new data is found, it updates the existing 
-        data structure. The search for missing data continues until all data is found 
-        or all sources have been queried.
-
-        Args:
-            existing_data (dict): The current set of metadata associated with the identifier.
-            identifier (str): The unique identifier for the metadata subject (e.g., ISBN, OCN).
-            input_type (str): The type of the identifier (e.g., 'ISBN', 'OCN').
-            output_options (dict): A dictionary specifying which types of data to fetch.
-
-        Returns:
-            None: The function updates the existing_data dictionary in-place and does not return anything.
-        """
-        effective_output_options = output_options.copy()
-        effective_output_options.pop(input_type, None)
-
-        missing_data = {key for key, value in effective_output_options.items() if value and key.lower() not in existing_data}
-
-        if missing_data:
-            for source_name in self.priority_list:
-                if not self.search_active: # Check if the search was stopped
-                    return
-                source = self.source_mapping.get(source_name)
-                if not source:
-                    continue
-
-                logging.info(f"Querying {source_name} for missing data for identifier: {identifier}")
-
-
-                try:
-                    result = source.fetch_metadata(identifier, input_type)
-                except Exception as e:
-                    logging.error(f"Error fetching metadata from {source_name} for {identifier}: {e}")
-                    continue  # Proceed to the next source if there's an error
 
-                if not self.search_active: # Check if the search was stopped
-                    return
-                if not result: continue
-
-                # Update the existing data if new data is found
-                updated = False
-                for data_type in missing_data.copy():  # Iterate over a copy to modify original safely
-                    if data_type in result and result[data_type]:
-                        if isinstance(result[data_type], (str, list)) and not result[data_type]:
-                            continue
-                        
-                        existing_data[data_type] = result[data_type.lower()]
-                        missing_data.remove(data_type)
-                        updated = True
-
-                if updated:
-                    logging.info(f"Updated data for {identifier} from {source_name}")
-
-                    if not missing_data:  # Exit early if all missing data has been found
-                        break
-
-
-    def update_database_with_existing_data(self, identifier, data, input_type):
-        """
-        Update the database with the collected data for a given identifier.
-
-        Args:
-            identifier (str): The identifier for the data (ISBN or OCN).
-            data (dict): The data to be updated in the database.
-            input_type (str): The type of identifier ('isbn' or 'ocn').
-        """
-        # Normalize ISBNs to a list for uniform processing
-        isbns = data.get('isbn', [])
-        ocn = data.get('ocn', '')
-        lccns = data.get('lccn', [])
-        lccn_sources = data.get('lccn_source', [])
-
-        # Update book records
-        for isbn in isbns:
-            self._update_book_records(isbn, ocn)
-        
-        # Update LCCN records only once per ISBN to avoid redundancy
-        self._update_lccn_records(isbns, lccns, lccn_sources)
-
-    def _process_book_identifiers(self, isbn_str, ocn_str):
-        """
-        Process and validate book identifiers.
-
-        Args:
-            isbn_str (str): The ISBN string to process.
-            ocn_str (str): The OCN string to process.
-
-        Returns:
-            tuple: A tuple containing the processed ISBN and OCN as strings.
-        """
-        isbn = isbn_str.strip() if isbn_str else None
-        ocn = ocn_str.strip() if ocn_str else None
-        return isbn, ocn
-
-
-
-    def _update_book_records(self, isbn, ocn):
-        """
-        Insert or update the book records in the database based on an ISBN and OCN.
-
-        Args:
-            isbn (str): The ISBN of the book.
-            ocn (str): The OCN of the book.
-        """
-        if not self.db_manager.data_exists('books', f"Isbn = '{isbn}'"):
-            self.db_manager.insert_data('books', (isbn, ocn))
-        elif ocn:
-            existing_ocn = self.db_manager.fetch_data('books', f"WHERE Isbn = '{isbn}'")[0][1]
-            if existing_ocn != ocn:
-                self.db_manager.update_data('books', f"Ocn = '{ocn}'", f"Isbn = '{isbn}'")
-
-    def _update_lccn_records(self, isbns, lccns, lccn_sources):
-        """
-        Update the LCCN records associated with books in the database.
-
-        Args:
-            isbns (list): The list of ISBNs of the books.
-            lccns (list): A list of LCCNs associated with the books.
-            lccn_sources (list): A list of sources corresponding to each LCCN.
-        """
-        for lccn, source in zip(lccns, lccn_sources):
-            if not self.db_manager.data_exists('lccn', f"Lccn = '{lccn}'"):
-                self.db_manager.insert_data('lccn', (None, lccn, source))
-                lccn_id = self.db_manager.fetch_data('lccn', f"WHERE Lccn = '{lccn}'")[0][0]
-            else:
-                lccn_id = self.db_manager.fetch_data('lccn', f"WHERE Lccn = '{lccn}'")[0][0]
-            
-            for isbn in isbns:
-                if not self.db_manager.data_exists('book_lccn', f"Isbn = '{isbn}' AND Lccn_id = {lccn_id}"):
-                    self.db_manager.insert_data('book_lccn', (isbn, lccn_id))
     def choose_output_file(self):
         """Prompt the user to select a file path for saving the output data in TSV format."""
         file_options = {
@@ -823,41 +490,10 @@ class LibraryMetadataHarvesterApp(tk.Tk):
     
 
     def save_source_lists(self):
-        data = {
-            'selected_sources': self.priority_list,
-            'unused_sources': self.unused_sources
-        }
-        app_data_dir = self.get_app_data_directory()
-        filepath = app_data_dir / 'source_lists.json'
-        with open(filepath, 'w') as file:
-            json.dump(data, file)
+        save_source_lists(self.get_app_data_directory(), self.priority_list, self.unused_sources)
 
     def load_source_lists(self):
-        app_data_dir = self.get_app_data_directory()
-        filepath = app_data_dir / 'source_lists.json'
-        try:
-
-            if os.path.getsize(filepath) == 0:
-                raise json.JSONDecodeError("File is empty", "", 0)
-
-
-            with open(filepath, 'r') as file:
-                data = json.load(file)
-                selected_sources = data.get('selected_sources', [])
-                unused_sources = data.get('unused_sources', [])
-                # Safeguard to ensure all sources are included
-                all_sources = set(self.priority_list + self.unused_sources)
-                file_sources = set(selected_sources + unused_sources)
-                
-                if not all_sources == file_sources:
-                    # If not all sources are present, reinitialize the file
-                    self.save_source_lists()
-                else:
-                    self.priority_list = selected_sources
-                    self.unused_sources = unused_sources
-        except Exception as e:
-            # If the file doesn't exist or is empty, save the initial lists to create the file.
-            self.save_source_lists()
+        self.priority_list, self.unused_sources = load_source_lists(self.get_app_data_directory(), self.priority_list, self.unused_sources)
 
 
     def open_log(self):
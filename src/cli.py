@@ -0,0 +1,304 @@
+import os
+import sys
+import json
+import logging
+import argparse
+import itertools
+import signal
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+from util.fileProcessor import SAMPLE_SIZE, read_lines, streamLineFormat
+from util.settings import DEFAULT_SETTINGS, get_app_data_directory, load_settings
+from db.databaseManager import DatabaseManager
+from core.metadataHarvester import MetadataHarvester
+from core.sources import SOURCE_CLASSES, initialize_sources, load_source_lists
+from core.checkpoint import JobCheckpoint, hash_file, hash_lines
+from webScraping.webDriverManager import WebDriverManager
+
+# Exit codes
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+OUTPUT_FIELDS = ['isbn', 'ocn', 'lccn', 'lccn_source']
+SEARCH_MODES = ['sequential', 'parallel', 'hedged']
+
+
+class UsageError(Exception):
+    """Raised when the command line or the config file cannot be used."""
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m src',
+        description="Harvest ISBN, OCN and LC call number metadata for a list of identifiers without the GUI.",
+        epilog="Options given on the command line override the values of the config file. "
+               f"Exit codes: {EXIT_OK} success, {EXIT_ERROR} runtime error, {EXIT_USAGE} usage or input error, {EXIT_INTERRUPTED} interrupted."
+    )
+    parser.add_argument('-i', '--input', help="File with one identifier per line, or '-' to read standard input.")
+    parser.add_argument('-t', '--input-type', choices=['isbn', 'ocn'], help="Type of the identifiers. Detected from the input by default.")
+    parser.add_argument('-o', '--output', help="TSV file to write, or '-' for standard output (the default).")
+    parser.add_argument('-f', '--fields', help=f"Comma-separated output fields out of {', '.join(OUTPUT_FIELDS)} (default: all).")
+    parser.add_argument('-s', '--sources', help="Comma-separated sources in priority order, matched case-insensitively against the source names "
+                                                "(e.g. 'google,harvard,congress'). Defaults to the priority list saved by the GUI.")
+    parser.add_argument('-w', '--workers', type=int, help="Number of identifiers searched concurrently.")
+    parser.add_argument('-b', '--browsers', type=int, help="Number of browsers the Blacklight scrapers may run at the same time.")
+    parser.add_argument('-m', '--search-mode', choices=SEARCH_MODES, help="How the sources of the priority list are queried for each identifier.")
+    parser.add_argument('--mmap-input', action='store_true', help="Read the input file through a memory map.")
+    parser.add_argument('-c', '--config', help="JSON file with any of the long option names above (e.g. \"search_mode\") and the keys of settings.json.")
+    write_mode = parser.add_mutually_exclusive_group()
+    write_mode.add_argument('--overwrite', action='store_true', help="Overwrite an output file that already has content.")
+    write_mode.add_argument('--append', action='store_true', help="Append to an output file that already has content.")
+    parser.add_argument('-r', '--resume', action='store_true', help="Resume the last unfinished job with the same input file and output, if there is one.")
+    parser.add_argument('-j', '--job-id', help="Resume the given job. Its input, output and input type are used unless given.")
+    parser.add_argument('-l', '--list-sources', action='store_true', help="List the available sources and exit.")
+    return parser
+
+
+def load_config(path):
+    """Load a JSON config file holding a flat object of option names and settings."""
+    try:
+        with open(path, 'r') as file:
+            config = json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        raise UsageError(f"Could not read config file {path}: {e}")
+    if not isinstance(config, dict):
+        raise UsageError(f"Config file {path} must contain a JSON object.")
+    return {key.replace('-', '_'): value for key, value in config.items()}
+
+
+def resolve_options(args, app_data_dir):
+    """Merge the config file, the command line and the persisted settings into one set of options."""
+    options = load_config(args.config) if args.config else {}
+    for key, value in vars(args).items():
+        # Options left out are None, and flags left out are False; neither overrides the config file.
+        # Identity checks, since 0 == False and a value of 0 must still be validated below.
+        if key != 'config' and value is not None and value is not False:
+            options[key] = value
+
+    settings = load_settings(app_data_dir)
+    for key in DEFAULT_SETTINGS:
+        if key in options:
+            settings[key] = options[key]
+    if 'workers' in options:
+        settings['max_workers'] = options['workers']
+    if 'browsers' in options:
+        settings['browser_pool_size'] = options['browsers']
+    if not isinstance(settings['max_workers'], int) or settings['max_workers'] < 1:
+        raise UsageError("The number of workers must be a whole number greater than zero.")
+    if not isinstance(settings['browser_pool_size'], int) or settings['browser_pool_size'] < 1:
+        raise UsageError("The number of browsers must be a whole number greater than zero.")
+    if settings['search_mode'] not in SEARCH_MODES:
+        raise UsageError(f"Unknown search mode '{settings['search_mode']}'. Choose from {', '.join(SEARCH_MODES)}.")
+    options['settings'] = settings
+
+    fields = options.get('fields', OUTPUT_FIELDS)
+    if isinstance(fields, str):
+        fields = [field.strip().lower() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in OUTPUT_FIELDS]
+    if unknown:
+        raise UsageError(f"Unknown output field(s): {', '.join(unknown)}. Choose from {', '.join(OUTPUT_FIELDS)}.")
+    if len(fields) <= 1:
+        raise UsageError("Please choose more than one output field.")
+    options['output_options'] = {field: field in fields for field in OUTPUT_FIELDS}
+
+    sources = options.get('sources')
+    if sources is None:
+        sources, _ = load_source_lists(app_data_dir)
+    elif isinstance(sources, str):
+        sources = [source.strip() for source in sources.split(',') if source.strip()]
+    options['priority_list'] = [match_source(source) for source in sources]
+    if not options['priority_list']:
+        raise UsageError("Please choose at least one source.")
+
+    return options
+
+
+def match_source(name):
+    """Return the source whose name matches `name` exactly or contains it, ignoring case."""
+    if name in SOURCE_CLASSES:
+        return name
+    matches = [source for source in SOURCE_CLASSES if name.lower() in source.lower()]
+    if len(matches) != 1:
+        reason = "matches several sources" if matches else "does not match any source"
+        raise UsageError(f"'{name}' {reason}. Use --list-sources to see the available sources.")
+    return matches[0]
+
+
+def read_identifiers(path, input_type=None, use_mmap=False):
+    """
+    Open a file or standard input and validate its identifiers as they are read.
+    Returns:
+        The identifier type ('isbn' or 'ocn'), an iterator over the valid identifiers and the hash of the input.
+    """
+    try:
+        lines = read_lines(path, use_mmap)
+        if path == '-':
+            # Standard input cannot be read twice, so a job on it is identified by its first lines and resumed by its id only
+            sample = list(itertools.islice(lines, SAMPLE_SIZE))
+            input_hash = hash_lines(sample)
+            lines = itertools.chain(sample, lines)
+        else:
+            input_hash = hash_file(path)
+    except OSError as e:
+        raise UsageError(f"Could not read input {path}: {e}")
+
+    file_type, data = streamLineFormat(lines, input_type.upper() if input_type else None)
+    if file_type == 'Invalid':
+        raise UsageError("Invalid input format or contents. Please check the input.")
+    return file_type.lower(), data, input_hash
+
+
+def prepare_output(path, overwrite, append):
+    """Make sure an existing output file is only overwritten or appended to when asked."""
+    if path == '-' or not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    if overwrite:
+        with open(path, 'w'):
+            pass
+    elif not append:
+        raise UsageError(f"The output file {path} already has content. Use --overwrite or --append.")
+
+
+def load_job(app_data_dir, options):
+    """Fill in the input, output and input type of the job given by --job-id, unless given explicitly."""
+    checkpoint = JobCheckpoint.load(app_data_dir, options['job_id'])
+    if checkpoint is None:
+        raise UsageError(f"There is no unfinished job {options['job_id']}.")
+    options.setdefault('input', checkpoint.input_path)
+    options.setdefault('output', checkpoint.output_path)
+    options.setdefault('input_type', checkpoint.input_type)
+
+
+def find_checkpoint(app_data_dir, options, input_type, input_hash):
+    """Return the checkpoint of the job to resume, or create one for a new job."""
+    checkpoint = None
+    if options.get('job_id'):
+        checkpoint = JobCheckpoint.load(app_data_dir, options['job_id'])
+        if checkpoint.input_hash != input_hash:
+            raise UsageError(f"The input of job {checkpoint.job_id} has changed since it started.")
+    elif options.get('resume'):
+        checkpoint = JobCheckpoint.find(app_data_dir, input_hash, options['output'])
+        if checkpoint is None:
+            logging.info("No unfinished job found for this input and output; starting a new job.")
+
+    if checkpoint:
+        if checkpoint.input_type != input_type or checkpoint.output_path != options['output']:
+            raise UsageError(f"Job {checkpoint.job_id} was started with a different input type or output.")
+        # Keep the columns of the rows already written
+        options['output_options'] = checkpoint.output_options
+        return checkpoint
+
+    prepare_output(options['output'], options.get('overwrite'), options.get('append'))
+    checkpoint = JobCheckpoint.create(app_data_dir, input_hash, input_path=options['input'], input_type=input_type,
+                                      output_path=options['output'], output_options=options['output_options'])
+    logging.info(f"Started job {checkpoint.job_id}. Resume it with --job-id {checkpoint.job_id} if it is interrupted.")
+    return checkpoint
+
+
+def setup_logging(app_data_dir):
+    """Log to standard error and to the application's log file, leaving standard output for the results."""
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[
+                            logging.FileHandler(app_data_dir / 'example.log'),
+                            logging.StreamHandler(sys.stderr)
+                        ])
+
+
+def run_search(harvester, data, input_type, output_options, output_path, checkpoint=None):
+    """
+    Run the harvester on a worker thread so that SIGINT and SIGTERM can stop it.
+    Returns:
+        The exit code of the search.
+    """
+    outcome = {}
+    interrupted = threading.Event()
+
+    def target():
+        try:
+            outcome['completed'] = harvester.run(data, input_type, output_options, output_path, checkpoint)
+        except Exception as e:
+            logging.exception(f"Search failed: {e}")
+            outcome['error'] = e
+
+    def stop(signum, frame):
+        logging.info(f"Received signal {signum}, finishing the identifiers in progress...")
+        interrupted.set()
+        harvester.stop()
+
+    previous_handlers = {signum: signal.signal(signum, stop) for signum in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        search_thread = threading.Thread(target=target, name='cli-search')
+        search_thread.start()
+        # Join with a timeout so the main thread keeps handling signals
+        while search_thread.is_alive():
+            search_thread.join(0.5)
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+
+    if 'error' in outcome:
+        return EXIT_ERROR
+    if interrupted.is_set() or not outcome.get('completed'):
+        logging.info(f"Search interrupted after {harvester.progress()} identifiers.")
+        return EXIT_INTERRUPTED
+    return EXIT_OK
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.list_sources:
+        print('\n'.join(SOURCE_CLASSES))
+        return EXIT_OK
+
+    app_data_dir = get_app_data_directory()
+    setup_logging(app_data_dir)
+
+    try:
+        options = resolve_options(args, app_data_dir)
+        if options.get('job_id'):
+            load_job(app_data_dir, options)
+        options.setdefault('output', '-')
+        if not options.get('input'):
+            raise UsageError("An input file is required (use '-' for standard input).")
+        if options.get('resume') and options['input'] == '-' and not options.get('job_id'):
+            # Standard input is only identified by its first lines, so another stream could match an old job
+            raise UsageError("--resume cannot find a job on standard input. Resume it with --job-id instead.")
+        # Jobs are matched by their paths, so make them independent of the working directory
+        for key in ('input', 'output'):
+            if options[key] != '-':
+                options[key] = os.path.abspath(options[key])
+        input_type, data, input_hash = read_identifiers(options['input'], options.get('input_type'), options['settings']['mmap_input'])
+        checkpoint = find_checkpoint(app_data_dir, options, input_type, input_hash)
+    except UsageError as e:
+        parser.print_usage(sys.stderr)
+        print(f"{parser.prog}: error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    source_mapping = initialize_sources(names=options['priority_list'])
+    priority_list = [source for source in options['priority_list'] if source in source_mapping]
+    if not priority_list:
+        logging.error("None of the selected sources could be initialized.")
+        return EXIT_ERROR
+
+    db_manager = DatabaseManager(db_path=app_data_dir)
+    MetadataHarvester.initialize_database(db_manager)
+    MetadataHarvester.initialize_http_cache(app_data_dir, options['settings'])
+    harvester = MetadataHarvester(db_manager, source_mapping, priority_list, options['settings'])
+    harvester.initialize_planner(app_data_dir)
+    harvester.initialize_metrics(app_data_dir)
+    try:
+        return run_search(harvester, data, input_type, options['output_options'], options['output'], checkpoint)
+    finally:
+        WebDriverManager.close_all()
+        db_manager.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+
+
+def hash_file(filepath):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_lines(lines):
+    """Return the SHA-256 hex digest of lines of text, e.g. read from standard input."""
+    digest = hashlib.sha256()
+    for line in lines:
+        digest.update(line.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class JobCheckpoint:
+    """
+    Durable progress record of a harvest job, stored as jobs/<job_id>.json in the app data directory.
+
+    The checkpoint identifies the job's input by its hash and records which input offsets (the
+    positions of the identifiers in the validated input) are done, together with the size of
+    the output file once their rows were written. Both are updated by the TsvWriter's on_flush
+    callback, under the writer's lock, right after a batch of rows reaches the file, so the
+    output file up to `output_position` holds exactly the rows of the completed offsets. Resuming truncates the output back to that position, dropping rows written after
+    the last save, and searches every offset that is not completed, so a job can be stopped or
+    killed at any point without losing or duplicating rows.
+
+    Completed offsets are stored as a low watermark, below which every offset is done, plus the
+    sparse set of completed offsets above it, which keeps the file small for large inputs.
+    """
+    # Minimum number of seconds between two saves while a job is running
+    SAVE_INTERVAL = 1.0
+
+    def __init__(self, path, job_id, input_hash, input_path=None, input_type=None, output_path=None,
+                 output_options=None, total=0, completed_below=0, completed=None, output_position=0):
+        self.path = path
+        self.job_id = job_id
+        self.input_hash = input_hash
+        self.input_path = input_path
+        self.input_type = input_type
+        self.output_path = output_path
+        self.output_options = output_options or {}
+        self.total = total
+        self.completed_below = completed_below
+        self.completed = set(completed or [])
+        self.output_position = output_position
+        self.last_saved = 0
+
+    @staticmethod
+    def jobs_directory(app_data_dir):
+        jobs_dir = app_data_dir / 'jobs'
+        jobs_dir.mkdir(parents=True, exist_ok=True)
+        return jobs_dir
+
+    @classmethod
+    def create(cls, app_data_dir, input_hash, **job):
+        """Create and save the checkpoint of a new job. Rows already in its output file are kept."""
+        job_id = time.strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:8]
+        output_path = job.get('output_path')
+        if output_path and output_path != '-' and os.path.exists(output_path):
+            job.setdefault('output_position', os.path.getsize(output_path))
+        checkpoint = cls(cls.jobs_directory(app_data_dir) / f'{job_id}.json', job_id, input_hash, **job)
+        checkpoint.save()
+        return checkpoint
+
+    @classmethod
+    def load(cls, app_data_dir, job_id):
+        """Load the checkpoint of a job, or return None if there is no such job."""
+        path = cls.jobs_directory(app_data_dir) / f'{job_id}.json'
+        try:
+            with open(path, 'r') as file:
+                data = json.load(file)
+            return cls(path, **data)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logging.error(f"Could not read the checkpoint of job {job_id}: {e}")
+            return None
+
+    @classmethod
+    def find(cls, app_data_dir, input_hash, output_path):
+        """Return the most recent unfinished job with the same input and output, or None."""
+        for path in sorted(cls.jobs_directory(app_data_dir).glob('*.json'), reverse=True):
+            checkpoint = cls.load(app_data_dir, path.stem)
+            if checkpoint and checkpoint.input_hash == input_hash and checkpoint.output_path == output_path:
+                return checkpoint
+        return None
+
+    @property
+    def completed_count(self):
+        return self.completed_below + len(self.completed)
+
+    def is_completed(self, offset):
+        return offset < self.completed_below or offset in self.completed
+
+    def mark_completed(self, offset, output_position=None):
+        """Record that the row of `offset` is done and, for a file output, how large the file now is."""
+        self.completed.add(offset)
+        while self.completed_below in self.completed:
+            self.completed.remove(self.completed_below)
+            self.completed_below += 1
+        if output_position is not None:
+            self.output_position = output_position
+
+    def save_if_due(self):
+        if time.monotonic() - self.last_saved >= self.SAVE_INTERVAL:
+            self.save()
+
+    def save(self):
+        """Write the checkpoint atomically, so a crash leaves either the old or the new version."""
+        data = {
+            'job_id': self.job_id,
+            'input_hash': self.input_hash,
+            'input_path': self.input_path,
+            'input_type': self.input_type,
+            'output_path': self.output_path,
+            'output_options': self.output_options,
+            'total': self.total,
+            'completed_below': self.completed_below,
+            'completed': sorted(self.completed),
+            'output_position': self.output_position
+        }
+        # The rows the checkpoint accounts for must be on disk before the checkpoint is
+        if self.output_path and self.output_path != '-' and os.path.exists(self.output_path):
+            with open(self.output_path, 'a') as output_file:
+                os.fsync(output_file.fileno())
+        temp_path = self.path.with_suffix('.tmp')
+        with open(temp_path, 'w') as file:
+            json.dump(data, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+        self.last_saved = time.monotonic()
+
+    def restore_output(self):
+        """Truncate the output file to the rows of the completed offsets before resuming."""
+        if not self.output_path or self.output_path == '-':
+            return
+        size = os.path.getsize(self.output_path) if os.path.exists(self.output_path) else 0
+        if size < self.output_position:
+            # Rows the checkpoint accounts for are gone, so the job has to start over
+            logging.warning(f"The output file {self.output_path} is shorter than job {self.job_id} recorded; restarting the job.")
+            self.completed_below, self.completed, self.output_position = 0, set(), 0
+        if size > self.output_position:
+            with open(self.output_path, 'r+') as output_file:
+                output_file.truncate(self.output_position)
+
+    def delete(self):
+        """Remove the checkpoint once its job has finished."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
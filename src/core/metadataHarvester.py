@@ -0,0 +1,883 @@
+import asyncio
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FutureTimeoutError
+
+from apis.baseAPI import BaseAPI
+from apis.httpCache import HttpCache
+from apis.httpClient import AsyncHttpClient
+from apis.retryPolicy import RetryPolicy
+from core.sourcePlanner import SourcePlanner
+from core.sourceTimeouts import SourceTimeouts, SourceTimeoutError
+from db.negativeCache import NegativeCache
+from db.recordCache import RecordCache
+from db.schema import maintain, migrate
+from webScraping.baseScraping import PageTimeoutError
+from webScraping.webDriverManager import WebDriverManager
+from webScraping import pageWait
+from util.circuitBreaker import CLOSED, CircuitBreaker
+from util.connectivityMonitor import ConnectivityMonitor
+from util.httpSessions import HttpSessionRegistry
+from util.metrics import MetricsRegistry
+from util.rateScheduler import RateScheduler
+from util.tsvWriter import TsvWriter
+
+
+class MetadataHarvester:
+    """
+    The metadata harvesting pipeline, independent of any user interface.
+
+    The harvester resolves each identifier against the local database, queries the sources
+    of the priority list for whatever is still missing, stores the results and writes them to
+    a tab-delimited output file. It is driven by the GUI and by the command-line interface.
+
+    Attributes:
+        db_manager (DatabaseManager): Handles interactions with the application's database.
+        source_mapping (dict): Source names mapped to their API class instances.
+        priority_list (list): An ordered list of source names representing the preference order for metadata source selection.
+        settings (dict): Tunable settings such as the number of identifiers searched concurrently.
+        search_active (bool): A boolean flag indicating whether a metadata search is currently in progress.
+        total_identifiers (int): The total number of identifiers to be searched, or None while a streamed input is being read.
+        current_identifier (int): The number of identifiers whose search has been started.
+        completed_identifiers (int): The number of identifiers whose search has finished.
+        last_processed (str): The last identifier written to the output file.
+        checkpoint (JobCheckpoint): The durable progress record of the running job, if any.
+    """
+
+    def __init__(self, db_manager, source_mapping, priority_list, settings):
+        self.db_manager = db_manager
+        self.source_mapping = source_mapping
+        self.priority_list = priority_list
+        self.settings = settings
+        self.search_active = False
+        self.total_identifiers = 0
+        self.current_identifier = 0
+        self.completed_identifiers = 0
+        self.last_processed = None
+        self.input_type = 'isbn'
+        self.output_options = {}
+        self.output_file_path = None
+        self.output_writer = None
+        self.checkpoint = None
+
+        # Locks guarding state shared by the search workers
+        self.progress_lock = threading.Lock()
+        self.db_lock = threading.Lock()
+
+        # Runs scraper queries when several sources are asked for the same identifier at once
+        self.source_executor = ThreadPoolExecutor(thread_name_prefix='source')
+        # Sources known to have nothing for an identifier, so they are not asked again
+        self.negative_cache = NegativeCache(db_manager, settings.get('negative_cache_ttl'))
+        # Rows of the database already read or written, so they are not queried again
+        self.record_cache = RecordCache(db_manager, settings.get('record_cache_size_mb', 32) * 1024 * 1024)
+        # Reorders the sources by their observed hit rates and latencies, see initialize_planner
+        self.planner = None
+        # Source names mapped to the circuit breakers that stop asking them while they keep failing
+        self.breakers = {}
+        # Counters and latency histograms of the sources and of the stages of a search, see initialize_metrics
+        self.metrics = MetricsRegistry.get_registry()
+        self.metrics_dir = None
+        # Time limits of the lookups of each source
+        self.timeouts = SourceTimeouts(settings['source_timeout'], settings['source_timeouts'], settings['adaptive_timeouts'],
+                                       settings['adaptive_timeout_factor'], settings['adaptive_timeout_min'])
+
+    @staticmethod
+    def initialize_database(db_manager):
+        """Create the tables used by the harvester if they do not exist yet, and migrate them to the current schema."""
+        db_manager.create_table("books", "Isbn TEXT PRIMARY KEY, Ocn TEXT")
+        db_manager.create_table("lccn", "Lccn_id INTEGER PRIMARY KEY AUTOINCREMENT, Lccn TEXT, Source TEXT")
+        db_manager.create_table("book_lccn", "Isbn TEXT, Lccn_id INTEGER, FOREIGN KEY (Isbn) REFERENCES books (Isbn), FOREIGN KEY (Lccn_id) REFERENCES lccn (Lccn_id)")
+        NegativeCache.create_table(db_manager)
+        migrate(db_manager)
+
+    @staticmethod
+    def initialize_http_cache(app_data_dir, settings):
+        """Keep the responses of the REST API sources in http_cache.sqlite, unless 'http_cache_size_mb' is 0."""
+        if settings['http_cache_size_mb'] <= 0:
+            AsyncHttpClient.use_cache(None)
+            return
+        AsyncHttpClient.use_cache(HttpCache(app_data_dir / 'http_cache.sqlite', settings['http_cache_size_mb'] * 1024 * 1024,
+                                            settings['http_cache_ttl']))
+
+    def initialize_planner(self, app_data_dir):
+        """Order the sources adaptively, with statistics kept in source_stats.json, if the 'adaptive_ordering' setting is on."""
+        if self.settings['adaptive_ordering']:
+            self.planner = SourcePlanner(app_data_dir / 'source_stats.json', self.settings['pinned_sources'])
+        else:
+            self.planner = None
+
+    def initialize_metrics(self, app_data_dir):
+        """Write the metrics of each search to metrics.json and metrics.prom in the app data directory."""
+        self.metrics_dir = app_data_dir
+
+    def run(self, data, input_type, output_options, output_file_path, checkpoint=None):
+        """
+        Search the metadata of every identifier and write it to the output file.
+
+        Identifiers are handed to a pool of worker threads so that up to ``max_workers`` of them
+        are searched at once. A new identifier is only submitted when a worker becomes free, which
+        keeps the number of identifiers in flight bounded regardless of the size of the input.
+        The identifiers may come from a lazy iterator, which is only read as workers free up.
+
+        Unless the 'prefetch_batch_size' setting is 0, the identifiers are first looked up in the
+        database in batches of that size, with one query per batch (see resolve_batch). Those
+        whose requested fields are all known already are written out at once, and only the
+        others are handed to the workers to be searched for.
+
+        When a checkpoint is given, the identifiers it records as completed are skipped and the
+        progress of the others is recorded in it, so a stopped or crashed job can be resumed.
+        The checkpoint is deleted once every identifier has been processed.
+
+        Args:
+            data (iterable): The validated identifiers to search for, e.g. a list or a stream from streamFileFormat.
+            input_type (str): The type of the identifiers ('isbn' or 'ocn').
+            output_options (dict): The fields to output, e.g. {'isbn': True, 'ocn': True, 'lccn': False, 'lccn_source': False}.
+            output_file_path (str): Path of the TSV output file, or '-' for standard output.
+            checkpoint (JobCheckpoint): Optional checkpoint of the job, possibly from an earlier run.
+
+        Returns:
+            bool: True if every identifier was processed, False if the search was stopped.
+        """
+        self.input_type = input_type
+        self.output_options = output_options
+        self.output_file_path = output_file_path
+        self.last_processed = None
+        self.checkpoint = checkpoint
+        if checkpoint:
+            checkpoint.restore_output()
+            if checkpoint.completed_count:
+                logging.info(f"Resuming job {checkpoint.job_id} with {checkpoint.completed_count} items already processed.")
+        # The total of a streamed input is only known once it has been read to the end
+        self.total_identifiers = len(data) if hasattr(data, '__len__') else None
+        self.current_identifier = checkpoint.completed_count if checkpoint else 0
+        self.completed_identifiers = self.current_identifier
+        self.search_active = True
+
+        logging.info(f"Search started for {input_type.upper()} with {self.total_identifiers or 'streamed'} items, {self.settings['max_workers']} concurrent searches and priority list: {self.priority_list}")
+        max_workers = self.settings['max_workers']
+        read_identifiers = 0
+        found_in_database = 0
+        WebDriverManager.configure(self.settings['browser_pool_size'], self.settings['page_load_timeout'])
+        HttpSessionRegistry.configure(self.settings['http_pool_size'], self.settings['http_connect_timeout'],
+                                      self.settings['http_read_timeout'])
+        AsyncHttpClient.use_retry_policy(RetryPolicy(self.settings['http_retries'], self.settings['http_retry_backoff'],
+                                                     self.settings['http_retry_max_delay']))
+        self.negative_cache.purge()
+        self.metrics.reset()
+
+        if output_file_path:
+            self.output_writer = TsvWriter(output_file_path, output_options, input_type,
+                                           flush_rows=self.settings['output_flush_rows'],
+                                           flush_interval=self.settings['output_flush_interval'],
+                                           on_flush=self.record_written_rows if checkpoint else None)
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='search') as executor:
+                in_flight = set()
+                for offset, identifier, existing_data in self.prefetch_existing_data(data, input_type, checkpoint):
+                    if not self.search_active: # Check if the search was stopped
+                        break
+                    read_identifiers = offset + 1
+                    if checkpoint and checkpoint.is_completed(offset):
+                        continue
+                    if existing_data is not None and not self.missing_fields(existing_data, input_type, output_options):
+                        self.write_cached_identifier(identifier, existing_data, offset)
+                        found_in_database += 1
+                        self.metrics.increment('harvester_identifiers_total', outcome='found_in_database')
+                        continue
+
+                    # Wait for a free worker before submitting the next identifier
+                    if len(in_flight) >= max_workers:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        self.report_worker_errors(done)
+                        if not self.search_active:
+                            break
+                    if not self.wait_for_connection():
+                        break
+
+                    in_flight.add(executor.submit(self.search_identifier, identifier, input_type, output_options, offset, existing_data))
+                else:
+                    self.total_identifiers = read_identifiers
+
+                done, _ = wait(in_flight)
+                self.report_worker_errors(done)
+        finally:
+            # Write out the buffered rows whether the search finished, was stopped or failed
+            if self.output_writer:
+                self.output_writer.close()
+                self.output_writer = None
+            if AsyncHttpClient.cache:
+                logging.info(f"HTTP cache: {AsyncHttpClient.cache.stats}")
+            logging.info(f"Database record cache: {self.record_cache.stats}")
+            if self.planner:
+                self.planner.save()
+            if self.timeouts.stats:
+                logging.info(f"Lookups that timed out: {self.timeouts.stats}")
+            for name, breaker in self.breakers.items():
+                if breaker.stats['opened']:
+                    logging.info(f"Circuit breaker of {name}: {breaker.stats}")
+            self.write_metrics()
+            with self.db_lock:
+                maintain(self.db_manager)
+            if found_in_database:
+                logging.info(f"{found_in_database} identifiers had all their metadata in the database and were not searched for.")
+
+        if self.search_active:
+            logging.info(f"Search thread completed successfully for {self.total_identifiers} items.")
+            self.search_active = False
+            if checkpoint:
+                checkpoint.total = self.total_identifiers
+                if checkpoint.completed_count == self.total_identifiers:
+                    checkpoint.delete()
+                else:
+                    # Some identifiers failed; keep the job so that they are retried on resume
+                    checkpoint.save()
+            return True
+        if checkpoint:
+            checkpoint.save()
+            logging.info(f"Job {checkpoint.job_id} can be resumed.")
+        logging.info(f"Search thread stopped manually after processing {self.progress()} items.")
+        return False
+
+    def stop(self):
+        """Ask a running search to stop. Identifiers already in flight are finished before run() returns."""
+        self.search_active = False
+
+    def wait_for_connection(self):
+        """
+        Pause while the internet connection is down, when the 'pause_when_offline' setting is on.
+
+        Searching offline would only record empty results, so the search waits for the
+        ConnectivityMonitor to see the connection back. stop() ends the wait.
+
+        Returns:
+            bool: True to carry on with the search, False if it was stopped while waiting.
+        """
+        monitor = ConnectivityMonitor.get_monitor()
+        if not self.settings['pause_when_offline'] or monitor.is_online():
+            return self.search_active
+        logging.warning("No internet connection. The search is paused until it is back.")
+        while self.search_active and not monitor.wait_until_online(timeout=1):
+            pass
+        if self.search_active:
+            logging.info("Internet connection is back. Resuming the search.")
+        return self.search_active
+
+    def progress(self, count=None):
+        """Format a count of identifiers (by default the completed ones) against the total, if it is known yet."""
+        count = self.completed_identifiers if count is None else count
+        return f"{count}/{self.total_identifiers}" if self.total_identifiers is not None else str(count)
+
+    def prefetch_existing_data(self, data, input_type, checkpoint=None):
+        """
+        Read the identifiers and look them up in the database a batch at a time.
+
+        Yields:
+            tuple: The offset of each identifier in the input, the identifier, and the data the
+            database holds for it, or None if it was not looked up because prefetching is off
+            or the checkpoint records it as completed.
+        """
+        batch_size = self.settings['prefetch_batch_size']
+        identifiers = enumerate(data)
+        while True:
+            batch = list(itertools.islice(identifiers, max(1, batch_size)))
+            if not batch:
+                return
+            pending = [(offset, identifier) for offset, identifier in batch
+                       if not (checkpoint and checkpoint.is_completed(offset))]
+            resolved = self.resolve_batch(pending, input_type) if batch_size > 0 and pending else {}
+            for offset, identifier in batch:
+                yield offset, identifier, resolved.get(offset)
+
+    def resolve_batch(self, batch, input_type):
+        """
+        Look a batch of identifiers up in the database at once.
+
+        The identifiers are loaded into a temporary table and joined with books, book_lccn and
+        lccn in a single query, giving the same data as get_existing_data for each of them.
+
+        Args:
+            batch (list): (offset, identifier) tuples.
+            input_type (str): The type of the identifiers ('isbn' or 'ocn').
+        Returns:
+            dict: The offset of every identifier mapped to its data, with the identifier itself included.
+            Empty if the database could not be read.
+        """
+        column = 'Isbn' if input_type == 'isbn' else 'Ocn'
+        try:
+            with self.metrics.timer('harvester_stage_seconds', stage='prefetch'), self.db_lock, self.db_manager.transaction():
+                self.db_manager.execute_query("CREATE TEMP TABLE IF NOT EXISTS lookup_batch (Position INTEGER PRIMARY KEY, Identifier TEXT)")
+                self.db_manager.execute_query("DELETE FROM lookup_batch")
+                self.db_manager.execute_many("INSERT INTO lookup_batch VALUES (?, ?)", [(offset, str(identifier)) for offset, identifier in batch])
+                rows = self.db_manager.execute_query(
+                    "SELECT lookup_batch.Position, books.Isbn, books.Ocn, lccn.Lccn_id, lccn.Lccn, lccn.Source FROM lookup_batch "
+                    f"LEFT JOIN books ON books.rowid = (SELECT rowid FROM books WHERE {column} = lookup_batch.Identifier LIMIT 1) "
+                    "LEFT JOIN lccn ON lccn.Lccn_id = (SELECT Lccn_id FROM book_lccn WHERE book_lccn.Isbn = books.Isbn LIMIT 1)",
+                    fetch=True) or []
+        except sqlite3.Error:
+            # The identifiers of the batch are then looked up one at a time
+            return {}
+
+        identifiers = dict(batch)
+        want_lccn = self.output_options.get('lccn') or self.output_options.get('lccn_source')
+        resolved = {}
+        for offset, isbn, ocn, lccn_id, lccn, source in rows:
+            existing_data = {}
+            if isbn:
+                existing_data['isbn'] = [isbn]
+            if ocn:
+                existing_data['ocn'] = ocn
+            if lccn_id is not None and want_lccn:
+                existing_data['lccn'] = [str(lccn)] if lccn else None
+                existing_data['lccn_source'] = [str(source)] if source else None
+            self.add_identifier(existing_data, identifiers[offset], input_type)
+            resolved[offset] = existing_data
+        return resolved
+
+    def write_cached_identifier(self, identifier, existing_data, offset=None):
+        """Write out an identifier whose requested fields were all found in the database."""
+        with self.progress_lock:
+            self.current_identifier += 1
+            self.completed_identifiers += 1
+            position = self.current_identifier
+        logging.info(f"{self.progress(position)}. Metadata for {identifier} found in the database")
+        self.write_data_to_output_file(identifier, existing_data, offset)
+
+    @staticmethod
+    def add_identifier(existing_data, identifier, input_type):
+        """Ensure that the identifier searched for is represented in its data."""
+        if input_type == 'isbn':
+            # If the identifier is not already in the list, add it; otherwise, keep the existing list.
+            existing_data['isbn'] = [str(identifier)] if str(identifier) not in existing_data.get('isbn', []) else existing_data.get('isbn', [])
+        elif input_type == 'ocn':
+            # Set the OCN to the identifier if it's different; otherwise, keep the existing OCN.
+            existing_data['ocn'] = str(identifier) if existing_data.get('ocn', '') != str(identifier) else existing_data.get('ocn', '')
+
+    @staticmethod
+    def missing_fields(existing_data, input_type, output_options):
+        """Return the requested output fields, other than the input type, that the data does not have yet."""
+        return {key for key, value in output_options.items() if value and key != input_type and key.lower() not in existing_data}
+
+    def search_identifier(self, identifier, input_type, output_options, offset=None, existing_data=None):
+        """
+        Search, store and write the metadata for a single identifier. Runs on a worker thread.
+
+        An identifier whose search is interrupted by stop() is neither stored nor written, so that
+        a resumed job searches it again from scratch.
+
+        Args:
+            identifier (str): The identifier to search for.
+            input_type (str): The type of the identifier ('isbn' or 'ocn').
+            output_options (dict): A dictionary specifying which types of data to fetch.
+            offset (int): The position of the identifier in the input, recorded in the job's checkpoint.
+            existing_data (dict): The data the database holds for the identifier, if it has been looked up already.
+        """
+        if not self.search_active: # Check if the search was stopped
+            return
+
+        with self.progress_lock:
+            self.current_identifier += 1
+            position = self.current_identifier
+        logging.info(f"{self.progress(position)}. Searching metadata for {identifier}")
+
+        # Fetch existing data for the identifier
+        if existing_data is None:
+            with self.metrics.timer('harvester_stage_seconds', stage='db_lookup'):
+                existing_data = self.get_existing_data(identifier, 'ISBN' if input_type == 'isbn' else 'OCN')
+
+        # Ensure that the identifier is properly represented in existing_data
+        self.add_identifier(existing_data, identifier, input_type)
+
+        # Update existing data based on missing fields and priority list
+        with self.metrics.timer('harvester_stage_seconds', stage='fetch'):
+            self.fetch_and_update_missing_data(existing_data, identifier, input_type, output_options)
+            while self.settings['pause_when_offline'] and not ConnectivityMonitor.get_monitor().is_online():
+                # The connection dropped during the lookup, so the sources that failed are asked again once it is back
+                if not self.wait_for_connection():
+                    break
+                self.fetch_and_update_missing_data(existing_data, identifier, input_type, output_options)
+        if not self.search_active: # The search was stopped before all sources answered
+            return
+
+        # Write updated data to the output file and database
+        with self.metrics.timer('harvester_stage_seconds', stage='db_update'), self.db_lock:
+            self.update_database_with_existing_data(identifier, existing_data, input_type)
+        with self.metrics.timer('harvester_stage_seconds', stage='write'):
+            self.write_data_to_output_file(identifier, existing_data, offset)
+
+        with self.progress_lock:
+            self.completed_identifiers += 1
+        self.metrics.increment('harvester_identifiers_total', outcome='searched')
+
+    def report_worker_errors(self, futures):
+        """Log any exception raised by finished search workers so one bad identifier does not end the search."""
+        for future in futures:
+            error = future.exception()
+            if error:
+                logging.error(f"Unexpected error while searching an identifier: {error}")
+
+    def get_existing_data(self, identifier, file_type):
+        """Retrieve existing data from the database based on the identifier and file type."""
+        # Prepare initial data structure
+        existing_data = {}
+
+        # Choose the database column based on file type
+        column = 'Isbn' if file_type == 'ISBN' else 'Ocn'
+        logging.info(f"Querying database for {file_type} {identifier}.")
+
+        # Fetch and unpack book data
+        book_data = self.record_cache.book(column, identifier)
+        if book_data:
+            isbn, ocn = book_data
+            found_items = []
+            if isbn:
+                existing_data['isbn'] = [isbn]
+                found_items.append(f"ISBN={isbn}")
+            if ocn:
+                existing_data['ocn'] = ocn
+                found_items.append(f"OCN={ocn}")
+            if found_items:
+                logging.info(f"Found database record for {file_type} {identifier}: " + ', '.join(found_items))
+            else:
+                logging.info(f"Record found for {file_type} {identifier} but no ISBN or OCN data available.")
+        else:
+            logging.info(f"No database record found for {file_type} {identifier}.")
+
+        # Determine correct ISBN identifier for LCCN data retrieval based on file_type
+        lccn_identifier = existing_data.get('isbn', [''])[0] if file_type == 'ISBN' or 'isbn' in existing_data else ''
+        if not lccn_identifier and file_type == 'OCN' and book_data:  # Resolve ISBN for OCN if not already found
+            lccn_identifier = book_data[0]
+
+        # Fetch and compile LCCN data if necessary
+        if lccn_identifier and (self.output_options.get('lccn') or self.output_options.get('lccn_source')):
+            first_lccn_row = self.record_cache.first_lccn(lccn_identifier)
+            if first_lccn_row:
+                # Only the first LCCN and LCCN source are used
+                existing_data['lccn'] = [str(first_lccn_row[1])] if first_lccn_row[1] else None
+                existing_data['lccn_source'] = [str(first_lccn_row[2])] if first_lccn_row[2] else None
+                if existing_data['lccn']:
+                    logging.info(f"LCCN data found for {file_type} {identifier}: {existing_data['lccn']}")
+                if existing_data['lccn_source']:
+                    logging.info(f"LCCN Source data found for {file_type} {identifier}: {existing_data['lccn_source']}")
+            else:
+                logging.info(f"No LCCN data found for {file_type} {identifier}.")
+
+
+        return existing_data
+
+    def fetch_and_update_missing_data(self, existing_data, identifier, input_type, output_options):
+        """
+        Fetches missing metadata for a given identifier from various data sources 
+        based on a priority list and updates the existing data accordingly.
+
+        This method iterates over the priority list of sources and queries each 
+        source for missing metadata. When new data is found, it updates the existing 
+        data structure. The search for missing data continues until all data is found 
+        or all sources have been queried. If the 'search_mode' setting is 'parallel' or
+        'hedged', the sources are queried concurrently instead (see fetch_missing_data_concurrently).
+
+        Args:
+            existing_data (dict): The current set of metadata associated with the identifier.
+            identifier (str): The unique identifier for the metadata subject (e.g., ISBN, OCN).
+            input_type (str): The type of the identifier (e.g., 'ISBN', 'OCN').
+            output_options (dict): A dictionary specifying which types of data to fetch.
+
+        Returns:
+            None: The function updates the existing_data dictionary in-place and does not return anything.
+        """
+        missing_data = self.missing_fields(existing_data, input_type, output_options)
+        if not missing_data:
+            return
+        known_misses = self.negative_cache.known_misses(input_type, identifier)
+        requested = set(missing_data)
+
+        if self.settings['search_mode'] in ('parallel', 'hedged'):
+            self.fetch_missing_data_concurrently(existing_data, missing_data, identifier, input_type, known_misses)
+        else:
+            for source_name in self.plan_sources(input_type, missing_data):
+                if not self.search_active: # Check if the search was stopped
+                    return
+                source = self.source_mapping.get(source_name)
+                if not source:
+                    continue
+                if self.is_known_miss(source_name, identifier, missing_data, known_misses):
+                    continue
+                if not self.breaker(source_name).allow():
+                    logging.info(f"Skipping {source_name} for identifier {identifier}: it is failing")
+                    self.metrics.increment('harvester_source_lookups_total', source=source_name, outcome='rejected')
+                    continue
+
+                logging.info(f"Querying {source_name} for missing data for identifier: {identifier}")
+
+
+                started = time.monotonic()
+                try:
+                    result = self.query_source_in_time(source_name, source, identifier, input_type)
+                except SourceTimeoutError as e:
+                    self.record_source_timeout(source_name, identifier, e)
+                    continue
+                except Exception as e:
+                    logging.error(f"Error fetching metadata from {source_name} for {identifier}: {e}")
+                    self.record_source_failure(source_name, 'page_timeout' if isinstance(e, PageTimeoutError) else 'error')
+                    continue  # Proceed to the next source if there's an error
+
+                if not self.search_active: # Check if the search was stopped
+                    return
+                self.record_source_answer(source_name, identifier, input_type, requested, result, time.monotonic() - started)
+                if not result: continue
+
+                # Update the existing data if new data is found
+                updated = False
+                for data_type in missing_data.copy():  # Iterate over a copy to modify original safely
+                    if data_type in result and result[data_type]:
+                        if isinstance(result[data_type], (str, list)) and not result[data_type]:
+                            continue
+                        
+                        existing_data[data_type] = result[data_type.lower()]
+                        missing_data.remove(data_type)
+                        updated = True
+
+                if updated:
+                    logging.info(f"Updated data for {identifier} from {source_name}")
+
+                    if not missing_data:  # Exit early if all missing data has been found
+                        break
+
+    def fetch_missing_data_concurrently(self, existing_data, missing_data, identifier, input_type, known_misses=None):
+        """
+        Query several sources of the priority list at the same time for the missing metadata.
+
+        In 'parallel' mode up to 'fanout_width' sources are kept in flight at once. In 'hedged'
+        mode the next source is only started when every source in flight has answered or
+        'hedge_delay' seconds have passed since the last one was started. Either way each field
+        takes the value of the highest-priority source that returned it, so a field is only
+        settled once every source ranked above its current candidate has answered. Requests
+        still in flight are cancelled as soon as every missing field is settled.
+
+        Args:
+            existing_data (dict): The current set of metadata associated with the identifier, updated in-place.
+            missing_data (set): The fields that still have to be found.
+            identifier (str): The unique identifier for the metadata subject (e.g., ISBN, OCN).
+            input_type (str): The type of the identifier ('isbn' or 'ocn').
+            known_misses (dict): Fields each source recently had nothing for. Sources with none of the missing fields are skipped.
+        """
+        hedged = self.settings['search_mode'] == 'hedged'
+        width = max(1, self.settings['fanout_width'])
+        hedge_delay = self.settings['hedge_delay']
+
+        known_misses = known_misses or {}
+        requested = set(missing_data)
+        ranked_sources = [(name, self.source_mapping[name]) for name in self.plan_sources(input_type, missing_data)
+                          if self.source_mapping.get(name) and not self.is_known_miss(name, identifier, missing_data, known_misses)]
+        results = {}  # rank -> result of every source that has answered
+        in_flight = {}  # future -> rank
+        started = {}  # rank -> time the source was asked
+        deadlines = {}  # future -> time it is given up on
+        next_rank = 0
+        last_start = 0
+
+        try:
+            while missing_data and (next_rank < len(ranked_sources) or in_flight):
+                if not self.search_active: # Check if the search was stopped
+                    return
+
+                # Start more sources while the fan-out allows it
+                while next_rank < len(ranked_sources) and len(in_flight) < width:
+                    if hedged and in_flight and time.monotonic() - last_start < hedge_delay:
+                        break
+                    source_name, source = ranked_sources[next_rank]
+                    if not self.breaker(source_name).allow():
+                        logging.info(f"Skipping {source_name} for identifier {identifier}: it is failing")
+                        self.metrics.increment('harvester_source_lookups_total', source=source_name, outcome='rejected')
+                        results[next_rank] = None
+                        next_rank += 1
+                        continue
+                    logging.info(f"Querying {source_name} for missing data for identifier: {identifier}")
+                    future = self.submit_source_query(source, identifier, input_type)
+                    in_flight[future] = next_rank
+                    started[next_rank] = time.monotonic()
+                    deadlines[future] = started[next_rank] + self.timeouts.timeout(source_name)
+                    next_rank += 1
+                    last_start = time.monotonic()
+
+                # Wake up for the first source to run out of time, or for the next hedge
+                now = time.monotonic()
+                timeouts = [deadlines[future] - now for future in in_flight]
+                if hedged and next_rank < len(ranked_sources) and len(in_flight) < width:
+                    timeouts.append(hedge_delay - (now - last_start))
+                done, _ = wait(in_flight, timeout=max(0, min(timeouts)) if timeouts else None, return_when=FIRST_COMPLETED)
+
+                now = time.monotonic()
+                for future in [future for future in in_flight if future not in done and deadlines[future] <= now]:
+                    rank = in_flight.pop(future)
+                    future.cancel()
+                    results[rank] = None
+                    source_name = ranked_sources[rank][0]
+                    self.record_source_timeout(source_name, identifier, SourceTimeoutError(
+                        f"{source_name} did not answer within {self.timeouts.timeout(source_name):g} seconds"))
+
+                for future in done:
+                    rank = in_flight.pop(future)
+                    try:
+                        results[rank] = future.result()
+                    except Exception as e:
+                        logging.error(f"Error fetching metadata from {ranked_sources[rank][0]} for {identifier}: {e}")
+                        self.record_source_failure(ranked_sources[rank][0], 'page_timeout' if isinstance(e, PageTimeoutError) else 'error')
+                        results[rank] = None
+                    else:
+                        self.record_source_answer(ranked_sources[rank][0], identifier, input_type, requested, results[rank],
+                                                  time.monotonic() - started[rank])
+
+                # Settle every field whose highest-priority answer is now known
+                for data_type in missing_data.copy():
+                    for rank in range(len(ranked_sources)):
+                        if rank not in results:
+                            break  # A higher-priority source has not answered yet
+                        result = results[rank]
+                        if result and result.get(data_type):
+                            existing_data[data_type] = result[data_type]
+                            missing_data.remove(data_type)
+                            logging.info(f"Updated {data_type} for {identifier} from {ranked_sources[rank][0]}")
+                            break
+        finally:
+            # Nothing left to wait for: drop whatever is still in flight
+            for future in in_flight:
+                future.cancel()
+
+    def submit_source_query(self, source, identifier, input_type):
+        """
+        Start a query to a single source without waiting for it.
+
+        REST API lookups run as tasks on the shared HTTP client's event loop, so cancelling the
+        returned future also aborts the request. Scraper lookups run on the source executor.
+
+        Returns:
+            concurrent.futures.Future: A future resolving to the source's result.
+        """
+        if isinstance(source, BaseAPI):
+            client = AsyncHttpClient.get_client()
+            return asyncio.run_coroutine_threadsafe(source.lookup_async(identifier, input_type), client.loop)
+        return self.source_executor.submit(self.query_source, source, identifier, input_type)
+
+    def query_source_in_time(self, source_name, source, identifier, input_type):
+        """
+        Query a source and wait for its answer for no longer than its time limit.
+
+        A REST API request running out of time is aborted. A scraper lookup carries on in the
+        background until its browser gives up on the page, but the search does not wait for it.
+
+        Raises:
+            SourceTimeoutError: If the source did not answer in time.
+            Exception: If the source could not be asked.
+        """
+        timeout = self.timeouts.timeout(source_name)
+        future = self.submit_source_query(source, identifier, input_type)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if not future.done():
+                future.cancel()
+                raise SourceTimeoutError(f"{source_name} did not answer within {timeout:g} seconds") from None
+            raise
+
+    def query_source(self, source, identifier, input_type):
+        """
+        Query a single source for the metadata of an identifier.
+
+        Any number of workers may query the sources at the same time. The web scrapers borrow
+        a browser from the WebDriverManager pool for each lookup, so at most 'browser_pool_size'
+        scraper lookups run at once and the others wait for a free browser.
+
+        Raises:
+            Exception: If the source could not be asked, so the answer is unknown rather than empty.
+        """
+        return source.lookup(identifier, input_type)
+
+    def plan_sources(self, input_type, missing_data):
+        """Return the sources to ask, in order, for an identifier missing the given fields."""
+        if self.planner:
+            return self.planner.order(self.priority_list, input_type, missing_data)
+        return self.priority_list
+
+    def breaker(self, source_name):
+        """Return the circuit breaker of a source, set up from the 'breaker_*' settings on first use."""
+        with self.progress_lock:
+            if source_name not in self.breakers:
+                self.breakers[source_name] = CircuitBreaker(source_name, self.settings['breaker_failure_threshold'],
+                                                            self.settings['breaker_reset_timeout'])
+            return self.breakers[source_name]
+
+    def is_known_miss(self, source_name, identifier, missing_data, known_misses):
+        """Return whether a source recently had none of the missing fields, so it is not asked again."""
+        if not missing_data <= known_misses.get(source_name, set()):
+            return False
+        logging.info(f"Skipping {source_name} for identifier {identifier}: it recently had no {', '.join(sorted(missing_data))}")
+        self.metrics.increment('harvester_source_lookups_total', source=source_name, outcome='known_miss')
+        return True
+
+    def record_source_timeout(self, source_name, identifier, error):
+        """Log a lookup that ran out of time, count it, and count it as a failure of the source."""
+        logging.warning(f"Timed out fetching metadata from {source_name} for {identifier}: {error}")
+        self.timeouts.record_timeout(source_name)
+        self.record_source_failure(source_name, 'timeout')
+
+    def record_source_failure(self, source_name, outcome='error'):
+        """Count a failed lookup, and count it against the circuit breaker of the source unless the connection is down."""
+        self.metrics.increment('harvester_source_lookups_total', source=source_name, outcome=outcome)
+        if ConnectivityMonitor.get_monitor().is_online():
+            self.breaker(source_name).record_failure()
+
+    def record_source_answer(self, source_name, identifier, input_type, requested, result, latency=None):
+        """
+        Remember which of the requested fields a source had nothing for in the negative cache,
+        feed the answer and the seconds it took to the planner and the metrics, and close the
+        source's circuit breaker.
+
+        Answers given while the connection is down are not trusted, since the sources then
+        report empty results instead of failing. Lookups that failed, such as a scraper's page
+        not loading in time, raise instead of answering and go to record_source_failure.
+        """
+        if latency is not None:
+            self.metrics.observe('harvester_source_latency_seconds', latency, source=source_name)
+        if not ConnectivityMonitor.get_monitor().is_online():
+            self.metrics.increment('harvester_source_lookups_total', source=source_name, outcome='offline')
+            return
+        self.breaker(source_name).record_success()
+        if latency is not None:
+            self.timeouts.record(source_name, latency)
+        found = {field for field in requested if result and result.get(field)}
+        self.metrics.increment('harvester_source_lookups_total', source=source_name, outcome='hit' if found else 'miss')
+        for field in found:
+            self.metrics.increment('harvester_source_fields_found_total', source=source_name, field=field)
+        if self.planner and latency is not None:
+            self.planner.record(source_name, input_type, requested, found, latency)
+        with self.db_lock:
+            self.negative_cache.record(source_name, input_type, identifier, requested - found, found)
+
+    def write_metrics(self):
+        """
+        Add the statistics of the caches, circuit breakers, rate limits, browsers and page waits
+        to the metrics, and save a snapshot of them. The page waits are counted since the
+        application started.
+        """
+        caches = {'record': self.record_cache.stats}
+        if AsyncHttpClient.cache:
+            caches['http'] = AsyncHttpClient.cache.stats
+        for cache, stats in caches.items():
+            for event, value in stats.items():
+                self.metrics.set('harvester_cache_events', value, cache=cache, event=event)
+        for name, breaker in self.breakers.items():
+            self.metrics.set('harvester_source_breaker_open', int(breaker.state != CLOSED), source=name)
+        for host, depth in RateScheduler.get_scheduler().queue_depths().items():
+            self.metrics.set('harvester_rate_limit_queue_depth', depth, host=host)
+        browsers = WebDriverManager.health()
+        for state in ('busy', 'idle'):
+            self.metrics.set('harvester_browsers', sum(browser['busy'] == (state == 'busy') for browser in browsers), state=state)
+        self.metrics.set('harvester_browsers_failing', sum(browser['failures'] > 0 for browser in browsers))
+        for catalog, kinds in pageWait.wait_statistics().items():
+            for kind, stats in kinds.items():
+                self.metrics.set('harvester_page_waits', stats['count'], catalog=catalog, kind=kind)
+                self.metrics.set('harvester_page_wait_timeouts', stats['timeouts'], catalog=catalog, kind=kind)
+                self.metrics.set('harvester_page_wait_seconds', stats['total'], catalog=catalog, kind=kind)
+                self.metrics.set('harvester_page_wait_max_seconds', stats['max'], catalog=catalog, kind=kind)
+        if self.metrics_dir is None:
+            return
+        try:
+            self.metrics.write(self.metrics_dir, job_id=self.checkpoint.job_id if self.checkpoint else None,
+                               input_type=self.input_type, identifiers=self.completed_identifiers)
+        except OSError as e:
+            logging.error(f"Failed to save the metrics: {e}")
+
+    def update_database_with_existing_data(self, identifier, data, input_type):
+        """
+        Update the database with the collected data for a given identifier.
+
+        Args:
+            identifier (str): The identifier for the data (ISBN or OCN).
+            data (dict): The data to be updated in the database.
+            input_type (str): The type of identifier ('isbn' or 'ocn').
+        """
+        # Normalize ISBNs to a list for uniform processing
+        isbns = data.get('isbn', [])
+        ocn = data.get('ocn', '')
+        lccns = data.get('lccn', [])
+        lccn_sources = data.get('lccn_source', [])
+
+        # Store everything found for the identifier in one transaction
+        with self.db_manager.transaction():
+            # Update book records
+            for isbn in isbns:
+                self._update_book_records(isbn, ocn)
+
+            # Update LCCN records only once per ISBN to avoid redundancy
+            self._update_lccn_records(isbns, lccns, lccn_sources)
+
+    def _process_book_identifiers(self, isbn_str, ocn_str):
+        """
+        Process and validate book identifiers.
+
+        Args:
+            isbn_str (str): The ISBN string to process.
+            ocn_str (str): The OCN string to process.
+
+        Returns:
+            tuple: A tuple containing the processed ISBN and OCN as strings.
+        """
+        isbn = isbn_str.strip() if isbn_str else None
+        ocn = ocn_str.strip() if ocn_str else None
+        return isbn, ocn
+
+    def _update_book_records(self, isbn, ocn):
+        """
+        Insert or update the book records in the database based on an ISBN and OCN.
+
+        Args:
+            isbn (str): The ISBN of the book.
+            ocn (str): The OCN of the book.
+        """
+        # A known book only has its OCN replaced by a new, non-empty one
+        self.record_cache.store_book(isbn, ocn)
+
+    def _update_lccn_records(self, isbns, lccns, lccn_sources):
+        """
+        Update the LCCN records associated with books in the database.
+
+        Args:
+            isbns (list): The list of ISBNs of the books.
+            lccns (list): A list of LCCNs associated with the books.
+            lccn_sources (list): A list of sources corresponding to each LCCN.
+        """
+        for lccn, source in zip(lccns, lccn_sources):
+            # A known LCCN keeps its first source
+            lccn_id, stored_source = self.record_cache.store_lccn(lccn, source)
+            self.record_cache.link(isbns, lccn_id, lccn, stored_source)
+
+    def write_data_to_output_file(self, identifier, data, offset=None):
+        """
+        Writes the collected metadata for a given identifier to the job's output writer.
+
+        The writer buffers the row and writes it to the tab-delimited output file in a batch
+        with others. This method considers the output options to determine which data should
+        be included in the output file, such as ISBN, OCN, LCCN, and LCCN Source.
+
+        Args:
+            identifier (str): The unique identifier for the item being processed. 
+                            This could be an ISBN, OCN, or any other defined identifier.
+            data (dict): A dictionary containing metadata for the item associated 
+                        with the identifier. Keys should match the user-selected 
+                        output options (e.g., 'isbn', 'ocn', 'lccn', 'lccn_source').
+            offset (int): The position of the identifier in the input, recorded in the job's checkpoint once the row is written.
+        """
+        if not self.output_writer:
+            return
+
+        self.output_writer.write_row(identifier, data, offset)
+        self.last_processed = self.output_writer.last_written
+
+    def record_written_rows(self, offsets, output_position):
+        """Record in the job's checkpoint the identifiers whose rows the output writer has written."""
+        for offset in offsets:
+            self.checkpoint.mark_completed(offset, output_position)
+        self.checkpoint.save_if_due()
@@ -0,0 +1,109 @@
+import json
+import logging
+import math
+import os
+import threading
+
+# Hit rate assumed for a field a source has not been asked for yet, and the weight of that guess in answers
+PRIOR_HIT_RATE = 0.5
+PRIOR_WEIGHT = 2
+# Seconds assumed for a source that has not answered yet, until some source has
+DEFAULT_LATENCY = 1.0
+# Expected costs within this factor of each other count as equal, so the user's order decides
+COST_BAND = 1.5
+
+
+class SourcePlanner:
+    """
+    Orders the sources of the priority list by how cheaply they are expected to find the missing fields.
+
+    For each identifier type, the planner keeps the rate at which each source had each field
+    it was asked for and how long its answers take. Both are averages over about the last
+    `window` answers, so a source that stops having a field falls behind. The expected cost
+    of asking a source is its latency divided by its chance of having any of the missing
+    fields. Sources are ordered by that cost, except the `pinned` sources, which keep their
+    place in the user's list. Sources whose costs are close keep the user's order among them.
+
+    The statistics are kept in a JSON file, read when the planner is created and written by save().
+    """
+
+    def __init__(self, path, pinned=(), window=500):
+        self.path = path
+        self.pinned = set(pinned)
+        self.window = window
+        self.stats = {}  # input type -> source -> {'answers', 'latency', 'fields': {field: {'asked', 'hit_rate'}}}
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r') as file:
+                self.stats = json.load(file)
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Ignoring unreadable source statistics in {path}: {e}")
+
+    def record(self, source, input_type, requested, found, latency):
+        """
+        Record the answer of a source.
+
+        Args:
+            source (str): The name of the source.
+            input_type (str): The type of the identifier it was asked about ('isbn' or 'ocn').
+            requested (set): The fields it was asked for.
+            found (set): The requested fields it had a value for.
+            latency (float): The seconds it took to answer.
+        """
+        with self._lock:
+            stats = self.stats.setdefault(input_type, {}).setdefault(source, {'answers': 0, 'latency': 0.0, 'fields': {}})
+            stats['answers'] += 1
+            stats['latency'] = self._average(stats['latency'], latency, stats['answers'])
+            for field in requested:
+                field_stats = stats['fields'].setdefault(field, {'asked': 0, 'hit_rate': 0.0})
+                field_stats['asked'] += 1
+                field_stats['hit_rate'] = self._average(field_stats['hit_rate'], field in found, field_stats['asked'])
+
+    def expected_cost(self, source, input_type, missing):
+        """Return the expected seconds spent on a source before it has one of the missing fields."""
+        with self._lock:
+            sources = self.stats.get(input_type, {})
+            stats = sources.get(source)
+            if stats and stats['answers']:
+                latency = stats['latency']
+            else:
+                latencies = [other['latency'] for other in sources.values() if other['answers']]
+                latency = sum(latencies) / len(latencies) if latencies else DEFAULT_LATENCY
+            chance_of_none = 1.0
+            for field in missing:
+                field_stats = (stats or {}).get('fields', {}).get(field, {'asked': 0, 'hit_rate': 0.0})
+                asked = min(field_stats['asked'], self.window)
+                hit_rate = (field_stats['hit_rate'] * asked + PRIOR_HIT_RATE * PRIOR_WEIGHT) / (asked + PRIOR_WEIGHT)
+                chance_of_none *= 1 - hit_rate
+        return latency / max(1 - chance_of_none, 1e-3)
+
+    def order(self, priority_list, input_type, missing):
+        """
+        Return the priority list reordered for an identifier still missing the given fields.
+
+        The pinned sources keep their positions and the others fill the remaining ones, by
+        expected cost and then by their order in the list.
+        """
+        movable = [source for source in priority_list if source not in self.pinned]
+        costs = {source: self.expected_cost(source, input_type, missing) for source in movable}
+        movable.sort(key=lambda source: math.floor(math.log(max(costs[source], 1e-3), COST_BAND)))
+        ordered = iter(movable)
+        return [source if source in self.pinned else next(ordered) for source in priority_list]
+
+    def save(self):
+        """Write the statistics atomically, so a crash leaves either the old or the new version."""
+        with self._lock:
+            data = json.dumps(self.stats)
+        temp_path = self.path.with_suffix('.tmp')
+        try:
+            with open(temp_path, 'w') as file:
+                file.write(data)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.error(f"Failed to save source statistics: {e}")
+
+    def _average(self, average, value, count):
+        # The mean of the first `window` values, then an exponential average over about `window` values
+        return average + (value - average) / min(count, self.window)
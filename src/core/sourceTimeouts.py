@@ -0,0 +1,52 @@
+import threading
+from collections import deque
+
+
+class SourceTimeoutError(Exception):
+    """Raised when a source did not answer within its time limit, which is neither an answer nor a failed request."""
+
+
+class SourceTimeouts:
+    """
+    Time limits of the lookups of each source.
+
+    The limit of a source is its entry in `limits`, or `default` seconds. When `adaptive` is
+    on and a source has answered `min_samples` times, its limit becomes `factor` times the
+    99th percentile of its last `window` answer times instead, kept between `minimum` and the
+    configured limit, so that one slow host holds up a search no longer than it has to.
+
+    Lookups that run out of time are counted per source in `stats`.
+    """
+
+    def __init__(self, default=60.0, limits=None, adaptive=False, factor=2.0, minimum=5.0, window=200, min_samples=50):
+        self.default = default
+        self.limits = dict(limits or {})
+        self.adaptive = adaptive
+        self.factor = factor
+        self.minimum = minimum
+        self.window = window
+        self.min_samples = min_samples
+        self.stats = {}  # source -> number of lookups that timed out
+        self._latencies = {}  # source -> answer times of its last lookups
+        self._lock = threading.Lock()
+
+    def record(self, source, latency):
+        """Record the seconds a source took to answer."""
+        with self._lock:
+            self._latencies.setdefault(source, deque(maxlen=self.window)).append(latency)
+
+    def record_timeout(self, source):
+        with self._lock:
+            self.stats[source] = self.stats.get(source, 0) + 1
+
+    def timeout(self, source):
+        """Return the seconds a lookup of the source may take."""
+        limit = self.limits.get(source, self.default)
+        if not self.adaptive:
+            return limit
+        with self._lock:
+            latencies = sorted(self._latencies.get(source, ()))
+        if len(latencies) < self.min_samples:
+            return limit
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        return min(limit, max(self.minimum, p99 * self.factor))
@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+
+# API modules for gathering library metadata from various sources
+from apis.harvardLibraryAPI import HarvardLibraryAPI
+from apis.libraryOfCongressAPI import LibraryOfCongressAPI
+from apis.googleBooksAPI import GoogleBooksAPI
+from apis.openLibraryAPI import OpenLibraryAPI
+
+# Web scraping modules for extracting data from various university libraries
+from webScraping.columbiaLibraryAPI import ColumbiaLibraryAPI
+from webScraping.cornellLibraryAPI import CornellLibraryAPI
+from webScraping.dukeLibraryAPI import DukeLibraryAPI
+from webScraping.indianaLibraryAPI import IndianaLibraryAPI
+from webScraping.johnsHopkinsLibraryAPI import JohnsHopkinsLibraryAPI
+from webScraping.northCarolinaStateLibraryAPI import NorthCarolinaStateLibraryAPI
+from webScraping.pennStateLibraryAPI import PennStateLibraryAPI
+from webScraping.yaleLibraryAPI import YaleLibraryAPI
+from webScraping.stanfordLibraryAPI import StanfordLibraryAPI
+
+# Every available source, keyed by the name shown to the user
+SOURCE_CLASSES = {
+    "Google Books (API)": GoogleBooksAPI,
+    "Harvard Library (API)": HarvardLibraryAPI,
+    "Library of Congress (API)": LibraryOfCongressAPI,
+    "Open Library (API)": OpenLibraryAPI,
+    "Columbia Library (Blacklight)": ColumbiaLibraryAPI,
+    "Cornell Library (Blacklight)": CornellLibraryAPI,
+    "Duke Library (Blacklight)": DukeLibraryAPI,
+    "Indiana Library (Blacklight)": IndianaLibraryAPI,
+    "Johns Hopkins Library (Blacklight)": JohnsHopkinsLibraryAPI,
+    "North Carolina State Library (Blacklight)": NorthCarolinaStateLibraryAPI,
+    "Pennsylvania State Library (Blacklight)": PennStateLibraryAPI,
+    "Yale Library (Blacklight)": YaleLibraryAPI,
+    "Stanford Library (Blacklight)": StanfordLibraryAPI
+}
+
+DEFAULT_PRIORITY_LIST = [
+    'Google Books (API)', 'Harvard Library (API)',
+    'Library of Congress (API)', 'Open Library (API)',
+    'Columbia Library (Blacklight)', 'Cornell Library (Blacklight)',
+    'Duke Library (Blacklight)', 'Indiana Library (Blacklight)',
+    'Johns Hopkins Library (Blacklight)', 'North Carolina State Library (Blacklight)',
+    'Pennsylvania State Library (Blacklight)', 'Stanford Library (Blacklight)',
+    'Yale Library (Blacklight)'
+]
+
+
+def initialize_sources(on_error=None, names=None):
+    """
+    Instantiate every source class, or only the named ones.
+
+    Initialization stops at the first failure, since a missing browser affects every scraper
+    that follows. The sources initialized before the failure are still returned.
+
+    Args:
+        on_error (callable): Optional callback receiving the source name and the exception.
+        names (list): Optional source names to initialize. Leaving out the Blacklight sources means no browser is started.
+
+    Returns:
+        dict: Source names mapped to their API class instances.
+    """
+    source_mapping = {}
+    for key, api_class in SOURCE_CLASSES.items():
+        if names is not None and key not in names:
+            continue
+        try:
+            source_mapping[key] = api_class()  # Instantiate the API class
+        except RuntimeError as e:
+            logging.error(f"WebDriver error initializing {key}: {e}\nPlease make sure Google Chrome and ChromeDriver are installed and updated.")
+            if on_error:
+                on_error(key, e)
+            break  # Stop further initialization
+        except Exception as e:
+            logging.error(f"An error occurred initializing {key}: {e}")
+            if on_error:
+                on_error(key, e)
+            break  # Stop further initialization
+    return source_mapping
+
+
+def save_source_lists(app_data_dir, selected_sources, unused_sources):
+    """Persist the selected (priority ordered) and unused sources to source_lists.json."""
+    data = {
+        'selected_sources': selected_sources,
+        'unused_sources': unused_sources
+    }
+    filepath = app_data_dir / 'source_lists.json'
+    with open(filepath, 'w') as file:
+        json.dump(data, file)
+
+
+def load_source_lists(app_data_dir, selected_sources=None, unused_sources=None):
+    """
+    Load the persisted source lists, falling back to the given defaults.
+
+    If the file is missing, empty, unreadable or does not mention every source, it is
+    re-created from the defaults.
+
+    Returns:
+        tuple: The selected sources in priority order and the unused sources.
+    """
+    selected_sources = list(DEFAULT_PRIORITY_LIST if selected_sources is None else selected_sources)
+    unused_sources = list(unused_sources or [])
+    filepath = app_data_dir / 'source_lists.json'
+    try:
+
+        if os.path.getsize(filepath) == 0:
+            raise json.JSONDecodeError("File is empty", "", 0)
+
+
+        with open(filepath, 'r') as file:
+            data = json.load(file)
+            file_selected = data.get('selected_sources', [])
+            file_unused = data.get('unused_sources', [])
+            # Safeguard to ensure all sources are included
+            all_sources = set(selected_sources + unused_sources)
+            file_sources = set(file_selected + file_unused)
+
+            if not all_sources == file_sources:
+                # If not all sources are present, reinitialize the file
+                save_source_lists(app_data_dir, selected_sources, unused_sources)
+            else:
+                selected_sources = file_selected
+                unused_sources = file_unused
+    except Exception as e:
+        # If the file doesn't exist or is empty, save the initial lists to create the file.
+        save_source_lists(app_data_dir, selected_sources, unused_sources)
+    return selected_sources, unused_sources
@@ -1,8 +1,21 @@
+import logging
 import sqlite3
 import os
 import sys
+import threading
+from contextlib import contextmanager
 
 class DatabaseManager:
+    """
+    Access to the application's SQLite database.
+
+    The manager keeps one connection open for its lifetime, in WAL mode so that reading never
+    waits for a write, and shares it between threads behind a lock. Statements take their
+    values as `params` bound to '?' placeholders, which lets SQLite reuse their compiled form.
+    Each statement is committed on its own, unless it runs inside transaction(), which commits
+    a batch of statements at once. A failed statement is logged, and raised when it runs
+    inside a transaction so that the whole batch is rolled back.
+    """
 
     def __init__(self, db_name='metadata.sqlite', db_path=None):
         if not getattr(sys, 'frozen', False):
@@ -10,20 +23,100 @@ class DatabaseManager:
             self.db_path = os.path.join(application_path, db_name)
         else:
             self.db_path = os.path.join(db_path, db_name)
+        self._connection = None
+        self._lock = threading.RLock()
+        self._transaction_depth = 0
+        self._transaction_listeners = []
+
+    @property
+    def connection(self):
+        """The connection to the database, opened on first use."""
+        with self._lock:
+            if self._connection is None:
+                # Transactions are managed explicitly, see transaction()
+                self._connection = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None,
+                                                   cached_statements=256)
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                # With WAL, NORMAL only risks the last transactions on a power loss, never corruption
+                self._connection.execute("PRAGMA synchronous=NORMAL")
+                self._connection.execute("PRAGMA cache_size=-16384")
+                self._connection.execute("PRAGMA temp_store=MEMORY")
+            return self._connection
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run the statements of a `with` block in one transaction, committed at its end or rolled back on an error.
+
+        Other threads wait for the transaction to finish before using the database. Nested
+        transactions are part of the outermost one.
+        """
+        with self._lock:
+            connection = self.connection
+            if self._transaction_depth == 0:
+                connection.execute("BEGIN")
+            self._transaction_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._transaction_depth -= 1
+                if self._transaction_depth == 0:
+                    connection.execute("ROLLBACK")
+                    self._notify_transaction_listeners(False)
+                raise
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                connection.execute("COMMIT")
+                self._notify_transaction_listeners(True)
+
+    def in_transaction(self):
+        """Return whether a transaction() is running, in any thread."""
+        return self._transaction_depth > 0
+
+    def add_transaction_listener(self, listener):
+        """
+        Call `listener(committed)` at the end of every outermost transaction, with whether it was
+        committed or rolled back. Listeners run before other threads can use the database again.
+        """
+        with self._lock:
+            self._transaction_listeners.append(listener)
+
+    def _notify_transaction_listeners(self, committed):
+        for listener in self._transaction_listeners:
+            listener(committed)
+
+    def close(self):
+        """Close the connection. It is opened again if the database is used afterwards."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
 
     def execute_query(self, query, params=(), fetch=False):
         """General purpose method to execute database queries."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._lock:
             try:
-                cursor.execute(query, params)
+                cursor = self.connection.execute(query, params)
                 if fetch:
                     return cursor.fetchall()
-                conn.commit()
             except sqlite3.Error as e:
-                print(f"Database error: {e}")
+                logging.error(f"Database error: {e}")
+                if self._transaction_depth > 0:
+                    raise
             except Exception as e:
-                print(f"Exception in query execution: {e}")
+                logging.error(f"Exception in query execution: {e}")
+                if self._transaction_depth > 0:
+                    raise
+
+    def execute_many(self, query, params_list):
+        """Execute a statement once for every set of parameters."""
+        with self._lock:
+            try:
+                self.connection.executemany(query, params_list)
+            except sqlite3.Error as e:
+                logging.error(f"Database error: {e}")
+                if self._transaction_depth > 0:
+                    raise
 
     def create_table(self, table_name, columns):
         query = f"CREATE TABLE IF NOT EXISTS {table_name} ({columns})"
@@ -34,20 +127,20 @@ class DatabaseManager:
         query = f"INSERT INTO {table_name} VALUES ({placeholders})"
         self.execute_query(query, data)
 
-    def fetch_data(self, table_name, condition=''):
+    def fetch_data(self, table_name, condition='', params=()):
         query = f"SELECT * FROM {table_name} {condition}"
-        return self.execute_query(query, fetch=True)
+        return self.execute_query(query, params, fetch=True)
 
-    def update_data(self, table_name, update_values, condition):
+    def update_data(self, table_name, update_values, condition, params=()):
         query = f"UPDATE {table_name} SET {update_values} WHERE {condition}"
-        self.execute_query(query)
+        self.execute_query(query, params)
 
-    def delete_data(self, table_name, condition):
+    def delete_data(self, table_name, condition, params=()):
         query = f"DELETE FROM {table_name} WHERE {condition}"
-        self.execute_query(query)
+        self.execute_query(query, params)
 
-    def data_exists(self, table_name, condition):
+    def data_exists(self, table_name, condition, params=()):
         """Check if data exists in the table matching the condition."""
-        result = self.fetch_data(table_name, f"WHERE {condition}")
+        query = f"SELECT 1 FROM {table_name} WHERE {condition} LIMIT 1"
+        result = self.execute_query(query, params, fetch=True)
         return result is not None and len(result) > 0
-
@@ -0,0 +1,75 @@
+import time
+
+# Seconds a miss is remembered when the settings do not say otherwise
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+class NegativeCache:
+    """
+    Records which sources had nothing for an identifier, so they are not asked again for a while.
+
+    A miss is kept per source, identifier type, identifier and field in the negative_cache
+    table of the database. It expires after a time to live looked up in `ttls` by, in order,
+    'source:field', the source name, the field and 'default'. A time to live of 0 turns
+    caching off for what it applies to.
+    """
+
+    def __init__(self, db_manager, ttls=None):
+        """
+        Args:
+            db_manager (DatabaseManager): The database holding the negative_cache table.
+            ttls (dict): Times to live in seconds, e.g. {'default': 604800, 'Harvard Library (API)': 2592000,
+                'lccn': 86400, 'Open Library (API):ocn': 0}.
+        """
+        self.db_manager = db_manager
+        self.ttls = dict(ttls or {})
+
+    @staticmethod
+    def create_table(db_manager):
+        db_manager.create_table("negative_cache", "Source TEXT, Id_type TEXT, Identifier TEXT, Field TEXT, Checked REAL, "
+                                                  "PRIMARY KEY (Source, Id_type, Identifier, Field)")
+
+    def ttl(self, source, field):
+        """Return the number of seconds a miss of `source` for `field` is remembered."""
+        for key in (f"{source}:{field}", source, field, 'default'):
+            if key in self.ttls:
+                return self.ttls[key]
+        return DEFAULT_TTL
+
+    def known_misses(self, id_type, identifier):
+        """
+        Return the fields that each source recently had nothing for.
+
+        Returns:
+            dict: Source names mapped to the set of fields they have no value for.
+        """
+        rows = self.db_manager.execute_query("SELECT Source, Field, Checked FROM negative_cache WHERE Id_type = ? AND Identifier = ?",
+                                             (id_type, identifier), fetch=True) or []
+        now = time.time()
+        misses = {}
+        for source, field, checked in rows:
+            if now - checked < self.ttl(source, field):
+                misses.setdefault(source, set()).add(field)
+        return misses
+
+    def record(self, source, id_type, identifier, missed, found=()):
+        """
+        Record the answer of a source: the fields it had nothing for, and those it had a value for.
+        """
+        missed = [field for field in missed if self.ttl(source, field) > 0]
+        if missed:
+            now = time.time()
+            placeholders = ', '.join(['(?, ?, ?, ?, ?)'] * len(missed))
+            params = [value for field in missed for value in (source, id_type, identifier, field, now)]
+            self.db_manager.execute_query(f"INSERT OR REPLACE INTO negative_cache VALUES {placeholders}", params)
+        found = list(found)
+        if found:
+            placeholders = ', '.join(['?'] * len(found))
+            self.db_manager.execute_query(f"DELETE FROM negative_cache WHERE Source = ? AND Id_type = ? AND Identifier = ? "
+                                          f"AND Field IN ({placeholders})", [source, id_type, identifier] + found)
+
+    def purge(self):
+        """Delete the misses older than the longest time to live."""
+        ttls = list(self.ttls.values()) + ([] if 'default' in self.ttls else [DEFAULT_TTL])
+        longest = max(ttls)
+        self.db_manager.execute_query("DELETE FROM negative_cache WHERE Checked < ?", (time.time() - longest,))
@@ -0,0 +1,184 @@
+import sys
+import threading
+from collections import OrderedDict
+
+# Rough size in bytes of a cache entry besides its strings: the key and value tuples and the dictionary slot
+ENTRY_OVERHEAD = 200
+
+# Cached lookups that found no row
+_ABSENT = object()
+
+
+class RecordCache:
+    """
+    Bounded in-memory read-through cache of the harvester's tables, in front of a DatabaseManager.
+
+    It keeps the book rows looked up by ISBN or OCN, the ID and source of each LCCN, the first
+    LCCN linked to each ISBN and the links known to exist, including the lookups that found
+    nothing. Writes go through the cache to the database and update the entries they affect,
+    so repeated and related lookups do not query the database again. Once the entries take
+    more than about `max_size` bytes, the least recently used ones are evicted.
+
+    The cache must be the only writer of the books, lccn and book_lccn tables while it is in
+    use. It may be used from any thread. Hits, misses and evictions are counted in `stats`.
+    Entries kept while a transaction of the DatabaseManager runs may hold its uncommitted rows,
+    so they are dropped again when it is rolled back.
+    """
+
+    def __init__(self, db_manager, max_size=32 * 1024 * 1024):
+        self.db_manager = db_manager
+        self.max_size = max_size
+        self.stats = {'hits': 0, 'misses': 0, 'evicted': 0}
+        self._entries = OrderedDict()  # (kind, key) -> (value, size)
+        self._size = 0
+        self._writes = 0
+        self._uncommitted = set()  # Keys of the entries kept during the running transaction
+        self._lock = threading.Lock()
+        db_manager.add_transaction_listener(self._transaction_ended)
+
+    def book(self, column, value):
+        """
+        Return the first book row whose `column` ('Isbn' or 'Ocn') is `value`.
+
+        Returns:
+            tuple: The ISBN and OCN of the book, or None if there is no such book.
+        """
+        return self._read_through(('book', column, value), f"SELECT Isbn, Ocn FROM books WHERE {column} = ? LIMIT 1", (value,))
+
+    def first_lccn(self, isbn):
+        """
+        Return the first LCCN linked to an ISBN.
+
+        Returns:
+            tuple: The ID, LCCN and source of the LCCN, or None if the ISBN has none.
+        """
+        return self._read_through(('first_lccn', isbn),
+                                  "SELECT lccn.Lccn_id, lccn.Lccn, lccn.Source FROM lccn JOIN book_lccn "
+                                  "ON lccn.Lccn_id = book_lccn.Lccn_id WHERE book_lccn.Isbn = ? LIMIT 1",
+                                  (isbn,))
+
+    def store_book(self, isbn, ocn):
+        """Insert a book, or replace the OCN of a known one by a new, non-empty one."""
+        self.db_manager.execute_query("INSERT INTO books (Isbn, Ocn) VALUES (?, ?) ON CONFLICT (Isbn) DO UPDATE "
+                                      "SET Ocn = excluded.Ocn WHERE excluded.Ocn != '' AND Ocn IS NOT excluded.Ocn",
+                                      (isbn, ocn))
+        with self._lock:
+            self._writes += 1
+            previous = self._peek(('book', 'Isbn', isbn))
+            if previous is not None and previous is not _ABSENT:
+                # The OCN the book had may now find another book first, or none
+                self._discard(('book', 'Ocn', previous[1]))
+                self._put(('book', 'Isbn', isbn), (isbn, ocn or previous[1]))
+            elif ocn or previous is _ABSENT:
+                self._put(('book', 'Isbn', isbn), (isbn, ocn))
+            else:
+                # An unknown book may have kept the OCN it had
+                self._discard(('book', 'Isbn', isbn))
+            # Which book an OCN finds first depends on the rows, so it is looked up again
+            self._discard(('book', 'Ocn', ocn))
+
+    def store_lccn(self, lccn, source):
+        """
+        Insert an LCCN unless it is known already, in which case it keeps its first source.
+
+        Returns:
+            tuple: The ID and the source of the LCCN.
+        """
+        with self._lock:
+            record = self._get(('lccn', lccn))
+        if record is not None:
+            return record
+        # The no-op update makes RETURNING give the ID of a known LCCN
+        record = self.db_manager.execute_query("INSERT INTO lccn (Lccn, Source) VALUES (?, ?) ON CONFLICT (Lccn) "
+                                               "DO UPDATE SET Lccn = excluded.Lccn RETURNING Lccn_id, Source",
+                                               (lccn, source), fetch=True)[0]
+        with self._lock:
+            self._writes += 1
+            self._put(('lccn', lccn), tuple(record))
+        return tuple(record)
+
+    def link(self, isbns, lccn_id, lccn, source):
+        """Link books to an LCCN, skipping the links known to exist."""
+        with self._lock:
+            new_links = [isbn for isbn in isbns if self._get(('link', isbn, lccn_id)) is None]
+        if not new_links:
+            return
+        self.db_manager.execute_many("INSERT INTO book_lccn (Isbn, Lccn_id) VALUES (?, ?) ON CONFLICT DO NOTHING",
+                                     [(isbn, lccn_id) for isbn in new_links])
+        with self._lock:
+            self._writes += 1
+            for isbn in new_links:
+                self._put(('link', isbn, lccn_id), True)
+                first = self._peek(('first_lccn', isbn))
+                if first is _ABSENT:
+                    self._put(('first_lccn', isbn), (lccn_id, lccn, source))
+                elif first is not None and first[0] != lccn_id:
+                    # Which link the database gives first is not defined, so it is looked up again
+                    self._discard(('first_lccn', isbn))
+
+    def clear(self):
+        with self._lock:
+            self._writes += 1
+            self._entries.clear()
+            self._size = 0
+
+    def _transaction_ended(self, committed):
+        with self._lock:
+            if not committed:
+                self._writes += 1
+                for key in self._uncommitted:
+                    self._discard(key)
+            self._uncommitted.clear()
+
+    def _read_through(self, key, query, params):
+        with self._lock:
+            value = self._get(key)
+            writes = self._writes
+        if value is not None:
+            return None if value is _ABSENT else value
+        rows = self.db_manager.execute_query(query, params, fetch=True)
+        if rows is None:  # The query failed, which says nothing about the row
+            return None
+        value = tuple(rows[0]) if rows else _ABSENT
+        with self._lock:
+            # A write since the query may have made its result stale, so it is returned without being kept
+            if self._writes == writes:
+                self._put(key, value)
+        return None if value is _ABSENT else value
+
+    # The methods below are called with the lock held
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _peek(self, key):
+        # Like _get, without counting the lookup or refreshing the entry
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def _put(self, key, value):
+        if self.max_size <= 0:
+            return
+        size = ENTRY_OVERHEAD + sum(sys.getsizeof(part) for part in key[1:])
+        if isinstance(value, tuple):
+            size += sum(sys.getsizeof(part) for part in value)
+        self._discard(key)
+        self._entries[key] = (value, size)
+        self._size += size
+        if self.db_manager.in_transaction():
+            self._uncommitted.add(key)
+        while self._size > self.max_size:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+            self.stats['evicted'] += 1
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._size -= entry[1]
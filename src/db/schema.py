@@ -0,0 +1,66 @@
+import logging
+
+# Migrations of the harvester's tables, applied in order. The version of a database is the
+# number of migrations it has had, kept in its user_version. The tables themselves are
+# created by MetadataHarvester.initialize_database, which is version 0.
+MIGRATIONS = [
+    # 1: Indexes for the lookups by OCN, LCCN and ISBN, and uniqueness of the LCCNs and of the
+    # links between books and LCCNs, which UPSERTs rely on. SQLite cannot add constraints to
+    # existing tables, so they are unique indexes, created after merging the duplicates.
+    [
+        # Index the LCCNs first, so merging the duplicates does not scan the table for every link
+        "CREATE INDEX IF NOT EXISTS lccn_lccn ON lccn (Lccn)",
+        "UPDATE book_lccn SET Lccn_id = (SELECT MIN(first.Lccn_id) FROM lccn AS first JOIN lccn AS this "
+        "ON first.Lccn = this.Lccn WHERE this.Lccn_id = book_lccn.Lccn_id) "
+        "WHERE Lccn_id IN (SELECT Lccn_id FROM lccn)",
+        "DELETE FROM lccn WHERE Lccn_id NOT IN (SELECT MIN(Lccn_id) FROM lccn GROUP BY Lccn)",
+        "DELETE FROM book_lccn WHERE rowid NOT IN (SELECT MIN(rowid) FROM book_lccn GROUP BY Isbn, Lccn_id)",
+        "DROP INDEX lccn_lccn",
+        "CREATE UNIQUE INDEX lccn_lccn ON lccn (Lccn)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS book_lccn_isbn ON book_lccn (Isbn, Lccn_id)",
+        "CREATE INDEX IF NOT EXISTS books_ocn ON books (Ocn)",
+        "ANALYZE",
+    ],
+    # 2: Index for the lookup of an identifier's misses in the negative cache, whose primary
+    # key starts with the source and so cannot serve it.
+    [
+        "CREATE INDEX IF NOT EXISTS negative_cache_identifier ON negative_cache (Id_type, Identifier)",
+    ],
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+# Share of free pages in the database file above which maintain() rebuilds it
+VACUUM_THRESHOLD = 0.25
+
+
+def migrate(db_manager):
+    """
+    Bring the database up to SCHEMA_VERSION.
+
+    Each migration runs in a transaction together with the update of the version, so a
+    failed migration leaves the database as it was and is tried again on the next start.
+    Errors are raised rather than printed, since the harvester depends on the schema.
+    """
+    connection = db_manager.connection
+    version = connection.execute("PRAGMA user_version").fetchone()[0]
+    for number in range(version, SCHEMA_VERSION):
+        logging.info(f"Migrating the database to version {number + 1}.")
+        with db_manager.transaction():
+            for statement in MIGRATIONS[number]:
+                connection.execute(statement)
+            connection.execute(f"PRAGMA user_version = {number + 1}")
+
+
+def maintain(db_manager):
+    """
+    Keep the query planner statistics current, and give the space of deleted rows back once it
+    is a large part of the database file. Meant to run after each search.
+    """
+    # Runs ANALYZE on the tables whose statistics have gone stale, and only on those
+    db_manager.execute_query("PRAGMA optimize")
+    page_count = db_manager.execute_query("PRAGMA page_count", fetch=True)[0][0]
+    free_pages = db_manager.execute_query("PRAGMA freelist_count", fetch=True)[0][0]
+    if page_count and free_pages / page_count > VACUUM_THRESHOLD:
+        logging.info(f"Compacting the database: {free_pages} of its {page_count} pages are free.")
+        db_manager.execute_query("VACUUM")
@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreaker:
+    """
+    Stops asking a source that keeps failing, and finds out when it works again.
+
+    The breaker opens after `failure_threshold` consecutive failures, after which allow()
+    turns the source down at once instead of letting every identifier wait for it to fail.
+    Once it has been open for `reset_timeout` seconds, it is half-open: allow() lets a single
+    probe through, and the breaker closes again if the probe succeeds or opens for another
+    `reset_timeout` seconds if it fails. A probe that is never reported on is given up on
+    after `reset_timeout` seconds, and another one let through. A `failure_threshold` of 0
+    turns the breaker off.
+
+    State changes are logged, and counted in `stats` with the lookups turned down.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.stats = {'opened': 0, 'half-opened': 0, 'closed': 0, 'rejected': 0}
+        self._opened_at = 0.0
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return whether the source may be asked now. Every lookup allowed must be reported on."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN and now - self._opened_at >= self.reset_timeout:
+                self._change_state(HALF_OPEN)
+            if self.state == HALF_OPEN and (self._probe_started is None or now - self._probe_started >= self.reset_timeout):
+                self._probe_started = now
+                return True
+            self.stats['rejected'] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state != CLOSED:
+                self._change_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and 0 < self.failure_threshold <= self.failures):
+                self._opened_at = time.monotonic()
+                self._change_state(OPEN)
+
+    def _change_state(self, state):
+        # Called with the lock held
+        self.state = state
+        self._probe_started = None
+        self.stats[{OPEN: 'opened', HALF_OPEN: 'half-opened', CLOSED: 'closed'}[state]] += 1
+        if state == OPEN:
+            logging.warning(f"{self.name} failed {self.failures} times in a row. It is skipped for {self.reset_timeout:g} seconds.")
+        elif state == HALF_OPEN:
+            logging.info(f"Checking whether {self.name} works again.")
+        else:
+            logging.info(f"{self.name} works again.")
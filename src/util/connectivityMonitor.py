@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+
+import requests
+
+from util.httpSessions import HttpSessionRegistry
+
+
+class ConnectivityMonitor:
+    """
+    Shared, cached view of whether the internet can be reached.
+
+    is_online() never blocks: it answers from the last known state, and asks the monitor's
+    background thread to probe `probe_url` when that state is older than `ttl` seconds. The
+    state is also kept fresh by the outcomes of real requests: callers report a response with
+    report_success(), which counts as proof of being online, and a connection failure with
+    report_failure(), which triggers an immediate probe since one unreachable host does not
+    mean the connection is down. While offline, the probe is repeated every `retry_interval`
+    seconds, and wait_until_online() lets the pipeline pause until the connection is back.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, probe_url='http://www.google.com/', ttl=30.0, retry_interval=5.0, probe_timeout=5.0):
+        self.probe_url = probe_url
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.probe_timeout = probe_timeout
+        self.online = True
+        # Time of the last evidence about the connection, none yet
+        self.checked = float('-inf')
+        self._condition = threading.Condition()
+        self._probe_requested = False
+        self._probing = False
+        self._thread = None
+
+    @classmethod
+    def get_monitor(cls):
+        """Return the shared monitor, creating it on first use."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def is_online(self):
+        """Return the cached connectivity state, refreshing it in the background if it is stale."""
+        with self._condition:
+            if time.monotonic() - self.checked > self.ttl:
+                self._request_probe()
+            return self.online
+
+    def report_success(self):
+        """Record that a request got a response, so the connection is up."""
+        self._set_state(True)
+
+    def report_failure(self):
+        """Record that a request could not connect, and check whether the connection is down."""
+        with self._condition:
+            self._request_probe()
+
+    def wait_until_online(self, timeout=None):
+        """
+        Block until the connection is known to be up.
+        Args:
+            timeout: Seconds to wait at most, or None to wait indefinitely.
+        Returns:
+            True if online, False if the timeout passed first.
+        """
+        with self._condition:
+            if not self.online:
+                self._request_probe()
+            return self._condition.wait_for(lambda: self.online, timeout)
+
+    def _set_state(self, online):
+        with self._condition:
+            if online != self.online:
+                if online:
+                    logging.info("Internet connection restored.")
+                else:
+                    logging.warning("No internet connection available.")
+            self.online = online
+            self.checked = time.monotonic()
+            self._condition.notify_all()
+
+    def _request_probe(self):
+        # Called with the condition held. A probe under way already answers the request.
+        if self._probing:
+            return
+        self._probe_requested = True
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='connectivity', daemon=True)
+            self._thread.start()
+        self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                # Keep probing while offline, otherwise wait until a probe is asked for
+                self._condition.wait_for(lambda: self._probe_requested, None if self.online else self.retry_interval)
+                self._probe_requested = False
+                self._probing = True
+            online = self._probe()
+            with self._condition:
+                self._probing = False
+                self._set_state(online)
+
+    def _probe(self):
+        try:
+            HttpSessionRegistry.get_session(self.probe_url).head(self.probe_url, timeout=self.probe_timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            return False
+        except requests.RequestException:
+            # Any answer from the server shows that the connection is up
+            pass
+        return True
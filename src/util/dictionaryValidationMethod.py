@@ -20,13 +20,15 @@ def optimize_dictionary(input_dictionary):
     lccn_source_list = input_dictionary.get("LCCN_Source", input_dictionary.get("lccn_source", []))
 
 
-    # clean the fields and store optimal output choice to the output dictionary
-    output_dictionary["ISBN"] = best_clean_isbn(isbn_list) if isbn_list else []
-    output_dictionary["OCN"] = clean_ocn(ocn) if ocn else ''
-    output_dictionary["LCCN"] = best_clean_lccn(lccn_list) if lccn_list else []
-    output_dictionary["LCCN_SOURCE"] = [str(lccn_source_list[0])] if output_dictionary["LCCN"] else []
-
-    return output_dictionary
+    # clean the fields and store optimal output choice to a fresh copy of the output dictionary,
+    # so that lookups running on different threads never share the same dictionary
+    cleaned_dictionary = dict(output_dictionary)
+    cleaned_dictionary["ISBN"] = best_clean_isbn(isbn_list) if isbn_list else []
+    cleaned_dictionary["OCN"] = clean_ocn(ocn) if ocn else ''
+    cleaned_dictionary["LCCN"] = best_clean_lccn(lccn_list) if lccn_list else []
+    cleaned_dictionary["LCCN_SOURCE"] = [str(lccn_source_list[0])] if cleaned_dictionary["LCCN"] else []
+
+    return cleaned_dictionary
 
 
 def best_clean_isbn(isbn_list):
@@ -1,40 +1,99 @@
+import itertools
+import logging
+import mmap
+import os
 import re
+import sys
 
-def verifyFileFormat(filepath, file_type):
+# Number of lines read to detect the content type of a file
+SAMPLE_SIZE = 1000
+
+def streamFileFormat(filepath, file_type=None, use_mmap=False):
     """
-    Reads a file and checks if it contains valid ISBNs or OCNs based on the selected file type.
-    Additionally, checks if the file content matches the selected file type.
+    Checks a file of ISBNs or OCNs without reading it all, and streams its valid items.
     Args:
-        filepath: Path of the file to read.
-        file_type: Type of the file content ('ISBN' or 'OCN') as selected by the user.
+        filepath: Path of the file to read, or '-' for standard input.
+        file_type: Type of the file content ('ISBN' or 'OCN') as selected by the user, or None to detect it.
+        use_mmap: Read the file through a memory map instead of buffered reads.
     Returns:
-        A list of extracted and validated items (ISBNs or OCNs).
+        The file type, or 'Invalid', and an iterator over the valid items.
     """
     try:
-        with open(filepath, 'r') as file:
-            lines = file.readlines()
-        
-        # Determine the content type of the file based on its contents
-        predicted_type = predict_file_content_type(lines)
+        return streamLineFormat(read_lines(filepath, use_mmap), file_type)
+    except Exception as e:
+        logging.error(f"Error reading file: {e}")
+        return 'Invalid', iter([])
 
-        # If the predicted content type does not match the user's selection, return an error
-        if predicted_type != file_type:
-            print(f"Warning: The content of the file does not seem to match the selected type '{file_type}'.")
-            return 'Invalid', []
+def streamLineFormat(lines, file_type=None):
+    """
+    Checks lines of ISBNs or OCNs, and streams the valid items.
+    The content type is detected from the first SAMPLE_SIZE lines only, and the remaining
+    lines are read and validated as the returned iterator is consumed, so memory use does not
+    depend on the number of lines.
+    Args:
+        lines: An iterator over the lines of text to check.
+        file_type: Type of the content ('ISBN' or 'OCN'), or None to detect it.
+    Returns:
+        The file type, or 'Invalid', and an iterator over the valid items.
+    """
+    sample = list(itertools.islice(lines, SAMPLE_SIZE))
+    lines = itertools.chain(sample, lines)
 
-        # Validate items based on the file type
-        if file_type == 'ISBN':
-            valid_items = [line.strip() for line in lines if is_valid_isbn(line.strip())]
-        elif file_type == 'OCN':
-            valid_items = [line.strip() for line in lines if is_valid_ocn(line.strip())]
+    predicted_type = predict_file_content_type(sample)
+    if file_type is None:
+        file_type = predicted_type
+    if predicted_type != file_type or predicted_type == 'Unknown':
+        # Logged rather than printed, since the CLI writes its TSV output to stdout
+        logging.warning(f"The content of the file does not seem to match the selected type '{file_type}'.")
+        return 'Invalid', iter([])
 
-        if not valid_items:
-            return 'Invalid', []
-        return file_type, valid_items
+    valid_items = iter_valid_items(lines, file_type)
+    first_item = next(valid_items, None)
+    if first_item is None:
+        return 'Invalid', iter([])
+    return file_type, itertools.chain([first_item], valid_items)
 
-    except Exception as e:
-        print(f"Error reading file: {e}")
-        return 'Invalid', []
+def read_lines(filepath, use_mmap=False):
+    """
+    Lazily reads the lines of a file, or of standard input when the path is '-'.
+    Args:
+        filepath: Path of the file to read.
+        use_mmap: Read the file through a memory map, letting the OS page it in on demand.
+    Returns:
+        An iterator over the lines of the file.
+    """
+    if filepath == '-':
+        return iter(sys.stdin.readline, '')
+    if use_mmap:
+        return _read_mapped_lines(filepath)
+    return _read_buffered_lines(filepath)
+
+def _read_buffered_lines(filepath):
+    with open(filepath, 'r', errors='replace') as file:
+        yield from file
+
+def _read_mapped_lines(filepath):
+    with open(filepath, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return  # Empty files cannot be mapped
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for line in iter(mapped.readline, b''):
+                yield line.decode('utf-8', errors='replace')
+
+def iter_valid_items(lines, file_type):
+    """
+    Lazily validates lines of ISBNs or OCNs.
+    Args:
+        lines: The lines of text to check.
+        file_type: Type of the content ('ISBN' or 'OCN').
+    Returns:
+        An iterator over the stripped valid items.
+    """
+    is_valid = is_valid_isbn if file_type == 'ISBN' else is_valid_ocn
+    for line in lines:
+        item = line.strip()
+        if is_valid(item):
+            yield item
 
 def predict_file_content_type(lines):
     """
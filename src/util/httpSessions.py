@@ -0,0 +1,92 @@
+import atexit
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter keeping a pool of keep-alive connections to one host, with default timeouts."""
+
+    def __init__(self, pool_size, timeout):
+        self.timeout = timeout
+        super().__init__(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(request, timeout=self.timeout if timeout is None else timeout, **kwargs)
+
+
+class HttpSessionRegistry:
+    """
+    Shared requests sessions for the synchronous HTTP callers, one per host.
+
+    Opening a connection costs a TCP and often a TLS handshake, so every caller that talks
+    to a host goes through that host's session and reuses its keep-alive connections instead.
+    Each session has a single adapter pooling up to `pool_size` connections, so as many
+    threads can have a request to the host in flight at once; further requests open a
+    connection that is dropped afterwards. Requests made without a timeout get
+    (`connect_timeout`, `read_timeout`), and responses may be gzip compressed.
+
+    The same limits are used by the AsyncHttpClient of the REST API sources.
+    """
+    pool_size = 10
+    connect_timeout = 5.0
+    read_timeout = 15.0
+
+    _lock = threading.Lock()
+    # Session of every host, keyed by (scheme, host and port)
+    _sessions = {}
+
+    @classmethod
+    def configure(cls, pool_size=None, connect_timeout=None, read_timeout=None):
+        """Change the pool size and default timeouts. Sessions created before are closed and replaced on next use."""
+        with cls._lock:
+            settings = (max(1, pool_size) if pool_size else cls.pool_size,
+                        connect_timeout or cls.connect_timeout,
+                        read_timeout or cls.read_timeout)
+            if settings == (cls.pool_size, cls.connect_timeout, cls.read_timeout):
+                return
+            cls.pool_size, cls.connect_timeout, cls.read_timeout = settings
+            sessions, cls._sessions = cls._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+    @classmethod
+    def get_session(cls, url):
+        """Return the shared session for the host of a URL, creating it on first use."""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        with cls._lock:
+            session = cls._sessions.get(key)
+            if session is None:
+                session = cls._sessions[key] = cls._create_session(f'{parts.scheme}://{parts.netloc}/')
+            return session
+
+    @classmethod
+    def get(cls, url, **kwargs):
+        """Send a GET request through the shared session of the URL's host."""
+        return cls.get_session(url).get(url, **kwargs)
+
+    @classmethod
+    def close_all(cls):
+        """Close every session and its pooled connections."""
+        with cls._lock:
+            sessions, cls._sessions = cls._sessions, {}
+        for session in sessions.values():
+            try:
+                session.close()
+            except Exception as e:
+                logging.error(f"Error closing an HTTP session: {e}")
+
+    @classmethod
+    def _create_session(cls, prefix):
+        session = requests.Session()
+        session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+        # Mounted for the host only, so a redirect to another host uses a default adapter
+        session.mount(prefix, _PooledAdapter(cls.pool_size, (cls.connect_timeout, cls.read_timeout)))
+        return session
+
+
+atexit.register(HttpSessionRegistry.close_all)
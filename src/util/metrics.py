@@ -0,0 +1,156 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds of the buckets of the latency histograms
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Count of observations in each of LATENCY_BUCKETS, with their sum."""
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # The last bucket holds the observations above every bound
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Return (upper bound, observations up to it) for every bucket, ending with '+Inf'."""
+        total = 0
+        buckets = []
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+
+class MetricsRegistry:
+    """
+    Shared in-process counters, gauges and latency histograms of the harvester.
+
+    A metric is identified by its name and a set of labels, e.g.
+    increment('harvester_source_lookups_total', source='Google Books (API)', outcome='hit').
+    Names and labels follow the Prometheus conventions, and write() saves a snapshot of every
+    metric both as JSON and in the Prometheus text format, which a node exporter textfile
+    collector can pick up. Metrics may be updated from any thread.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # name -> {labels: value}
+        self._gauges = {}
+        self._histograms = {}  # name -> {labels: Histogram}
+
+    @classmethod
+    def get_registry(cls):
+        """Return the shared registry, creating it on first use."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def increment(self, name, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            metric = self._counters.setdefault(name, {})
+            metric[key] = metric.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        """Set a gauge, a value that can go up and down."""
+        with self._lock:
+            self._gauges.setdefault(name, {})[self._key(labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        """Add a duration to a latency histogram."""
+        key = self._key(labels)
+        with self._lock:
+            metric = self._histograms.setdefault(name, {})
+            if key not in metric:
+                metric[key] = Histogram()
+            metric[key].observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of a `with` block in a latency histogram."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - started, **labels)
+
+    def reset(self):
+        """Forget every metric, e.g. when a new job starts."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """Return every metric as a JSON-serializable dictionary."""
+        with self._lock:
+            return {
+                'counters': {name: [{'labels': dict(key), 'value': value} for key, value in metric.items()]
+                             for name, metric in self._counters.items()},
+                'gauges': {name: [{'labels': dict(key), 'value': value} for key, value in metric.items()]
+                           for name, metric in self._gauges.items()},
+                'histograms': {name: [{'labels': dict(key), 'count': histogram.count, 'sum': histogram.sum,
+                                       'buckets': {str(bound): count for bound, count in histogram.cumulative()}}
+                                      for key, histogram in metric.items()]
+                               for name, metric in self._histograms.items()},
+            }
+
+    def prometheus_text(self):
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for kind, metrics in (('counter', self._counters), ('gauge', self._gauges)):
+                for name, metric in sorted(metrics.items()):
+                    lines.append(f'# TYPE {name} {kind}')
+                    lines.extend(f'{name}{self._format_labels(key)} {value}' for key, value in sorted(metric.items()))
+            for name, metric in sorted(self._histograms.items()):
+                lines.append(f'# TYPE {name} histogram')
+                for key, histogram in sorted(metric.items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{self._format_labels(key + (("le", str(bound)),))} {count}')
+                    lines.append(f'{name}_sum{self._format_labels(key)} {histogram.sum}')
+                    lines.append(f'{name}_count{self._format_labels(key)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, directory, **info):
+        """
+        Save a snapshot of the metrics to metrics.json and metrics.prom in a directory.
+
+        Args:
+            directory (Path): Where to write the files, e.g. the app data directory.
+            info: Values added to the JSON snapshot, such as the ID of the job.
+        """
+        snapshot = dict(info, written=time.strftime('%Y-%m-%dT%H:%M:%S%z'), **self.snapshot())
+        for filename, text in (('metrics.json', json.dumps(snapshot, indent=2)), ('metrics.prom', self.prometheus_text())):
+            path = directory / filename
+            # Written atomically, so a reader never sees half a snapshot
+            temp_path = path.with_name(filename + '.tmp')
+            with open(temp_path, 'w') as file:
+                file.write(text)
+            os.replace(temp_path, path)
+
+    @staticmethod
+    def _key(labels):
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    @staticmethod
+    def _format_labels(key):
+        if not key:
+            return ''
+        escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in key)
+        return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + '}'
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `calls` requests per `period` seconds with bursts of up to `calls`.
+
+    Permits are handed out by reservation: taking a token never blocks, it returns how long the
+    caller has to wait before using it. The balance may go negative, which queues callers in
+    the order they asked instead of letting them race for the next free token.
+    """
+
+    def __init__(self, calls, period):
+        self.rate = calls / period
+        self.capacity = calls
+        self.tokens = float(calls)
+        self.updated = time.monotonic()
+
+    def reserve(self, now):
+        """Take a token and return the number of seconds until it may be used."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self):
+        """Give back a token whose reservation was abandoned."""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class RateScheduler:
+    """
+    Shared rate limiter holding one token bucket per host.
+
+    Callers reserve a permit for a host without blocking and are told how long to wait for it.
+    Asynchronous callers then sleep on their event loop and synchronous callers sleep on their
+    own thread, so a throttled host never holds up requests to any other host. Hosts without a
+    configured limit are never throttled, unless they asked for a pause with penalize(). The
+    number of callers waiting on each host is exposed through queue_depths(), which the
+    harvester's metrics report as harvester_rate_limit_queue_depth.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._waiting = {}
+        self._paused_until = {}
+
+    @classmethod
+    def get_scheduler(cls):
+        """Return the shared scheduler, creating it on first use."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def configure(self, host, calls, period):
+        """Limit `host` to `calls` requests per `period` seconds, unless it already has a limit."""
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(calls, period)
+                self._waiting[host] = 0
+
+    def try_acquire(self, host):
+        """
+        Reserve a permit for a host without blocking.
+        Returns:
+            The number of seconds the caller must wait before sending its request; 0 means right away.
+        """
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._buckets.get(host)
+            delay = bucket.reserve(now) if bucket else 0
+            delay = max(delay, self._paused_until.get(host, now) - now)
+            if delay > 0:
+                self._waiting[host] = self._waiting.get(host, 0) + 1
+            return delay
+
+    def penalize(self, host, delay):
+        """
+        Hold back every request to a host for `delay` seconds, e.g. after it answered 429 Too Many
+        Requests. Its permits are then handed out at its configured rate again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until[host] = max(self._paused_until.get(host, now), now + delay)
+            bucket = self._buckets.get(host)
+            if bucket:
+                # The bucket refills from the end of the pause, so only one request goes out as soon as it ends
+                bucket.tokens = min(bucket.tokens, 1)
+                bucket.updated = max(bucket.updated, now + delay)
+
+    async def acquire_async(self, host):
+        """Wait for a permit for a host while letting the event loop run other work."""
+        delay = self.try_acquire(host)
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # The request was abandoned, so its permit can go to the next caller
+                self._release(host, refund=True)
+                raise
+            self._release(host)
+
+    def acquire(self, host):
+        """Wait for a permit for a host, sleeping on the calling thread."""
+        delay = self.try_acquire(host)
+        if delay > 0:
+            try:
+                time.sleep(delay)
+            finally:
+                self._release(host)
+
+    def _release(self, host, refund=False):
+        with self._lock:
+            self._waiting[host] -= 1
+            if refund and host in self._buckets:
+                self._buckets[host].refund()
+
+    def queue_depths(self):
+        """Return the number of callers currently waiting for a permit, per host."""
+        with self._lock:
+            return dict(self._waiting)
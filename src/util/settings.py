@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import platform
+from pathlib import Path
+
+# Default values for user-tunable settings, persisted as settings.json in the app data directory
+DEFAULT_SETTINGS = {
+    'max_workers': 4,
+    # How the priority list is walked for each identifier: 'sequential' asks one source at a time,
+    # 'parallel' keeps up to fanout_width sources in flight and 'hedged' starts the next source
+    # whenever the current ones have been running for hedge_delay seconds
+    'search_mode': 'sequential',
+    'fanout_width': 3,
+    'hedge_delay': 2.0,
+    # Read input files through a memory map instead of buffered reads
+    'mmap_input': False,
+    # Output rows are buffered and written once this many are waiting or this many seconds have passed
+    'output_flush_rows': 100,
+    'output_flush_interval': 1.0,
+    # Maximum number of browsers the web scrapers may run at the same time
+    'browser_pool_size': 2,
+    # Kept-alive connections per host, and the seconds to wait for a connection and for a response
+    'http_pool_size': 10,
+    'http_connect_timeout': 5.0,
+    'http_read_timeout': 15.0,
+    # Times a REST API request failing with a transient error is retried, the seconds of backoff before the first
+    # retry, doubled for each one after it, and the longest wait, including one asked for by a Retry-After header
+    'http_retries': 3,
+    'http_retry_backoff': 0.5,
+    'http_retry_max_delay': 30.0,
+    # Pause the search while the internet connection is down instead of recording empty results
+    'pause_when_offline': True,
+    # Seconds a source's lack of a field for an identifier is remembered, by 'source:field', source, field
+    # or 'default', so that the source is not asked again meanwhile. 0 turns it off.
+    'negative_cache_ttl': {'default': 7 * 24 * 3600},
+    # Size of the cache of API responses (0 turns it off), and the seconds a response without
+    # caching headers of its own stays fresh
+    'http_cache_size_mb': 100,
+    'http_cache_ttl': 24 * 3600,
+    # Identifiers looked up in the database together before searching the sources (0 looks each one up on its own)
+    'prefetch_batch_size': 1000,
+    # Memory kept for the rows of the database already read or written (0 turns it off)
+    'record_cache_size_mb': 32,
+    # Ask the sources most likely to quickly have the missing fields first, going by their past answers
+    # kept in source_stats.json. Pinned sources keep their place in the priority list.
+    'adaptive_ordering': False,
+    'pinned_sources': [],
+    # Skip a source after this many failed lookups in a row (0 never skips), and try it again after this many seconds
+    'breaker_failure_threshold': 5,
+    'breaker_reset_timeout': 60.0,
+    # Seconds a lookup may take, for every source and by source name, and a browser may take to load a page
+    'source_timeout': 60.0,
+    'source_timeouts': {},
+    'page_load_timeout': 30.0,
+    # Shorten the time limit of a source to this factor of its 99th percentile answer time, but not below the minimum
+    'adaptive_timeouts': False,
+    'adaptive_timeout_factor': 2.0,
+    'adaptive_timeout_min': 5.0,
+}
+
+
+def get_app_data_directory():
+    """Get the path to the application's data directory, creating it if needed."""
+    if platform.system() == "Windows":
+        app_data_path = Path(os.getenv('APPDATA')) / 'LibraryMetadataHarvester'
+    elif platform.system() == "Darwin":
+        app_data_path = Path.home() / 'Library' / 'Application Support' / 'LibraryMetadataHarvester'
+    else:  # Linux and other Unix-like OSes
+        app_data_path = Path.home() / '.LibraryMetadataHarvester'
+
+    app_data_path.mkdir(parents=True, exist_ok=True)
+    return app_data_path
+
+
+def load_settings(app_data_dir):
+    """
+    Load the persisted settings, falling back to the defaults for any missing value.
+    Args:
+        app_data_dir: Path of the application's data directory.
+    Returns:
+        A dictionary with every key of DEFAULT_SETTINGS.
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    filepath = app_data_dir / 'settings.json'
+    try:
+        with open(filepath, 'r') as file:
+            settings.update(json.load(file))
+    except (OSError, json.JSONDecodeError):
+        # If the file doesn't exist or is unreadable, save the defaults to create it.
+        save_settings(app_data_dir, settings)
+    return settings
+
+
+def save_settings(app_data_dir, settings):
+    """
+    Persist the settings to settings.json in the app data directory.
+    Args:
+        app_data_dir: Path of the application's data directory.
+        settings: The settings dictionary to save.
+    """
+    filepath = app_data_dir / 'settings.json'
+    try:
+        with open(filepath, 'w') as file:
+            json.dump(settings, file, indent=2)
+    except OSError as e:
+        logging.error(f"Failed to save settings: {e}")
@@ -0,0 +1,135 @@
+import csv
+import logging
+import os
+import sys
+import threading
+import time
+
+
+class TsvWriter:
+    """
+    Long-lived sink for the tab-delimited output of a search.
+
+    The output file is opened once per job and its header is written once, when the file is
+    empty. Rows are buffered and written in batches, when `flush_rows` rows are waiting or
+    `flush_interval` seconds have passed since the last flush (checked by a background thread,
+    so rows do not linger while the sources are slow), and when the writer is closed. A path
+    of '-' writes to standard output.
+
+    Every flush reports the offsets of the rows it wrote and the size of the file after them to
+    the optional `on_flush` callback, so a job checkpoint only ever accounts for rows that
+    have reached the file.
+    """
+
+    HEADERS = [('isbn', 'ISBN'), ('ocn', 'OCN'), ('lccn', 'LCCN'), ('lccn_source', 'LCCN_Source')]
+
+    def __init__(self, output_file_path, output_options, input_type, flush_rows=100, flush_interval=1.0, on_flush=None):
+        self.output_file_path = output_file_path
+        self.input_type = input_type.upper()
+        self.headers = [header for option, header in self.HEADERS if output_options.get(option)]
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self.last_written = None
+
+        self._lock = threading.Lock()
+        self._rows = []
+        self._offsets = []
+        self._last_flush = time.monotonic()
+        self._closed = threading.Event()
+
+        if output_file_path == '-':
+            self._file = sys.stdout
+            write_header = True
+        else:
+            self._file = open(output_file_path, 'a', newline='')
+            write_header = os.path.getsize(output_file_path) == 0
+        self._writer = csv.writer(self._file, delimiter='\t')
+        if write_header:
+            self._writer.writerow(self.headers)
+
+        self._flusher = threading.Thread(target=self._flush_periodically, name='tsv-flush', daemon=True)
+        self._flusher.start()
+
+    def write_row(self, identifier, data, offset=None):
+        """
+        Buffer the output row of an identifier.
+
+        Args:
+            identifier (str): The identifier the row belongs to.
+            data (dict): The metadata found for the identifier, keyed by output option.
+            offset (int): The position of the identifier in the input, reported to on_flush once the row is written.
+        """
+        row_data = self.format_row(identifier, data)
+        with self._lock:
+            # Rows without any data are not written, but their identifier still counts as done
+            if any(row_data):
+                self._rows.append(row_data)
+                self.last_written = identifier
+            if offset is not None:
+                self._offsets.append(offset)
+            if len(self._rows) >= self.flush_rows:
+                self._flush()
+
+    def format_row(self, identifier, data):
+        """Build the output row of an identifier from its metadata, following the headers."""
+        row_data = []
+        for header in self.headers:
+            if header == 'ISBN':
+                # Ensure isbn_data is a list; if identifier is a single ISBN (str), convert it to a list
+                isbn_data = [identifier] if self.input_type == 'ISBN' else data.get('isbn', [])
+                # Remove any potential non-string or empty elements
+                isbn_data = [str(isbn) for isbn in isbn_data if isbn]
+                formatted_data = isbn_data[0] if isbn_data else ''
+            elif header == 'OCN':
+                # Ensure OCN data is extracted properly; default to an empty list if not found
+                ocn_data = identifier if self.input_type == 'OCN' else data.get('ocn', '')
+                # Assuming OCN is always a single value, take the first element, if available
+                formatted_data = str(ocn_data) if ocn_data else ''
+            elif header == 'LCCN':
+                # Extract LCCN data, ensuring it's in list form
+                lccn_data = data.get('lccn', [])
+                # Remove any potential non-string or empty elements
+                lccn_data = [str(lccn) for lccn in lccn_data if lccn]
+                formatted_data = lccn_data[0] if lccn_data else ''
+            elif header == 'LCCN_Source':
+                # Similarly handle LCCN source data
+                lccn_source_data = data.get('lccn_source', [])
+                lccn_source_data = [str(source) for source in lccn_source_data if source]
+                formatted_data = lccn_source_data[0] if lccn_source_data else ''
+            row_data.append(formatted_data)
+
+        return [item if item not in [None, 'None'] else '' for item in row_data]
+
+    def flush(self):
+        """Write the buffered rows to the file."""
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        """Flush the remaining rows and close the file. Standard output is flushed but left open."""
+        self._closed.set()
+        with self._lock:
+            self._flush()
+            if self._file is not sys.stdout:
+                self._file.close()
+
+    def _flush(self):
+        if self._file.closed:
+            return
+        if self._rows:
+            self._writer.writerows(self._rows)
+            logging.info(f"Wrote {len(self._rows)} rows to the output file.")
+        self._file.flush()
+        if self.on_flush and self._offsets:
+            position = None if self._file is sys.stdout else self._file.tell()
+            self.on_flush(self._offsets, position)
+        self._rows = []
+        self._offsets = []
+        self._last_flush = time.monotonic()
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                if (self._rows or self._offsets) and time.monotonic() - self._last_flush >= self.flush_interval:
+                    self._flush()
@@ -1,13 +1,228 @@
-import requests
+import logging
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from util.connectivityMonitor import ConnectivityMonitor
+from util.metrics import MetricsRegistry
+from webScraping.blacklightFetcher import BlacklightFetchError
+from webScraping.marcParser import METADATA_TAGS, parse_marc_text
+from webScraping.webDriverManager import WebDriverManager
+from webScraping import pageWait
+
+class ScrapingFailedError(Exception):
+    """Raised by BaseScraping.lookup when a lookup failed, so that its empty result is not mistaken for the catalog having no record."""
+
+
+class BrowserFailedError(ScrapingFailedError):
+    """Raised by BaseScraping.lookup when the browser failed during a lookup, so that its result is incomplete."""
+
+
+class PageTimeoutError(ScrapingFailedError):
+    """Raised by BaseScraping.lookup when a page did not show what the scraper needed in time."""
+
 
 class BaseScraping:
+    """
+    Base class of the catalog scrapers.
+
+    fetch_metadata borrows a browser from the WebDriverManager pool for the duration of one
+    lookup and runs the scraper's scrape_metadata with it. The borrowed driver and the catalog
+    data being collected are kept per thread, so one scraper can serve several lookups at the
+    same time, each with its own browser.
+
+    Scrapers wait for pages with wait_for_element and click_and_wait, which return as soon as
+    the page is ready. `page_timeout` bounds every wait, and `dynamic_pages` tells whether the
+    catalog fills its pages in with scripts after they have loaded. Such catalogs set
+    `no_results` to the element they show for a search without results, which
+    wait_for_results waits for as well. A scraper that cannot find an element it needs
+    returns not_found(), which tells a search without results apart from a page that did not
+    load in time.
+
+    Scrapers read the metadata of a record from the text of its MARC view with
+    parse_librarian_view, and record the call numbers they find under `source_name`.
+    Scrapers of Blacklight catalogs also set `blacklight` to a BlacklightFetcher. Their
+    records are then read over plain HTTP, and a browser is only borrowed when that fails.
+    """
+    # Seconds to wait for a page or an element before giving up
+    page_timeout = 10
+    # Whether elements may still appear after the page has loaded
+    dynamic_pages = False
+    # (by, value) locator of the element a dynamic catalog shows for a search without results
+    no_results = None
+    # BlacklightFetcher reading the catalog without a browser, if it is a Blacklight catalog
+    blacklight = None
+    # LCCN_Source of the call numbers found in the catalog
+    source_name = None
+
+    @property
+    def _state(self):
+        # Created lazily since the scrapers do not call BaseScraping.__init__
+        return self.__dict__.setdefault('_thread_state', threading.local())
+
+    @property
+    def driver(self):
+        return getattr(self._state, 'driver', None)
+
+    @driver.setter
+    def driver(self, driver):
+        self._state.driver = driver
+
+    @property
+    def catalog_data(self):
+        return getattr(self._state, 'catalog_data', None)
+
+    @catalog_data.setter
+    def catalog_data(self, catalog_data):
+        self._state.catalog_data = catalog_data
+
     def fetch_metadata(self, identifier, input_type):
+        try:
+            return self.lookup(identifier, input_type)
+        except ScrapingFailedError:
+            return self.send_dictionary()
+
+    def lookup(self, identifier, input_type):
+        """
+        Like fetch_metadata, but raises ScrapingFailedError when the lookup failed, so that its
+        empty result is not mistaken for the catalog having no record: BrowserFailedError when
+        the browser broke down, PageTimeoutError when a page did not show what the scraper
+        needed in time, and ScrapingFailedError itself when the scraper failed unexpectedly.
+        """
+        if not self.is_online():
+            # Nothing can be found offline, so do not hold a browser for it
+            logging.info(f"{type(self).__name__}: no internet connection, skipping {identifier}.")
+            self.catalog_data = {"ISBN": [], "OCN": "", "LCCN": [], "LCCN_Source": []}
+            return self.send_dictionary()
+
+        if self.blacklight is not None:
+            try:
+                return self.fetch_over_http(identifier, input_type)
+            except BlacklightFetchError as e:
+                logging.info(f"{type(self).__name__}: {e}. Falling back to the browser.")
+
+        driver = self.driver = WebDriverManager.checkout()
+        self._state.wait_timeout = None
+        healthy = True
+        try:
+            result = self.scrape_metadata(identifier, input_type)
+            # The scrapers replace a broken browser and return what they had found so far
+            replaced = self.driver is not driver
+        except WebDriverException:
+            healthy = False
+            raise
+        except ScrapingFailedError:
+            raise
+        except Exception as e:
+            raise ScrapingFailedError(f"{type(self).__name__}: looking up {identifier} failed: {e}") from e
+        finally:
+            WebDriverManager.checkin(self.driver, healthy)
+            self.driver = None
+        if replaced:
+            raise BrowserFailedError(f"{type(self).__name__}: the browser failed while looking up {identifier}.")
+        return result
+
+    def scrape_metadata(self, identifier, input_type):
         raise NotImplementedError
-    
-    def is_online(self, url='http://www.google.com/', timeout=5):
-        """Check if the internet connection is available."""
-        try:
-            requests.get(url, timeout=timeout)
-            return True
-        except (requests.ConnectionError, requests.Timeout):
-            return False
\ No newline at end of file
+
+    def fetch_over_http(self, identifier, input_type):
+        """
+        Look an identifier up in a Blacklight catalog without a browser.
+        Raises:
+            BlacklightFetchError: If the catalog could not be read, in which case the browser should be used.
+        """
+        self.catalog_data = {"ISBN": [], "OCN": "", "LCCN": [], "LCCN_Source": []}
+        identifier = identifier.strip("\n")
+        input_type = input_type.upper()
+
+        if input_type == "ISBN":
+            self.catalog_data["ISBN"].append(identifier)
+        elif input_type == "OCN":
+            self.catalog_data["OCN"] = identifier
+        else:
+            return self.send_dictionary()
+
+        record_id = self.blacklight.find_record_id(identifier)
+        if record_id is not None:
+            self.parse_librarian_view(self.blacklight.fetch_view(record_id), input_type)
+        return self.send_dictionary()
+
+    def parse_librarian_view(self, body_text, input_type):
+        """
+        Add the metadata shown in the text of a record's MARC view to catalog_data: the OCN
+        when looking up an ISBN, the ISBNs when looking up an OCN, and the LC call numbers.
+        """
+        with MetricsRegistry.get_registry().timer('harvester_stage_seconds', stage='parse'):
+            record = parse_marc_text(body_text, METADATA_TAGS)
+        if input_type == "ISBN":
+            self.catalog_data["OCN"] = record.oclc_number()
+        elif input_type == "OCN":
+            self.catalog_data["ISBN"].extend(record.isbns())
+        for lccn in record.call_numbers():
+            self.catalog_data["LCCN"].append(lccn)
+            self.catalog_data["LCCN_Source"].append(self.source_name)
+
+    def wait_for_element(self, by, value, visible=False, no_results=None):
+        """
+        Wait for an element of the current page, up to the catalog's page_timeout. Returns the element or None.
+
+        A wait that gives up is remembered, so that not_found() reports the element as not
+        having loaded rather than missing.
+        """
+        try:
+            return pageWait.wait_for_element(self.driver, by, value, self.page_timeout, visible=visible,
+                                             dynamic=self.dynamic_pages, catalog=type(self).__name__, raise_on_timeout=True,
+                                             no_results=no_results)
+        except TimeoutException as e:
+            self._state.wait_timeout = e
+            return None
+
+    def wait_for_results(self, by, value):
+        """Wait for the first result of a search, or for the catalog's `no_results` element. Returns the result or None."""
+        return self.wait_for_element(by, value, no_results=self.no_results)
+
+    def click_and_wait(self, element):
+        """
+        Click a link and wait until the browser has navigated to the new page and loaded it.
+        Raises:
+            PageTimeoutError: If the browser did not navigate or load the page within the catalog's page_timeout.
+        """
+        previous_url = self.driver.current_url
+        element.click()
+        try:
+            pageWait.wait_for_url_change(self.driver, previous_url, self.page_timeout, catalog=type(self).__name__,
+                                         raise_on_timeout=True)
+            pageWait.wait_for_document_ready(self.driver, self.page_timeout, catalog=type(self).__name__,
+                                             raise_on_timeout=True)
+        except TimeoutException as e:
+            raise PageTimeoutError(f"{type(self).__name__}: {e.msg}") from e
+
+    def not_found(self):
+        """
+        Return the answer of a lookup that did not find an element it needs, e.g. because the search had no results.
+        Raises:
+            PageTimeoutError: If a wait of the lookup gave up, so the element may just not have loaded in time.
+        """
+        wait_timeout = getattr(self._state, 'wait_timeout', None)
+        if wait_timeout is not None:
+            raise PageTimeoutError(f"{type(self).__name__}: {wait_timeout.msg}") from wait_timeout
+        return self.send_dictionary()
+
+    def restart_driver(self, attempts=3):
+        """Swap the borrowed driver for a new browser after a WebDriverException, retrying a few times."""
+        for attempt in range(attempts):
+            try:
+                logging.info(f"Retrying Driver restart, attempt {attempt+1}")
+                self.driver = WebDriverManager.replace(self.driver)
+                return True
+            except RuntimeError as retry_exception:
+                self.driver = None
+                logging.error(f"Retry attempt {attempt+1} failed: {retry_exception}")
+                time.sleep(5)  # Wait for 5 seconds before retrying
+        logging.error("All retry attempts failed. Moving on to the next task.")
+        return False
+
+    def is_online(self):
+        """Check if the internet connection is available, from the cached state of the ConnectivityMonitor."""
+        return ConnectivityMonitor.get_monitor().is_online()
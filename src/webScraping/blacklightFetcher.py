@@ -0,0 +1,178 @@
+import logging
+import re
+from html.parser import HTMLParser
+
+import requests
+
+from util.connectivityMonitor import ConnectivityMonitor
+from util.httpSessions import HttpSessionRegistry
+
+# Elements that Chrome renders on a line of their own
+_BLOCK_TAGS = {'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'fieldset', 'figure',
+               'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p',
+               'pre', 'section', 'table', 'tbody', 'tfoot', 'thead', 'tr', 'ul'}
+# Table cells, which stay on the line of their row, separated by a space
+_CELL_TAGS = {'td', 'th'}
+# Elements whose content is not part of the page text
+_HIDDEN_TAGS = {'head', 'noscript', 'script', 'style', 'template', 'title'}
+
+_DOCUMENT_ID = re.compile(r'data-document-id="([^"]+)"')
+_WHITESPACE = re.compile(r'[ \t\r\n\f\v]+')
+
+
+class BlacklightFetchError(Exception):
+    """Raised when a Blacklight catalog could not be read over HTTP, so the lookup needs a browser."""
+
+
+class BlacklightFetcher:
+    """
+    Reads the MARC view of records from a Blacklight catalog with plain HTTP requests.
+
+    Blacklight renders its pages on the server, so the record a search finds and its
+    librarian view can be fetched directly instead of being loaded in a browser. The record ID
+    is taken from the JSON search API of the catalog, or from the search results page when the
+    catalog does not offer JSON. The MARC view is converted to the text a browser shows for it,
+    so the scrapers parse the same text either way.
+
+    A search without results is an answer; anything else that goes wrong raises
+    BlacklightFetchError so the scraper can fall back to the browser.
+    """
+
+    def __init__(self, base_url, search_params=None, record_path='catalog', view='librarian_view', timeout=10):
+        """
+        Args:
+            base_url (str): Root of the catalog, e.g. 'https://catalog.library.cornell.edu'.
+            search_params (dict): Query parameters added to every search, next to the identifier in 'q'.
+            record_path (str): Path under which the catalog serves its records.
+            view (str): Path of the MARC view below a record.
+            timeout (float): Seconds to wait for each request.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.search_params = dict(search_params or {})
+        self.record_path = record_path
+        self.view = view
+        self.timeout = timeout
+
+    def find_record_id(self, identifier):
+        """
+        Search the catalog for an identifier.
+
+        Returns:
+            str: The ID of the first record found, or None if the search has no results.
+        Raises:
+            BlacklightFetchError: If neither the JSON API nor the results page could be read.
+        """
+        params = dict(self.search_params, q=identifier)
+        try:
+            return self._find_in_json(self._get(f'{self.base_url}/catalog.json', params).json())
+        except (BlacklightFetchError, ValueError) as e:
+            if isinstance(e.__cause__, (requests.ConnectionError, requests.Timeout)):
+                raise
+            logging.debug(f"{self.base_url}: JSON search failed ({e}), reading the results page instead")
+        return self._find_in_html(self._get(f'{self.base_url}/catalog', params).text)
+
+    def fetch_view(self, record_id):
+        """Return the text of the MARC view of a record, as a browser would show it."""
+        return html_to_text(self._get(f'{self.base_url}/{self.record_path}/{record_id}/{self.view}').text)
+
+    def _get(self, url, params=None):
+        try:
+            response = HttpSessionRegistry.get(url, params=params, timeout=(HttpSessionRegistry.connect_timeout, self.timeout))
+        except requests.ConnectionError as e:
+            ConnectivityMonitor.get_monitor().report_failure()
+            raise BlacklightFetchError(f"Request to {url} failed: {e}") from e
+        except requests.RequestException as e:
+            raise BlacklightFetchError(f"Request to {url} failed: {e}") from e
+        ConnectivityMonitor.get_monitor().report_success()
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            raise BlacklightFetchError(f"Request to {url} failed: {e}") from e
+        if 'charset' not in response.headers.get('Content-Type', ''):
+            # Blacklight serves UTF-8, while requests assumes Latin-1 for HTML without a charset
+            response.encoding = 'utf-8'
+        return response
+
+    def _find_in_json(self, results):
+        if not isinstance(results, dict):
+            raise BlacklightFetchError(f"{self.base_url}: unexpected search response")
+        # JSON:API responses of Blacklight 7+
+        if isinstance(results.get('data'), list):
+            documents = results['data']
+        # Solr style responses of older versions
+        elif isinstance(results.get('response', {}).get('docs'), list):
+            documents = results['response']['docs']
+        else:
+            raise BlacklightFetchError(f"{self.base_url}: unexpected search response")
+        if not documents:
+            return None
+        record_id = documents[0].get('id')
+        if not record_id:
+            raise BlacklightFetchError(f"{self.base_url}: search result without an ID")
+        return str(record_id)
+
+    def _find_in_html(self, page):
+        match = _DOCUMENT_ID.search(page)
+        if match:
+            return match.group(1)
+        # Results pages always list their documents with an ID, so only trust an empty page from Blacklight
+        if 'blacklight-catalog' in page:
+            return None
+        raise BlacklightFetchError(f"{self.base_url}: no search results found in the page")
+
+
+def html_to_text(html):
+    """
+    Convert an HTML page to its visible text like Selenium's element.text: one line per block
+    element and per table row, with the cells of a row separated by a space.
+
+    Runs of whitespace are collapsed to one space. Non-breaking spaces are not collapsed but
+    become plain spaces, as in element.text, since the MARC views use them to show blank
+    indicators.
+    """
+    converter = _TextConverter()
+    converter.feed(html)
+    converter.close()
+    return converter.text()
+
+
+class _TextConverter(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._lines = []
+        self._line = []
+        self._hidden = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _HIDDEN_TAGS:
+            self._hidden += 1
+        elif tag in _BLOCK_TAGS:
+            self._break_line()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self._break_line()
+
+    def handle_endtag(self, tag):
+        if tag in _HIDDEN_TAGS:
+            self._hidden = max(0, self._hidden - 1)
+        elif tag in _BLOCK_TAGS:
+            self._break_line()
+        elif tag in _CELL_TAGS and self._line:
+            # Collapsed with any whitespace around it, and stripped at the end of the row
+            self._line.append(' ')
+
+    def handle_data(self, data):
+        if not self._hidden:
+            self._line.append(data)
+
+    def text(self):
+        self._break_line()
+        return "\n".join(self._lines)
+
+    def _break_line(self):
+        line = _WHITESPACE.sub(' ', ''.join(self._line)).strip(' ').replace('\xa0', ' ')
+        if line:
+            self._lines.append(line)
+        self._line = []
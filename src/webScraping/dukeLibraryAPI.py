@@ -1,9 +1,8 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException
-import time
 from selenium.common.exceptions import WebDriverException
-from webScraping.baseScraping import BaseScraping
+from webScraping.baseScraping import BaseScraping, ScrapingFailedError
 import util.dictionaryValidationMethod as vd
 from selenium.webdriver.chrome.service import Service as ChromeService
 from webScraping.webDriverManager import WebDriverManager
@@ -13,7 +12,7 @@ class DukeLibraryAPI(BaseScraping):
 
     def __init__(self):
         try:
-            self.driver = WebDriverManager.get_driver()
+            WebDriverManager.warm_up()
         except RuntimeError as e:
             logging.error("Failed to initialize DukeLibraryAPI due to WebDriver issue.")
             logging.info(e)
@@ -25,7 +24,7 @@ class DukeLibraryAPI(BaseScraping):
         self.catalog_data = vd.optimize_dictionary(self.catalog_data)
         return {k.lower(): v for k, v in self.catalog_data.items()}
 
-    def fetch_metadata(self, identifier, input_type):
+    def scrape_metadata(self, identifier, input_type):
 
         try:
 
@@ -46,15 +45,13 @@ class DukeLibraryAPI(BaseScraping):
 
                 self.driver.get(f"https://find.library.duke.edu/?utf8=%E2%9C%93&search_field=isbn_issn&q={identifier}")
 
-                time.sleep(5)
+                self.wait_for_element(By.CLASS_NAME, "index_title")
 
                 try:
                     title = self.driver.find_element(By.CLASS_NAME, "index_title")
                     title_text = title.text[title.text.index(" ") + 1:]
                     link_to_title = self.driver.find_element(By.LINK_TEXT, title_text)
-                    link_to_title.click()
-
-                    time.sleep(5)
+                    self.click_and_wait(link_to_title)
 
                     try:
                         lccn = self.driver.find_element(By.CLASS_NAME, "call-number").text
@@ -75,7 +72,7 @@ class DukeLibraryAPI(BaseScraping):
                     return self.send_dictionary()
 
                 except NoSuchElementException:
-                    return self.send_dictionary()
+                    return self.not_found()
 
                 except ValueError:
                     return self.send_dictionary()
@@ -87,15 +84,13 @@ class DukeLibraryAPI(BaseScraping):
                 self.driver.get(
                     f"https://find.library.duke.edu/?utf8=%E2%9C%93&f%5Bresource_type_f%5D%5B%5D=Book&search_field=all_fields&q={identifier}")
 
-                time.sleep(5)
+                self.wait_for_element(By.CLASS_NAME, "index_title")
 
                 try:
                     title = self.driver.find_element(By.CLASS_NAME, "index_title")
                     title_text = title.text[title.text.index(" ") + 1:]
                     link_to_title = self.driver.find_element(By.LINK_TEXT, title_text)
-                    link_to_title.click()
-
-                    time.sleep(5)
+                    self.click_and_wait(link_to_title)
 
                     try:
                         lccn = self.driver.find_element(By.CLASS_NAME, "call-number").text
@@ -123,7 +118,7 @@ class DukeLibraryAPI(BaseScraping):
                     return self.send_dictionary()
 
                 except NoSuchElementException:
-                    return self.send_dictionary()
+                    return self.not_found()
 
                 except ValueError:
                     return self.send_dictionary()
@@ -131,18 +126,13 @@ class DukeLibraryAPI(BaseScraping):
         except WebDriverException as e:
             logging.error(f"Encountered a WebDriverException: {e}")
 
-            #Retry logic with reinitialization
-            for attempt in range(3):  # Retry up to 3 times
-                try:
-                    logging.info(f"Retrying Driver restart, attempt {attempt+1}")
-                    self.driver.restart_driver()  
-                    return self.send_dictionary() 
-                except WebDriverException as retry_exception:
-                    logging.error(f"Retry attempt {attempt+1} failed: {retry_exception}")
-                    time.sleep(5)  # Wait for 5 seconds before retrying
-            logging.error("All retry attempts failed. Moving on to the next task.")
-            return self.send_dictionary() 
+            # Replace the broken browser so that the next lookup gets a working one
+            self.restart_driver()
+            return self.send_dictionary()
         
+        except ScrapingFailedError:
+            raise
+
         except Exception as e:
-            logging.error(f"Encountered an unexpected exception: {e}") 
-            return self.send_dictionary()
\ No newline at end of file
+            logging.error(f"Encountered an unexpected exception: {e}")
+            raise
\ No newline at end of file
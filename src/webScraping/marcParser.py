@@ -0,0 +1,174 @@
+import functools
+import re
+
+# How the catalogs mark subfields in their MARC views, e.g. '‡a', '|a', 'a|' or '$a', as the
+# pattern of a marker and the pattern of a subfield (its code and value) in a field
+_SUBFIELD_STYLES = {
+    'dagger': (r'‡[a-z0-9]', r'‡([a-z0-9]) ?([^‡]*)'),
+    'pipe': (r'\|[a-z0-9]', r'\|([a-z0-9]) ?([^|]*)'),
+    'pipe_after': (r'[a-z0-9]\|', r'(?<!\S)([a-z0-9])\| ?((?:(?!\s[a-z0-9]\|).)*)'),
+    'dollar': (r'\$\$?[a-z0-9]', r'\$\$?([a-z0-9])([^$]*)'),
+}
+# Tag and indicators of a field: up to two digits or '#', blanks being shown as spaces, and
+# each of them possibly on a line of its own
+_TAG_AND_INDICATORS = r'\n(?:{tags})((?:\s*[#\d]){{0,2}})\s*'
+
+# The style of a page, found from the first data field of the record
+_STYLE = re.compile(_TAG_AND_INDICATORS.format(tags=r'\d{3}') +
+                    '(?:' + '|'.join(f'(?P<{style}>{marker})' for style, (marker, _) in _SUBFIELD_STYLES.items()) + ')')
+_SUBFIELDS = {style: re.compile(subfield) for style, (_, subfield) in _SUBFIELD_STYLES.items()}
+
+# Tags of the fields read by the metadata methods of MarcRecord
+METADATA_TAGS = ('020', '035', '050', '776')
+
+
+class MarcField:
+    """
+    A data field of a MARC record.
+
+    `indicators` is a string of two characters, with a space for a blank indicator, and
+    `subfields` a list of (code, value) tuples in the order of the record. The subfields are
+    split up when they are first asked for.
+    """
+    __slots__ = ('tag', '_indicators', '_text', '_style', '_subfields')
+
+    def __init__(self, tag, indicators, text, style):
+        self.tag = tag
+        self._indicators = indicators
+        self._text = text
+        self._style = style
+        self._subfields = None
+
+    @property
+    def indicators(self):
+        return _indicators(self._indicators)
+
+    @property
+    def subfields(self):
+        if self._subfields is None:
+            self._subfields = [(code, value.strip()) for code, value in _SUBFIELDS[self._style].findall(self._text)]
+        return self._subfields
+
+    def values(self, code):
+        """Return the values of every subfield with the given code."""
+        return [value for subfield_code, value in self.subfields if subfield_code == code]
+
+    def first(self, code):
+        """Return the value of the first subfield with the given code, or None."""
+        for subfield_code, value in self.subfields:
+            if subfield_code == code:
+                return value
+        return None
+
+    def __repr__(self):
+        return f"MarcField({self.tag!r}, {self.indicators!r}, {self.subfields!r})"
+
+
+class MarcRecord:
+    """
+    The data fields of a MARC record read from the text of a catalog's MARC view, with the
+    metadata the scrapers look for.
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def get_fields(self, *tags):
+        """Return the fields with any of the given tags, in the order of the record."""
+        return [field for field in self.fields if field.tag in tags]
+
+    def oclc_number(self):
+        """Return the OCLC number of the record from its 035 fields, or '' if it has none."""
+        for field in self.get_fields('035'):
+            for _, value in field.subfields:
+                if value.startswith('(OCoLC'):
+                    number = value[value.find(')') + 1:].split()
+                    if number:
+                        return number[0]
+        return ''
+
+    def isbns(self):
+        """Return the valid and cancelled ISBNs of the record (020) and its other editions (776)."""
+        values = []
+        for field in self.get_fields('020'):
+            values += field.values('a') + field.values('z')
+        for field in self.get_fields('776'):
+            values += field.values('z')
+        return [value.split()[0].replace('-', '') for value in values if value.split()]
+
+    def call_numbers(self):
+        """Return the LC call numbers of the record (050), its classification and item numbers joined."""
+        call_numbers = []
+        for field in self.get_fields('050'):
+            classification = field.first('a')
+            if classification:
+                call_numbers.append(classification + (field.first('b') or ''))
+        return call_numbers
+
+
+def parse_marc_text(text, tags=None):
+    """
+    Read the data fields of a MARC record from the text of a catalog's MARC view.
+
+    The text is read in one pass of a precompiled pattern. Every field starts a line with its
+    tag and indicators, in any of the forms the catalogs use ('050 0 0 ‡a', '050    4 |a',
+    '050 #4$a', '050 14 a|' ...), and its subfields run to the end of the line. Control
+    fields and the text around the record are skipped.
+
+    When only some tags are asked for, the other fields are skipped and, since a record keeps
+    its fields in the order of their tags, reading stops at the first field after them. The
+    notes, subjects and holdings that make up most of a large record are then not read at all.
+
+    Args:
+        text (str): The text of the page, with its line breaks.
+        tags (iterable): The tags of the fields to read, or None to read every field.
+    Returns:
+        MarcRecord: The fields found, none if the page does not show a MARC record.
+    """
+    text = '\n' + text
+    match = _STYLE.search(text)
+    if match is None:
+        return MarcRecord([])
+    style = match.lastgroup
+
+    if tags is None:
+        fields = _field_pattern(style, None).findall(text, match.start())
+    else:
+        fields = []
+        for field in _field_pattern(style, tuple(sorted(tags))).finditer(text, match.start()):
+            if field.group(1) is None:
+                break
+            fields.append(field.group(1, 3, 4))
+    return MarcRecord([MarcField(tag, indicators, subfields, style) for tag, indicators, subfields in fields])
+
+
+@functools.lru_cache(maxsize=None)
+def _field_pattern(style, tags):
+    marker = _SUBFIELD_STYLES[style][0]
+    if tags is None:
+        tag_pattern = r'(\d{3})'
+    else:
+        # The requested tags, or any tag after the last of them
+        tag_pattern = '(' + '|'.join(re.escape(tag) for tag in tags) + f')|({_tags_after(tags[-1])})'
+    return re.compile(_TAG_AND_INDICATORS.format(tags=tag_pattern) + f'((?={marker})[^\\n]*)')
+
+
+def _tags_after(tag):
+    # Pattern of the three digit tags greater than `tag`, e.g. '[89]\d\d|7[89]\d|77[7-9]' for '776'
+    alternatives = []
+    for position, digit in enumerate(tag):
+        if digit != '9':
+            alternatives.append(re.escape(tag[:position]) + f'[{int(digit) + 1}-9]' + r'\d' * (2 - position))
+    return '|'.join(alternatives) or '(?!)'
+
+
+def _indicators(section):
+    values = section.split()
+    if len(values) == 1 and len(values[0]) == 2:
+        values = list(values[0])
+    elif len(values) == 1:
+        # A single indicator is the second one when the first is shown as a blank
+        leading = len(section) - len(section.lstrip())
+        values = [' ', values[0]] if leading > 2 else [values[0], ' ']
+    values = (values + [' ', ' '])[:2]
+    return ''.join(' ' if value == '#' else value for value in values)
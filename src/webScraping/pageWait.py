@@ -0,0 +1,102 @@
+import logging
+import threading
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Returned by a wait condition to stop waiting for an element that cannot appear any more
+_ABSENT = object()
+
+_statistics_lock = threading.Lock()
+_statistics = {}
+
+
+def wait_for_element(driver, by, value, timeout, visible=False, dynamic=False, catalog=None, raise_on_timeout=False,
+                     no_results=None):
+    """
+    Wait until an element is present, or displayed if `visible` is set.
+
+    Pages rendered by the server are complete once loaded, so unless the catalog fills its
+    pages in with scripts (`dynamic`), an element missing from a loaded page is not waited
+    for any longer and the caller's own lookup reports it as missing. On pages filled in with
+    scripts, `no_results` gives the (by, value) locator of the element shown instead when the
+    element will not appear, such as the message of a search without results.
+
+    Returns:
+        The first matching element, or None if it did not appear.
+    Raises:
+        TimeoutException: If the wait gave up and `raise_on_timeout` is set, rather than
+            returning None as for an element missing from a loaded page.
+    """
+    def condition(d):
+        elements = d.find_elements(by, value)
+        try:
+            if elements and (not visible or elements[0].is_displayed()):
+                return elements[0]
+        except StaleElementReferenceException:
+            return False
+        if not dynamic and not visible and _document_ready(d):
+            return _ABSENT
+        if no_results and d.find_elements(*no_results):
+            return _ABSENT
+        return False
+
+    element = _wait(driver, condition, timeout, catalog, "element", f"element {value}", raise_on_timeout)
+    return None if element is _ABSENT else element
+
+
+def wait_for_url_change(driver, previous_url, timeout, catalog=None, raise_on_timeout=False):
+    """Wait until the browser has navigated away from `previous_url`. Returns True if it did."""
+    return bool(_wait(driver, lambda d: d.current_url != previous_url, timeout, catalog, "navigation", "navigation",
+                      raise_on_timeout))
+
+
+def wait_for_document_ready(driver, timeout, catalog=None, raise_on_timeout=False):
+    """Wait until the current document has finished loading. Returns True if it did."""
+    return bool(_wait(driver, _document_ready, timeout, catalog, "document_ready", "the document to load",
+                      raise_on_timeout))
+
+
+def wait_statistics():
+    """
+    Return how long the waits of each catalog took.
+
+    Returns:
+        dict: Catalog name mapped to each kind of wait, mapped to its count, number of timeouts,
+            and total and longest duration in seconds.
+    """
+    with _statistics_lock:
+        return {catalog: {kind: dict(stats) for kind, stats in kinds.items()} for catalog, kinds in _statistics.items()}
+
+
+def _document_ready(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def _wait(driver, condition, timeout, catalog, kind, description, raise_on_timeout=False):
+    start = time.monotonic()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=0.1).until(condition)
+        timed_out = False
+    except TimeoutException:
+        result = None
+        timed_out = True
+    elapsed = time.monotonic() - start
+    _record(catalog, kind, elapsed, timed_out)
+    if timed_out:
+        logging.info(f"{catalog}: gave up waiting for {description} after {elapsed:.2f}s")
+        if raise_on_timeout:
+            raise TimeoutException(f"gave up waiting for {description} after {elapsed:.2f}s")
+    else:
+        logging.debug(f"{catalog}: waited {elapsed:.2f}s for {description}")
+    return result
+
+
+def _record(catalog, kind, elapsed, timed_out):
+    with _statistics_lock:
+        stats = _statistics.setdefault(catalog, {}).setdefault(kind, {'count': 0, 'timeouts': 0, 'total': 0.0, 'max': 0.0})
+        stats['count'] += 1
+        stats['timeouts'] += timed_out
+        stats['total'] += elapsed
+        stats['max'] = max(stats['max'], elapsed)
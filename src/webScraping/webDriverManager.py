@@ -1,19 +1,156 @@
 from selenium import webdriver
 from selenium.common.exceptions import WebDriverException
 import logging
+import threading
+import time
 
 class WebDriverManager:
-    _instance = None
+    """
+    Pool of headless Chrome instances shared by the scrapers.
+
+    A scraper checks a driver out for each lookup and checks it back in afterwards, so up to
+    `pool_size` lookups can drive a browser at the same time; further lookups wait for a driver
+    to be returned. Browsers are started on demand. The pool tracks the health of every driver:
+    a driver returned as unhealthy is probed before its next use, and discarded once it fails
+    the probe or `max_failures` lookups in a row, so a crashed browser is replaced instead of
+    failing every lookup that follows.
+
+    Browsers give up on a page that takes longer than `page_load_timeout` seconds to load, so
+    that a stalled catalog cannot hold a browser indefinitely.
+    """
+    pool_size = 2
+    max_failures = 3
+    page_load_timeout = 30.0
+
+    _condition = threading.Condition()
+    _idle = []
+    # Health of every live driver, keyed by id(driver)
+    _health = {}
+    _starting = 0
+
+    @classmethod
+    def configure(cls, pool_size, page_load_timeout=None):
+        """Set the maximum number of browsers running at the same time, and the seconds a page may take to load."""
+        with cls._condition:
+            cls.pool_size = max(1, pool_size)
+            if page_load_timeout is not None and page_load_timeout != cls.page_load_timeout:
+                cls.page_load_timeout = page_load_timeout
+                for driver in cls._idle:
+                    try:
+                        driver.set_page_load_timeout(page_load_timeout)
+                    except WebDriverException:
+                        pass  # A broken browser is replaced once a lookup fails with it
+            cls._condition.notify_all()
+
+    @classmethod
+    def warm_up(cls):
+        """Start the first browser of the pool, so that a missing Chrome is reported before any lookup."""
+        driver = cls.checkout()
+        cls.checkin(driver)
+
+    @classmethod
+    def checkout(cls, timeout=None):
+        """
+        Borrow a driver, starting a new browser if none is idle and the pool is not full.
+        Args:
+            timeout: Seconds to wait for a driver when every browser is busy, or None to wait indefinitely.
+        Returns:
+            A WebDriver that the caller must hand back with checkin().
+        Raises:
+            RuntimeError: If Chrome cannot be started or no driver became free in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with cls._condition:
+            while True:
+                while cls._idle:
+                    driver = cls._idle.pop()
+                    if cls._is_usable(driver):
+                        cls._health[id(driver)]['uses'] += 1
+                        return driver
+                    cls._discard(driver)
+                if len(cls._health) + cls._starting < cls.pool_size:
+                    cls._starting += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise RuntimeError("Timed out waiting for a free browser.")
+                cls._condition.wait(remaining)
+
+        # Start the browser outside the lock, it takes a while
+        try:
+            driver = cls._initialize_driver()
+        except Exception as e:
+            with cls._condition:
+                cls._starting -= 1
+                cls._condition.notify()
+            logging.error("Could not initialize WebDriver. Is Google Chrome installed?")
+            raise RuntimeError("Google Chrome must be installed to use this application.") from e
+        with cls._condition:
+            cls._starting -= 1
+            cls._health[id(driver)] = {'uses': 1, 'failures': 0, 'started': time.time()}
+        return driver
+
+    @classmethod
+    def checkin(cls, driver, healthy=True):
+        """
+        Return a borrowed driver to the pool.
+        Args:
+            driver: The driver obtained from checkout().
+            healthy: False if the lookup ran into a browser error, which gets the driver probed or discarded.
+        """
+        if driver is None:
+            return
+        with cls._condition:
+            health = cls._health.get(id(driver))
+            if health is None:
+                return
+            health['failures'] = 0 if healthy else health['failures'] + 1
+            if health['failures'] >= cls.max_failures or len(cls._health) > cls.pool_size:
+                cls._discard(driver)
+            else:
+                cls._idle.append(driver)
+            cls._condition.notify()
 
     @classmethod
-    def get_driver(cls):
-        if cls._instance is None:
-            try:
-                cls._initialize_driver()
-            except Exception as e:
-                logging.error("Could not initialize WebDriver. Is Google Chrome installed?")
-                raise RuntimeError("Google Chrome must be installed to use this application.") from e
-        return cls._instance
+    def replace(cls, driver):
+        """Discard a broken driver and borrow a working one in its place."""
+        with cls._condition:
+            if id(driver) in cls._health:
+                cls._discard(driver)
+            cls._condition.notify()
+        return cls.checkout()
+
+    @classmethod
+    def health(cls):
+        """Return the uses, consecutive failures and start time of every live browser, and whether it is busy."""
+        with cls._condition:
+            idle = {id(driver) for driver in cls._idle}
+            return [dict(health, busy=key not in idle) for key, health in cls._health.items()]
+
+    @classmethod
+    def close_all(cls):
+        """Quit every idle browser, e.g. once a search has finished."""
+        with cls._condition:
+            while cls._idle:
+                cls._discard(cls._idle.pop())
+
+    @classmethod
+    def _is_usable(cls, driver):
+        if cls._health[id(driver)]['failures'] == 0:
+            return True
+        try:
+            driver.current_url  # Cheap round trip to the browser
+            return True
+        except WebDriverException:
+            return False
+
+    @classmethod
+    def _discard(cls, driver):
+        cls._health.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.error(f"Error closing a browser: {e}")
 
     @classmethod
     def _initialize_driver(cls):
@@ -25,17 +162,6 @@ class WebDriverManager:
         options.add_argument('--disable-gpu')
         options.add_experimental_option('excludeSwitches', ['enable-logging'])
         options.add_argument('--log-level=3')
-        cls._instance = webdriver.Chrome(options=options)
-
-    @classmethod
-    def close_driver(cls):
-        """Close the current WebDriver instance."""
-        if cls._instance:
-            cls._instance.quit()
-            cls._instance = None
-
-    @classmethod
-    def restart_driver(cls):
-        """Restart the WebDriver instance."""
-        cls.close_driver()
-        cls._initialize_driver()
\ No newline at end of file
+        driver = webdriver.Chrome(options=options)
+        driver.set_page_load_timeout(cls.page_load_timeout)
+        return driver
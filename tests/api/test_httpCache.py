@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.apis.httpCache import HttpCache
+from src.apis.httpClient import AsyncHttpClient
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.send_header('Cache-Control', self.server.cache_control)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps({'path': self.path}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', '"v1"')
+        self.send_header('Cache-Control', self.server.cache_control)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), JsonHandler)
+    server.requests = []
+    server.cache_control = 'max-age=60'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HttpCache(tmp_path / 'http_cache.sqlite')
+    AsyncHttpClient.use_cache(cache)
+    yield cache
+    AsyncHttpClient.use_cache(None)
+
+
+def get_json(url):
+    client = AsyncHttpClient.get_client()
+    return client.run(client.get_json(url))
+
+
+def test_fresh_responses_are_served_from_the_cache(server, cache):
+    url = f'http://127.0.0.1:{server.server_port}/isbn/9781449355739.json?b=2&a=1'
+    assert get_json(url) == {'path': '/isbn/9781449355739.json?b=2&a=1'}
+    # The same URL with its query in another order
+    assert get_json(f'http://127.0.0.1:{server.server_port}/isbn/9781449355739.json?a=1&b=2#x') == \
+        {'path': '/isbn/9781449355739.json?b=2&a=1'}
+
+    assert len(server.requests) == 1
+    assert cache.stats['hits'] == 1 and cache.stats['stored'] == 1
+
+
+def test_stale_responses_are_revalidated(server, cache):
+    server.cache_control = 'no-cache'
+    url = f'http://127.0.0.1:{server.server_port}/ocn/835310128'
+    assert get_json(url) == {'path': '/ocn/835310128'}
+    assert get_json(url) == {'path': '/ocn/835310128'}
+
+    assert len(server.requests) == 2
+    assert server.requests[1]['If-None-Match'] == '"v1"'
+    assert cache.stats['revalidated'] == 1
+
+
+def test_no_store(server, cache):
+    server.cache_control = 'no-store'
+    url = f'http://127.0.0.1:{server.server_port}/search'
+    get_json(url)
+    get_json(url)
+    assert len(server.requests) == 2
+    assert cache.stats['stored'] == 0
+
+
+@pytest.mark.parametrize("url, key", [
+    ('HTTPS://OpenLibrary.org:443/api/books?jscmd=data&bibkeys=ISBN:1', 'https://openlibrary.org/api/books?bibkeys=ISBN%3A1&jscmd=data'),
+    ('http://www.loc.gov:8080/search/?q=1&fo=json#top', 'http://www.loc.gov:8080/search/?fo=json&q=1'),
+])
+def test_normalize_url(url, key):
+    assert HttpCache.normalize_url(url) == key
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = HttpCache(tmp_path / 'http_cache.sqlite', max_size=250)
+    for name in ('a', 'b'):
+        cache.store(f'http://host/{name}', b'x' * 100, {})
+    time.sleep(0.01)
+    cache.get('http://host/a')
+    cache.store('http://host/c', b'x' * 100, {})
+
+    assert cache.get('http://host/b') is None
+    assert cache.get('http://host/a').fresh and cache.get('http://host/c').fresh
+    assert cache.stats['evicted'] == 1
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiohttp
+import pytest
+
+from src.apis.baseAPI import BaseAPI
+from src.apis.httpClient import AsyncHttpClient
+
+
+class RecordHandler(BaseHTTPRequestHandler):
+    """Answers /<ocn>.json with a record of that OCN, and anything else with 404."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        name = self.path.strip('/')
+        if name.endswith('.json') and name[:-5].isdigit():
+            status, body = 200, json.dumps({'ocn': name[:-5]}).encode()
+        else:
+            status, body = 404, b'{}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RecordHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+class LocalAPI(BaseAPI):
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.name = "Local"
+
+    def build_url(self, identifier, input_type):
+        return f"{self.base_url}/{identifier}.json"
+
+    def parse_response(self, response, identifier, input_type):
+        return {'ocn': response['ocn']}
+
+
+def test_get_json(base_url):
+    client = AsyncHttpClient.get_client()
+    assert client.run(client.get_json(f'{base_url}/835310128.json')) == {'ocn': '835310128'}
+
+
+def test_error_status_raises(base_url):
+    client = AsyncHttpClient.get_client()
+    with pytest.raises(aiohttp.ClientResponseError) as raised:
+        client.run(client.get_json(f'{base_url}/missing'))
+    assert raised.value.status == 404
+
+
+def test_sync_wrapper_turns_errors_into_no_answer(base_url):
+    api = LocalAPI(base_url)
+    assert api.fetch_metadata('835310128', 'ocn') == {'ocn': '835310128'}
+    assert api.fetch_metadata('not-an-ocn', 'ocn') is None
+    # lookup raises instead, so that the harvester can tell a failure from a missing record
+    with pytest.raises(aiohttp.ClientResponseError):
+        api.lookup('not-an-ocn', 'ocn')
+
+
+def test_call_from_another_event_loop(base_url):
+    client = AsyncHttpClient.get_client()
+
+    async def fetch_both():
+        assert asyncio.get_running_loop() is not client.loop
+        return await asyncio.gather(client.get_json(f'{base_url}/1.json'),
+                                    LocalAPI(base_url).fetch_metadata_async('2', 'ocn'))
+
+    # The requests are handed over to the client's own loop, which owns the session
+    assert asyncio.run(fetch_both()) == [{'ocn': '1'}, {'ocn': '2'}]
+
+
+def test_run_refuses_the_client_loop():
+    client = AsyncHttpClient.get_client()
+
+    async def nested():
+        coro = asyncio.sleep(0)
+        try:
+            client.run(coro)
+        finally:
+            coro.close()
+
+    with pytest.raises(RuntimeError):
+        client.run(nested())
@@ -0,0 +1,44 @@
+import pytest
+
+from src.apis.harvardLibraryAPI import HarvardLibraryAPI
+from src.apis.libraryOfCongressAPI import LibraryOfCongressAPI
+from src.apis.openLibraryAPI import OpenLibraryAPI
+
+ISBN = '9781449355739'
+OCN = '835310128'
+
+
+# What the sources answer for identifiers they have no record of
+@pytest.mark.parametrize('api_class, response', [
+    (OpenLibraryAPI, {}),
+    (OpenLibraryAPI, []),
+    (OpenLibraryAPI, {'records': {}}),
+    (LibraryOfCongressAPI, {}),
+    (LibraryOfCongressAPI, {'results': []}),
+    (HarvardLibraryAPI, {}),
+    (HarvardLibraryAPI, {'items': None}),
+    (HarvardLibraryAPI, {'items': {'mods': []}}),
+])
+@pytest.mark.parametrize('identifier, input_type', [(ISBN, 'isbn'), (OCN, 'ocn')])
+def test_no_record_is_no_answer(api_class, response, identifier, input_type):
+    assert api_class().parse_response(response, identifier, input_type) is None
+
+
+def test_open_library_record():
+    response = {'records': {'/books/OL26187012M': {'isbns': [ISBN], 'oclcs': [OCN], 'data': {}}}}
+    assert OpenLibraryAPI().parse_response(response, ISBN, 'isbn') == {
+        'isbn': [ISBN], 'ocn': OCN, 'lccn': [], 'lccn_source': []}
+
+
+def test_library_of_congress_record_of_another_ocn():
+    response = {'results': [{'number_oclc': ['12345'], 'item': {'call_number': ['QA76.73.P98 L88 2013']}}]}
+    result = LibraryOfCongressAPI().parse_response(response, OCN, 'ocn')
+    assert result['isbn'] == []
+
+
+def test_harvard_record_list():
+    record = {'identifier': [{'@type': 'isbn', '#text': ISBN}, {'@type': 'oclc', '#text': OCN}],
+              'classification': {'@authority': 'lcc', '#text': 'QA76.73.P98 L88 2013'}}
+    result = HarvardLibraryAPI().parse_response({'items': {'mods': [record]}}, OCN, 'ocn')
+    assert (result['isbn'], result['ocn']) == ([ISBN], OCN)
+    assert result['lccn_source'] == ['Harvard'] * len(result['lccn'])
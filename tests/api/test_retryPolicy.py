@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiohttp
+import pytest
+
+from src.apis.httpClient import AsyncHttpClient
+from src.apis.retryPolicy import RetryPolicy
+# The class the client imports, rather than a copy of it under src
+from util.rateScheduler import RateScheduler
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Answers with the statuses queued on the server, then with 200."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append(time.monotonic())
+        status, headers = self.server.failures.pop(0) if self.server.failures else (200, {})
+        body = json.dumps({'status': status}).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+    server.requests = []
+    server.failures = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def policy():
+    previous = AsyncHttpClient.retry_policy
+    AsyncHttpClient.use_retry_policy(RetryPolicy(retries=2, backoff=0.01, max_delay=2))
+    yield AsyncHttpClient.retry_policy
+    AsyncHttpClient.use_retry_policy(previous)
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    """A RateScheduler of its own, so that pauses of the local host do not hold up other tests."""
+    scheduler = RateScheduler()
+    monkeypatch.setattr(RateScheduler, '_instance', scheduler)
+    return scheduler
+
+
+def get_json(server, path):
+    client = AsyncHttpClient.get_client()
+    return client.run(client.get_json(f'http://127.0.0.1:{server.server_port}{path}'))
+
+
+def test_transient_errors_are_retried(server, policy):
+    server.failures = [(500, {}), (502, {})]
+    assert get_json(server, '/transient') == {'status': 200}
+    assert len(server.requests) == 3
+
+
+def test_retries_give_up(server, policy):
+    server.failures = [(500, {})] * 3
+    with pytest.raises(aiohttp.ClientResponseError):
+        get_json(server, '/down')
+    assert len(server.requests) == 3
+
+
+def test_other_errors_are_not_retried(server, policy):
+    server.failures = [(404, {})]
+    with pytest.raises(aiohttp.ClientResponseError):
+        get_json(server, '/missing')
+    assert len(server.requests) == 1
+
+
+def test_retry_after_is_honored(server, policy):
+    server.failures = [(429, {'Retry-After': '1'})]
+    assert get_json(server, '/throttled') == {'status': 200}
+    assert server.requests[1] - server.requests[0] >= 0.9
+
+
+def test_long_retry_after_fails_at_once(server, policy, scheduler):
+    server.failures = [(503, {'Retry-After': '3600'})]
+    with pytest.raises(aiohttp.ClientResponseError):
+        get_json(server, '/maintenance')
+    assert len(server.requests) == 1
+
+
+def test_long_retry_after_holds_back_the_host(server, policy, scheduler):
+    server.failures = [(429, {'Retry-After': '3600'})]
+    with pytest.raises(aiohttp.ClientResponseError):
+        get_json(server, '/throttled')
+    # The request gave up, but the host still gets the pause it asked for
+    assert scheduler.try_acquire('127.0.0.1') > 3500
+
+
+def test_errors_that_are_not_throttling_do_not_hold_back_the_host(server, policy, scheduler):
+    server.failures = [(500, {'Retry-After': '3600'})]
+    with pytest.raises(aiohttp.ClientResponseError):
+        get_json(server, '/down')
+    assert scheduler.try_acquire('127.0.0.1') == 0
+
+
+def test_backoff_grows_with_jitter():
+    policy = RetryPolicy(retries=5, backoff=1, max_delay=4)
+    error = aiohttp.ServerDisconnectedError()
+    for attempt, ceiling in enumerate([1, 2, 4, 4, 4]):
+        delays = [policy.delay(attempt, error) for _ in range(50)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert len(set(delays)) > 1
+    assert policy.delay(5, error) is None
+    assert policy.delay(0, ValueError()) is None
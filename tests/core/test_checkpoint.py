@@ -0,0 +1,144 @@
+import json
+
+import pytest
+
+from src.core import checkpoint as checkpoint_module
+from src.core import metadataHarvester
+from src.core.checkpoint import JobCheckpoint, hash_file
+from src.core.metadataHarvester import MetadataHarvester
+from src.db.databaseManager import DatabaseManager
+from src.util.settings import DEFAULT_SETTINGS
+
+OUTPUT_OPTIONS = {'isbn': True, 'ocn': False, 'lccn': True, 'lccn_source': False}
+IDENTIFIERS = [f'97800000000{number:02d}' for number in range(10)]
+
+
+def test_save_and_load(tmp_path):
+    checkpoint = JobCheckpoint.create(tmp_path, 'hash', input_path='in.txt', input_type='isbn',
+                                      output_path=str(tmp_path / 'out.tsv'), output_options=OUTPUT_OPTIONS)
+    for offset in (0, 1, 2, 5, 7):
+        checkpoint.mark_completed(offset, output_position=offset * 10)
+    checkpoint.save()
+
+    loaded = JobCheckpoint.load(tmp_path, checkpoint.job_id)
+    assert loaded.completed_below == 3 and loaded.completed == {5, 7}
+    assert loaded.completed_count == 5
+    assert [offset for offset in range(8) if loaded.is_completed(offset)] == [0, 1, 2, 5, 7]
+    assert (loaded.output_position, loaded.output_options) == (70, OUTPUT_OPTIONS)
+    assert list((tmp_path / 'jobs').iterdir()) == [checkpoint.path]
+
+
+def test_failed_save_keeps_the_previous_version(tmp_path, monkeypatch):
+    checkpoint = JobCheckpoint.create(tmp_path, 'hash')
+    checkpoint.mark_completed(0)
+    checkpoint.save()
+
+    def fail(source, destination):
+        raise OSError("Disk full")
+    monkeypatch.setattr(checkpoint_module.os, 'replace', fail)
+    checkpoint.mark_completed(1)
+    with pytest.raises(OSError):
+        checkpoint.save()
+
+    assert json.loads(checkpoint.path.read_text())['completed_below'] == 1
+
+
+def test_find_matches_the_input_and_the_output(tmp_path):
+    job = JobCheckpoint.create(tmp_path, 'hash', output_path='a.tsv')
+    other = JobCheckpoint.create(tmp_path, 'other', output_path='a.tsv')
+    JobCheckpoint.create(tmp_path, 'hash', output_path='b.tsv')
+
+    assert JobCheckpoint.find(tmp_path, 'hash', 'a.tsv').job_id == job.job_id
+    assert JobCheckpoint.find(tmp_path, 'other', 'a.tsv').job_id == other.job_id
+    assert JobCheckpoint.find(tmp_path, 'hash', 'c.tsv') is None
+    job.delete()
+    assert JobCheckpoint.find(tmp_path, 'hash', 'a.tsv') is None
+
+
+def test_new_job_keeps_existing_rows(tmp_path):
+    output = tmp_path / 'out.tsv'
+    output.write_text('ISBN\tLCCN\nrow\n')
+    checkpoint = JobCheckpoint.create(tmp_path, 'hash', output_path=str(output))
+
+    checkpoint.restore_output()
+    assert output.read_text() == 'ISBN\tLCCN\nrow\n'
+
+
+def test_restore_output_drops_rows_written_after_the_last_save(tmp_path):
+    output = tmp_path / 'out.tsv'
+    output.write_text('header\nrow 0\n')
+    checkpoint = JobCheckpoint.create(tmp_path, 'hash', output_path=str(output))
+    checkpoint.mark_completed(0)
+    with open(output, 'a') as file:
+        file.write('row 1\n')
+
+    checkpoint.restore_output()
+    assert output.read_text() == 'header\nrow 0\n'
+    assert checkpoint.completed_count == 1
+
+
+def test_restore_output_restarts_a_job_whose_output_shrank(tmp_path):
+    output = tmp_path / 'out.tsv'
+    output.write_text('header\nrow 0\n')
+    checkpoint = JobCheckpoint.create(tmp_path, 'hash', output_path=str(output))
+    checkpoint.mark_completed(0)
+    output.write_text('')
+
+    checkpoint.restore_output()
+    assert (checkpoint.completed_count, checkpoint.output_position) == (0, 0)
+
+
+class StoppingSource:
+    """A source that finds an LCCN for every identifier, and stops the search after a number of lookups."""
+
+    def __init__(self, stop_after=None):
+        self.harvester = None
+        self.stop_after = stop_after
+        self.identifiers = []
+
+    def lookup(self, identifier, input_type):
+        self.identifiers.append(identifier)
+        if len(self.identifiers) == self.stop_after:
+            self.harvester.stop()
+        return {'lccn': [f'Z{identifier[-2:]}'], 'lccn_source': ['Test']}
+
+
+def run_job(tmp_path, checkpoint, source):
+    db_manager = DatabaseManager()
+    db_manager.db_path = str(tmp_path / 'metadata.sqlite')
+    MetadataHarvester.initialize_database(db_manager)
+    settings = {**DEFAULT_SETTINGS, 'pause_when_offline': False, 'max_workers': 1, 'output_flush_rows': 1}
+    harvester = MetadataHarvester(db_manager, {'Test': source}, ['Test'], settings)
+    source.harvester = harvester
+    try:
+        return harvester.run(iter(IDENTIFIERS), 'isbn', OUTPUT_OPTIONS, checkpoint.output_path, checkpoint)
+    finally:
+        db_manager.close()
+
+
+def test_interrupted_job_resumes_where_it_stopped(tmp_path, monkeypatch):
+    monkeypatch.setattr(metadataHarvester.ConnectivityMonitor.get_monitor(), 'is_online', lambda: True)
+    input_file = tmp_path / 'in.txt'
+    input_file.write_text('\n'.join(IDENTIFIERS) + '\n')
+    output = tmp_path / 'out.tsv'
+    checkpoint = JobCheckpoint.create(tmp_path, hash_file(input_file), input_path=str(input_file), input_type='isbn',
+                                      output_path=str(output), output_options=OUTPUT_OPTIONS)
+
+    assert not run_job(tmp_path, checkpoint, StoppingSource(stop_after=3))
+    saved = JobCheckpoint.load(tmp_path, checkpoint.job_id)
+    # The identifier whose search was stopped is not written, so it is searched again
+    assert saved.completed_count == 2
+    assert saved.output_position == output.stat().st_size
+    # A row written after the last save, e.g. just before a crash, is dropped when the job resumes
+    with open(output, 'a') as file:
+        file.write('9780000000002\tpartial\n')
+
+    source = StoppingSource()
+    resumed = JobCheckpoint.find(tmp_path, hash_file(input_file), str(output))
+    assert run_job(tmp_path, resumed, source)
+
+    assert source.identifiers == IDENTIFIERS[2:]
+    expected = ['ISBN\tLCCN'] + [f'{identifier}\tZ{identifier[-2:]}' for identifier in IDENTIFIERS]
+    assert output.read_text().splitlines() == expected
+    # A finished job leaves no checkpoint behind
+    assert JobCheckpoint.load(tmp_path, checkpoint.job_id) is None
@@ -0,0 +1,351 @@
+import json
+import threading
+import time
+
+import pytest
+
+from src.core.metadataHarvester import MetadataHarvester
+from src.core import metadataHarvester
+from src.db.databaseManager import DatabaseManager
+from src.util.settings import DEFAULT_SETTINGS
+# The module the harvester imports, rather than a copy of it under src
+from webScraping.baseScraping import PageTimeoutError
+
+OUTPUT_OPTIONS = {'isbn': True, 'ocn': True, 'lccn': True, 'lccn_source': True}
+
+
+class RecordingSource:
+    """A source that answers every lookup with the same LCCN and remembers what it was asked for."""
+
+    def __init__(self):
+        self.identifiers = []
+
+    def lookup(self, identifier, input_type):
+        self.identifiers.append(identifier)
+        return {'ocn': '1', 'lccn': ['Z699'], 'lccn_source': ['Test']}
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    db_manager = DatabaseManager()
+    db_manager.db_path = str(tmp_path / 'metadata.sqlite')
+    MetadataHarvester.initialize_database(db_manager)
+    db_manager.insert_data('books', ('9781449355739', '853679890'))
+    db_manager.insert_data('books', ('9780596007126', ''))
+    db_manager.insert_data('lccn', (1, 'QA76.73.P98L88 2013', 'LOC'))
+    db_manager.insert_data('book_lccn', ('9781449355739', 1))
+    yield db_manager
+    db_manager.close()
+
+
+def make_harvester(db_manager, source=None, **settings):
+    settings = {**DEFAULT_SETTINGS, 'pause_when_offline': False, **settings}
+    return MetadataHarvester(db_manager, {'Test': source} if source else {}, ['Test'], settings)
+
+
+@pytest.mark.parametrize('input_type, identifiers', [
+    ('isbn', ['9781449355739', '9780596007126', '9780000000002']),
+    ('ocn', ['853679890', '12345']),
+])
+def test_resolve_batch_matches_single_lookups(db_manager, input_type, identifiers):
+    harvester = make_harvester(db_manager)
+    harvester.output_options = OUTPUT_OPTIONS
+
+    resolved = harvester.resolve_batch(list(enumerate(identifiers)), input_type)
+
+    for offset, identifier in enumerate(identifiers):
+        expected = harvester.get_existing_data(identifier, input_type.upper())
+        harvester.add_identifier(expected, identifier, input_type)
+        assert resolved[offset] == expected
+
+
+def test_run_only_searches_identifiers_missing_fields(db_manager, tmp_path):
+    source = RecordingSource()
+    harvester = make_harvester(db_manager, source, prefetch_batch_size=2)
+    output = tmp_path / 'out.tsv'
+
+    assert harvester.run(['9781449355739', '9780596007126', '9781449355739'], 'isbn', OUTPUT_OPTIONS, str(output))
+
+    assert source.identifiers == ['9780596007126']
+    # Rows are written as their searches finish, so those found in the database come first
+    rows = output.read_text().splitlines()[1:]
+    assert sorted(rows) == ['9780596007126\t1\tZ699\tTest',
+                            '9781449355739\t853679890\tQA76.73.P98L88 2013\tLOC',
+                            '9781449355739\t853679890\tQA76.73.P98L88 2013\tLOC']
+
+
+class FailingSource:
+    """A source whose lookups always fail."""
+
+    def __init__(self):
+        self.lookups = 0
+
+    def lookup(self, identifier, input_type):
+        self.lookups += 1
+        raise ConnectionError("Service unavailable")
+
+
+@pytest.mark.parametrize('search_mode', ['sequential', 'parallel'])
+def test_failing_source_is_skipped(db_manager, tmp_path, monkeypatch, search_mode):
+    # Failures while offline do not count against a source
+    monkeypatch.setattr(metadataHarvester.ConnectivityMonitor.get_monitor(), 'is_online', lambda: True)
+    source = FailingSource()
+    harvester = make_harvester(db_manager, source, search_mode=search_mode, max_workers=1, breaker_failure_threshold=3)
+
+    identifiers = [f'97800000000{number:02d}' for number in range(10)]
+    assert harvester.run(identifiers, 'isbn', OUTPUT_OPTIONS, str(tmp_path / 'out.tsv'))
+
+    assert source.lookups == 3
+    assert harvester.breakers['Test'].stats['rejected'] == 7
+
+
+class TimingOutScraper:
+    """A scraper whose pages never load in time."""
+
+    def __init__(self):
+        self.lookups = 0
+
+    def lookup(self, identifier, input_type):
+        self.lookups += 1
+        raise PageTimeoutError("gave up waiting for element result_title after 0.10s")
+
+
+@pytest.mark.parametrize('search_mode', ['sequential', 'parallel'])
+def test_scraper_failures_trip_the_breaker(db_manager, tmp_path, monkeypatch, search_mode):
+    monkeypatch.setattr(metadataHarvester.ConnectivityMonitor.get_monitor(), 'is_online', lambda: True)
+    source = TimingOutScraper()
+    harvester = make_harvester(db_manager, source, search_mode=search_mode, max_workers=1, breaker_failure_threshold=3)
+    harvester.initialize_metrics(tmp_path)
+
+    identifiers = [f'97800000000{number:02d}' for number in range(10)]
+    assert harvester.run(identifiers, 'isbn', OUTPUT_OPTIONS, str(tmp_path / 'out.tsv'))
+
+    assert source.lookups == 3
+    assert harvester.breakers['Test'].stats['rejected'] == 7
+    # A lookup that failed says nothing about the record, so it is not remembered as a miss
+    assert db_manager.execute_query("SELECT COUNT(*) FROM negative_cache", fetch=True) == [(0,)]
+    snapshot = json.loads((tmp_path / 'metrics.json').read_text())
+    outcomes = {entry['labels']['outcome']: entry['value'] for entry in snapshot['counters']['harvester_source_lookups_total']}
+    assert outcomes['page_timeout'] == 3 and 'miss' not in outcomes
+
+
+class StalledSource:
+    """A source that does not answer for a long time."""
+
+    def lookup(self, identifier, input_type):
+        time.sleep(2)
+        return {'lccn': ['Z699'], 'lccn_source': ['Test']}
+
+
+@pytest.mark.parametrize('search_mode', ['sequential', 'parallel'])
+def test_stalled_source_times_out(db_manager, tmp_path, monkeypatch, search_mode):
+    monkeypatch.setattr(metadataHarvester.ConnectivityMonitor.get_monitor(), 'is_online', lambda: True)
+    harvester = make_harvester(db_manager, StalledSource(), search_mode=search_mode, source_timeouts={'Test': 0.1})
+
+    started = time.monotonic()
+    assert harvester.run(['9780000000002'], 'isbn', OUTPUT_OPTIONS, str(tmp_path / 'out.tsv'))
+
+    assert time.monotonic() - started < 1
+    assert harvester.timeouts.stats == {'Test': 1}
+
+
+def test_run_writes_metrics(db_manager, tmp_path, monkeypatch):
+    monkeypatch.setattr(metadataHarvester.ConnectivityMonitor.get_monitor(), 'is_online', lambda: True)
+    harvester = make_harvester(db_manager, RecordingSource())
+    harvester.initialize_metrics(tmp_path)
+
+    assert harvester.run(['9781449355739', '9780596007126'], 'isbn', OUTPUT_OPTIONS, str(tmp_path / 'out.tsv'))
+
+    snapshot = json.loads((tmp_path / 'metrics.json').read_text())
+    counters = {(name, tuple(sorted(entry['labels'].values()))): entry['value']
+                for name, entries in snapshot['counters'].items() for entry in entries}
+    assert counters[('harvester_identifiers_total', ('found_in_database',))] == 1
+    assert counters[('harvester_identifiers_total', ('searched',))] == 1
+    assert counters[('harvester_source_lookups_total', ('Test', 'hit'))] == 1
+    stages = {entry['labels']['stage'] for entry in snapshot['histograms']['harvester_stage_seconds']}
+    assert {'prefetch', 'fetch', 'db_update', 'write'} <= stages
+    assert 'harvester_source_latency_seconds_count{source="Test"} 1' in (tmp_path / 'metrics.prom').read_text()
+
+
+class ReadyDriver:
+    def execute_script(self, script):
+        return "complete"
+
+
+def test_metrics_include_rate_limits_browsers_and_page_waits(db_manager, tmp_path, monkeypatch):
+    scheduler = metadataHarvester.RateScheduler()
+    monkeypatch.setattr(metadataHarvester.RateScheduler, '_instance', scheduler)
+    scheduler.configure('slow.example', 1, 60)
+    scheduler.try_acquire('slow.example')
+    # The second request has to wait for a permit
+    assert scheduler.try_acquire('slow.example') > 0
+    metadataHarvester.pageWait.wait_for_document_ready(ReadyDriver(), 1, catalog='Metrics')
+    harvester = make_harvester(db_manager)
+    harvester.initialize_metrics(tmp_path)
+
+    harvester.write_metrics()
+
+    gauges = {(name, tuple(sorted(entry['labels'].items()))): entry['value']
+              for name, entries in json.loads((tmp_path / 'metrics.json').read_text())['gauges'].items() for entry in entries}
+    assert gauges[('harvester_rate_limit_queue_depth', (('host', 'slow.example'),))] == 1
+    assert ('harvester_browsers', (('state', 'busy'),)) in gauges
+    assert ('harvester_browsers_failing', ()) in gauges
+    assert gauges[('harvester_page_waits', (('catalog', 'Metrics'), ('kind', 'document_ready')))] >= 1
+    assert gauges[('harvester_page_wait_timeouts', (('catalog', 'Metrics'), ('kind', 'document_ready')))] == 0
+
+
+class DelayedSource:
+    """A source that answers with `result` after `delay` seconds, and remembers whether it was asked."""
+
+    def __init__(self, delay, result):
+        self.delay = delay
+        self.result = result
+        self.asked = threading.Event()
+
+    def lookup(self, identifier, input_type):
+        self.asked.set()
+        time.sleep(self.delay)
+        return self.result
+
+
+def fan_out(db_manager, sources, missing_data, **settings):
+    """Search the sources, given in priority order, for the missing fields of an ISBN. Returns the data and the seconds it took."""
+    settings = {**DEFAULT_SETTINGS, 'pause_when_offline': False, **settings}
+    harvester = MetadataHarvester(db_manager, dict(sources), [name for name, _ in sources], settings)
+    harvester.search_active = True
+    harvester.metrics.reset()
+    existing_data = {'isbn': ['9780000000002']}
+    started = time.monotonic()
+    harvester.fetch_missing_data_concurrently(existing_data, set(missing_data), '9780000000002', 'isbn')
+    return harvester, existing_data, time.monotonic() - started
+
+
+def lookup_outcomes(harvester):
+    return {(entry['labels']['source'], entry['labels']['outcome']): entry['value']
+            for entry in harvester.metrics.snapshot()['counters'].get('harvester_source_lookups_total', [])}
+
+
+@pytest.mark.parametrize('search_mode', ['parallel', 'hedged'])
+def test_higher_priority_answer_wins(db_manager, monkeypatch, search_mode):
+    monkeypatch.setattr(metadataHarvester.ConnectivityMonitor.get_monitor(), 'is_online', lambda: True)
+    first = DelayedSource(0.3, {'lccn': ['QA76'], 'lccn_source': ['First']})
+    second = DelayedSource(0, {'ocn': '2', 'lccn': ['Z699'], 'lccn_source': ['Second']})
+
+    _, data, elapsed = fan_out(db_manager, [('First', first), ('Second', second)], {'ocn', 'lccn', 'lccn_source'},
+                               search_mode=search_mode, hedge_delay=0.05)
+
+    # The second source answers first, but only settles the field the first one does not have
+    assert data['lccn'] == ['QA76'] and data['lccn_source'] == ['First']
+    assert data['ocn'] == '2'
+    assert second.asked.is_set() and elapsed >= 0.3
+
+
+def test_hedged_mode_does_not_start_lower_ranked_sources_once_settled(db_manager, monkeypatch):
+    monkeypatch.setattr(metadataHarvester.ConnectivityMonitor.get_monitor(), 'is_online', lambda: True)
+    first = DelayedSource(0.05, {'lccn': ['QA76'], 'lccn_source': ['First']})
+    second = DelayedSource(0, {'lccn': ['Z699'], 'lccn_source': ['Second']})
+
+    _, data, elapsed = fan_out(db_manager, [('First', first), ('Second', second)], {'lccn', 'lccn_source'},
+                               search_mode='hedged', hedge_delay=1)
+
+    assert data['lccn'] == ['QA76']
+    assert not second.asked.is_set() and elapsed < 0.5
+
+
+def test_sources_in_flight_are_not_waited_for_once_settled(db_manager, monkeypatch):
+    monkeypatch.setattr(metadataHarvester.ConnectivityMonitor.get_monitor(), 'is_online', lambda: True)
+    first = DelayedSource(0, {'lccn': ['QA76'], 'lccn_source': ['First']})
+    second = DelayedSource(1, {'lccn': ['Z699'], 'lccn_source': ['Second']})
+
+    _, data, elapsed = fan_out(db_manager, [('First', first), ('Second', second)], {'lccn', 'lccn_source'},
+                               search_mode='parallel')
+
+    assert data['lccn'] == ['QA76']
+    assert second.asked.is_set() and elapsed < 0.5
+
+
+@pytest.mark.parametrize('search_mode', ['parallel', 'hedged'])
+def test_source_running_out_of_time_is_passed_over(db_manager, monkeypatch, search_mode):
+    monkeypatch.setattr(metadataHarvester.ConnectivityMonitor.get_monitor(), 'is_online', lambda: True)
+    first = DelayedSource(1, {'lccn': ['QA76'], 'lccn_source': ['First']})
+    second = DelayedSource(0, {'lccn': ['Z699'], 'lccn_source': ['Second']})
+
+    harvester, data, elapsed = fan_out(db_manager, [('First', first), ('Second', second)], {'lccn', 'lccn_source'},
+                                       search_mode=search_mode, hedge_delay=0.05, source_timeouts={'First': 0.1})
+
+    # The stalled source has no answer, so the next one settles the field without waiting for it
+    assert data['lccn'] == ['Z699'] and elapsed < 0.5
+    assert harvester.timeouts.stats == {'First': 1}
+    outcomes = lookup_outcomes(harvester)
+    assert outcomes[('First', 'timeout')] == 1 and ('First', 'error') not in outcomes
+    # Running out of time says nothing about the record, so it is not remembered as a miss
+    assert harvester.negative_cache.known_misses('isbn', '9780000000002') == {}
+
+
+class ConcurrencySource:
+    """
+    A source that takes a while to answer and counts the lookups running at once. With
+    `stop_at`, the lookup of IDENTIFIERS[stop_at] stops the search once the lookups before it
+    have finished, and the lookups after it do not finish before that.
+    """
+
+    def __init__(self, harvester=None, stop_at=None):
+        self.harvester = harvester
+        self.stop_at = stop_at
+        self.lock = threading.Lock()
+        self.running = 0
+        self.most_running = 0
+        self.asked = []
+        self.finished = set()
+        self.stopped = threading.Event()
+
+    def lookup(self, identifier, input_type):
+        with self.lock:
+            self.asked.append(identifier)
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        try:
+            time.sleep(0.05)
+            if self.stop_at is not None:
+                position = IDENTIFIERS.index(identifier)
+                if position == self.stop_at:
+                    while not set(IDENTIFIERS[:self.stop_at]) <= self.finished:
+                        time.sleep(0.01)
+                    self.harvester.stop()
+                    self.stopped.set()
+                elif position > self.stop_at:
+                    self.stopped.wait(5)
+            return {'ocn': '1', 'lccn': ['Z699'], 'lccn_source': ['Test']}
+        finally:
+            with self.lock:
+                self.running -= 1
+                self.finished.add(identifier)
+
+
+IDENTIFIERS = [f'97800000000{number:02d}' for number in range(10)]
+
+
+def test_workers_bound_the_identifiers_in_flight(db_manager, tmp_path):
+    source = ConcurrencySource()
+    harvester = make_harvester(db_manager, source, max_workers=3)
+
+    assert harvester.run(IDENTIFIERS, 'isbn', OUTPUT_OPTIONS, str(tmp_path / 'out.tsv'))
+
+    assert source.most_running == 3
+    assert sorted(source.asked) == IDENTIFIERS
+    assert len((tmp_path / 'out.tsv').read_text().splitlines()) == 1 + len(IDENTIFIERS)
+
+
+def test_stop_ends_submission_and_keeps_finished_rows(db_manager, tmp_path):
+    source = ConcurrencySource(stop_at=4)
+    # Rows stay buffered until the search ends, which has to write them out
+    harvester = make_harvester(db_manager, source, max_workers=2, output_flush_rows=100, output_flush_interval=60)
+    source.harvester = harvester
+
+    assert not harvester.run(IDENTIFIERS, 'isbn', OUTPUT_OPTIONS, str(tmp_path / 'out.tsv'))
+
+    # At most the identifier sharing the workers with the stopped one was started after it
+    assert sorted(source.asked) in (IDENTIFIERS[:5], IDENTIFIERS[:6])
+    written = {row.split('\t')[0] for row in (tmp_path / 'out.tsv').read_text().splitlines()[1:]}
+    # Identifiers finished before stop() are written, those interrupted by it are not
+    assert written == set(IDENTIFIERS[:4])
@@ -0,0 +1,46 @@
+from src.core.sourcePlanner import SourcePlanner
+
+SOURCES = ['Slow', 'Fast', 'Pinned', 'New']
+
+
+def test_unknown_sources_keep_the_users_order(tmp_path):
+    planner = SourcePlanner(tmp_path / 'source_stats.json')
+    assert planner.order(SOURCES, 'isbn', {'lccn'}) == SOURCES
+
+
+def test_sources_that_miss_fall_behind(tmp_path):
+    planner = SourcePlanner(tmp_path / 'source_stats.json', pinned=['Pinned'], window=50)
+    for _ in range(100):
+        planner.record('Slow', 'isbn', {'lccn'}, set(), 5.0)
+        planner.record('Fast', 'isbn', {'lccn'}, {'lccn'}, 0.5)
+        planner.record('Pinned', 'isbn', {'lccn'}, set(), 5.0)
+
+    assert planner.order(SOURCES, 'isbn', {'lccn'}) == ['Fast', 'New', 'Pinned', 'Slow']
+    # The statistics are kept per identifier type
+    assert planner.order(SOURCES, 'ocn', {'lccn'}) == SOURCES
+
+
+def test_recent_answers_outweigh_old_ones(tmp_path):
+    planner = SourcePlanner(tmp_path / 'source_stats.json', window=50)
+    for _ in range(500):
+        planner.record('Slow', 'isbn', {'lccn'}, {'lccn'}, 1.0)
+    for _ in range(100):
+        planner.record('Slow', 'isbn', {'lccn'}, set(), 1.0)
+    assert planner.stats['isbn']['Slow']['fields']['lccn']['hit_rate'] < 0.2
+
+
+def test_statistics_persist(tmp_path):
+    path = tmp_path / 'source_stats.json'
+    planner = SourcePlanner(path)
+    planner.record('Fast', 'ocn', {'isbn', 'lccn'}, {'isbn'}, 0.25)
+    planner.save()
+
+    reloaded = SourcePlanner(path)
+    assert reloaded.stats == planner.stats
+    assert reloaded.expected_cost('Fast', 'ocn', {'isbn'}) == planner.expected_cost('Fast', 'ocn', {'isbn'})
+
+
+def test_unreadable_statistics_are_ignored(tmp_path):
+    path = tmp_path / 'source_stats.json'
+    path.write_text('{')
+    assert SourcePlanner(path).stats == {}
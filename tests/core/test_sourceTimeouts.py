@@ -0,0 +1,25 @@
+from src.core.sourceTimeouts import SourceTimeouts
+
+
+def test_configured_limits():
+    timeouts = SourceTimeouts(default=60, limits={'Slow': 120})
+    assert timeouts.timeout('Slow') == 120
+    assert timeouts.timeout('Other') == 60
+
+
+def test_adaptive_limit_follows_the_99th_percentile():
+    timeouts = SourceTimeouts(default=60, adaptive=True, factor=2, minimum=5, min_samples=50)
+    for _ in range(49):
+        timeouts.record('Fast', 1.0)
+    assert timeouts.timeout('Fast') == 60  # Too few answers to go by
+
+    for latency in [1.0] * 98 + [4.0, 40.0]:
+        timeouts.record('Fast', latency)
+    assert timeouts.timeout('Fast') == 8.0
+
+    # Kept between the minimum and the configured limit
+    for _ in range(200):
+        timeouts.record('Fast', 0.1)
+        timeouts.record('Slow', 50.0)
+    assert timeouts.timeout('Fast') == 5
+    assert timeouts.timeout('Slow') == 60
@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+from src.db.databaseManager import DatabaseManager
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    db_manager = DatabaseManager()
+    db_manager.db_path = str(tmp_path / 'metadata.sqlite')
+    db_manager.create_table("books", "Isbn TEXT PRIMARY KEY, Ocn TEXT")
+    yield db_manager
+    db_manager.close()
+
+
+def test_connection_is_kept_in_wal_mode(db_manager):
+    connection = db_manager.connection
+    db_manager.insert_data('books', ('9781449355739', '835310128'))
+    assert db_manager.connection is connection
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+
+def test_parameters(db_manager):
+    # Values are bound, so quotes in them need no escaping
+    db_manager.insert_data('books', ("978'1", "83'5"))
+    assert db_manager.data_exists('books', "Isbn = ?", ("978'1",))
+    db_manager.update_data('books', "Ocn = ?", "Isbn = ?", ('835310128', "978'1"))
+    assert db_manager.fetch_data('books', "WHERE Isbn = ?", ("978'1",)) == [("978'1", '835310128')]
+    db_manager.delete_data('books', "Isbn = ?", ("978'1",))
+    assert not db_manager.data_exists('books', "Isbn = ?", ("978'1",))
+
+
+def test_transaction_commits_at_the_end(db_manager, tmp_path):
+    other = DatabaseManager()
+    other.db_path = db_manager.db_path
+    with db_manager.transaction():
+        db_manager.insert_data('books', ('9781449355739', '835310128'))
+        with db_manager.transaction():
+            db_manager.insert_data('books', ('1449355730', '835310128'))
+        # Nothing is visible to other connections before the outermost transaction ends
+        assert other.fetch_data('books') == []
+    assert len(other.fetch_data('books')) == 2
+    other.close()
+
+
+def test_transaction_rolls_back_on_error(db_manager):
+    with pytest.raises(RuntimeError):
+        with db_manager.transaction():
+            db_manager.insert_data('books', ('9781449355739', '835310128'))
+            raise RuntimeError
+    assert db_manager.fetch_data('books') == []
+
+
+def test_failed_statement_rolls_back_the_transaction(db_manager):
+    with pytest.raises(sqlite3.IntegrityError):
+        with db_manager.transaction():
+            db_manager.insert_data('books', ('9781449355739', '835310128'))
+            # The duplicate key fails, and with it the whole batch
+            db_manager.insert_data('books', ('9781449355739', '853679890'))
+    assert db_manager.fetch_data('books') == []
+    with pytest.raises(sqlite3.OperationalError):
+        with db_manager.transaction():
+            db_manager.execute_many("INSERT INTO books VALUES (?, ?)", [('9781449355739', '835310128')])
+            db_manager.execute_many("INSERT INTO missing VALUES (?, ?)", [('9781449355739', '835310128')])
+    assert db_manager.fetch_data('books') == []
+
+
+def test_failed_statement_outside_a_transaction_is_logged(db_manager, caplog):
+    db_manager.insert_data('books', ('9781449355739', '835310128'))
+    db_manager.insert_data('books', ('9781449355739', '853679890'))
+    assert 'UNIQUE constraint failed' in caplog.text
+    assert db_manager.fetch_data('books') == [('9781449355739', '835310128')]
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from src.db.databaseManager import DatabaseManager
+from src.db.negativeCache import NegativeCache
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    db_manager = DatabaseManager()
+    db_manager.db_path = str(tmp_path / 'metadata.sqlite')
+    NegativeCache.create_table(db_manager)
+    return db_manager
+
+
+def test_misses_are_remembered(db_manager):
+    cache = NegativeCache(db_manager)
+    cache.record('Harvard', 'isbn', '9781449355739', {'ocn', 'lccn'})
+
+    assert cache.known_misses('isbn', '9781449355739') == {'Harvard': {'ocn', 'lccn'}}
+    assert cache.known_misses('ocn', '9781449355739') == {}
+    assert cache.known_misses('isbn', '9780000000002') == {}
+
+
+def test_found_fields_are_forgotten(db_manager):
+    cache = NegativeCache(db_manager)
+    cache.record('Harvard', 'isbn', '9781449355739', {'ocn', 'lccn'})
+    cache.record('Harvard', 'isbn', '9781449355739', {'ocn'}, found={'lccn'})
+
+    assert cache.known_misses('isbn', '9781449355739') == {'Harvard': {'ocn'}}
+
+
+def test_ttl_per_source_and_field(db_manager):
+    cache = NegativeCache(db_manager, {'default': 100, 'Harvard': 50, 'lccn': 10, 'Harvard:ocn': 0})
+    assert cache.ttl('Harvard', 'ocn') == 0
+    assert cache.ttl('Harvard', 'lccn') == 50
+    assert cache.ttl('Yale', 'lccn') == 10
+    assert cache.ttl('Yale', 'isbn') == 100
+
+    # A time to live of 0 is never recorded
+    cache.record('Harvard', 'isbn', '9781449355739', {'ocn', 'lccn'})
+    assert cache.known_misses('isbn', '9781449355739') == {'Harvard': {'lccn'}}
+
+
+def test_expired_misses(db_manager):
+    cache = NegativeCache(db_manager, {'default': 60})
+    cache.record('Harvard', 'isbn', '9781449355739', {'ocn'})
+    db_manager.execute_query("UPDATE negative_cache SET Checked = ?", (time.time() - 120,))
+
+    assert cache.known_misses('isbn', '9781449355739') == {}
+    cache.purge()
+    assert db_manager.fetch_data('negative_cache') == []
@@ -0,0 +1,126 @@
+import sqlite3
+
+import pytest
+
+from src.core.metadataHarvester import MetadataHarvester
+from src.db.databaseManager import DatabaseManager
+from src.db.recordCache import RecordCache
+
+
+class CountingDatabaseManager(DatabaseManager):
+    """Counts the statements that reach SQLite."""
+
+    queries = 0
+
+    def execute_query(self, query, params=(), fetch=False):
+        self.queries += 1
+        return super().execute_query(query, params, fetch)
+
+    def execute_many(self, query, params_list):
+        self.queries += 1
+        return super().execute_many(query, params_list)
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    db_manager = CountingDatabaseManager()
+    db_manager.db_path = str(tmp_path / 'metadata.sqlite')
+    MetadataHarvester.initialize_database(db_manager)
+    db_manager.insert_data('books', ('9781449355739', '853679890'))
+    db_manager.queries = 0
+    yield db_manager
+    db_manager.close()
+
+
+def test_repeated_lookups_are_served_from_memory(db_manager):
+    cache = RecordCache(db_manager)
+
+    assert cache.book('Isbn', '9781449355739') == ('9781449355739', '853679890')
+    assert cache.book('Isbn', '9780596007126') is None
+    assert cache.first_lccn('9781449355739') is None
+    queries = db_manager.queries
+
+    assert cache.book('Isbn', '9781449355739') == ('9781449355739', '853679890')
+    assert cache.book('Isbn', '9780596007126') is None
+    assert cache.first_lccn('9781449355739') is None
+    assert db_manager.queries == queries
+    assert cache.stats == {'hits': 3, 'misses': 3, 'evicted': 0}
+
+
+def test_writes_go_through_to_the_database(db_manager):
+    cache = RecordCache(db_manager)
+    cache.book('Isbn', '9781449355739')
+    cache.book('Ocn', '853679890')
+    cache.first_lccn('9781449355739')
+
+    cache.store_book('9781449355739', '1')
+    cache.store_book('9780596007126', '')
+    lccn_id, source = cache.store_lccn('QA76.73.P98L88 2013', 'LOC')
+    assert cache.store_lccn('QA76.73.P98L88 2013', 'Yale') == (lccn_id, 'LOC')
+    cache.link(['9781449355739', '9780596007126'], lccn_id, 'QA76.73.P98L88 2013', source)
+    queries = db_manager.queries
+    cache.link(['9781449355739'], lccn_id, 'QA76.73.P98L88 2013', source)
+    assert db_manager.queries == queries
+
+    # The cache answers as the database does
+    fresh = RecordCache(db_manager)
+    for column, value in [('Isbn', '9781449355739'), ('Isbn', '9780596007126'), ('Ocn', '853679890'), ('Ocn', '1')]:
+        assert cache.book(column, value) == fresh.book(column, value)
+    for isbn in ['9781449355739', '9780596007126']:
+        assert cache.first_lccn(isbn) == fresh.first_lccn(isbn) == (lccn_id, 'QA76.73.P98L88 2013', 'LOC')
+    assert db_manager.fetch_data('lccn') == [(lccn_id, 'QA76.73.P98L88 2013', 'LOC')]
+
+
+def test_rolled_back_writes_leave_no_entries(db_manager):
+    cache = RecordCache(db_manager)
+    cache.book('Isbn', '9781449355739')
+    cache.first_lccn('9780596007126')
+    with pytest.raises(sqlite3.IntegrityError):
+        with db_manager.transaction():
+            cache.store_book('9781449355739', '1')
+            cache.store_book('9780596007126', '2')
+            lccn_id, source = cache.store_lccn('QA76.73.P98L88 2013', 'LOC')
+            cache.link(['9780596007126'], lccn_id, 'QA76.73.P98L88 2013', source)
+            assert cache.book('Ocn', '2') == ('9780596007126', '2')
+            # Fails the transaction after the cache has taken in its writes
+            db_manager.insert_data('lccn', (lccn_id, 'QA76.73.P98L88 2013', 'LOC'))
+
+    # The cache answers as the database does
+    fresh = RecordCache(db_manager)
+    for column, value in [('Isbn', '9781449355739'), ('Isbn', '9780596007126'), ('Ocn', '853679890'), ('Ocn', '1'), ('Ocn', '2')]:
+        assert cache.book(column, value) == fresh.book(column, value)
+    assert cache.first_lccn('9780596007126') is None
+    # The LCCN is stored again rather than taken from memory with the ID of the rolled back row
+    db_manager.insert_data('lccn', (None, 'Z699', 'LOC'))
+    assert cache.store_lccn('QA76.73.P98L88 2013', 'Yale')[1] == 'Yale'
+    assert len(db_manager.fetch_data('lccn')) == 2
+
+
+def test_committed_writes_stay_in_memory(db_manager):
+    cache = RecordCache(db_manager)
+    with db_manager.transaction():
+        cache.store_book('9780596007126', '2')
+    queries = db_manager.queries
+    assert cache.book('Isbn', '9780596007126') == ('9780596007126', '2')
+    assert db_manager.queries == queries
+
+
+def test_least_recently_used_entries_are_evicted(db_manager):
+    cache = RecordCache(db_manager, max_size=1000)
+    for number in range(20):
+        cache.book('Isbn', str(number))
+    assert cache.stats['evicted'] > 0
+    assert cache._size <= 1000
+
+    queries = db_manager.queries
+    cache.book('Isbn', '19')
+    assert db_manager.queries == queries
+    cache.book('Isbn', '0')
+    assert db_manager.queries == queries + 1
+
+
+def test_size_zero_turns_the_cache_off(db_manager):
+    cache = RecordCache(db_manager, max_size=0)
+    cache.book('Isbn', '9781449355739')
+    cache.book('Isbn', '9781449355739')
+    assert db_manager.queries == 2
@@ -0,0 +1,80 @@
+import pytest
+
+from src.core.metadataHarvester import MetadataHarvester
+from src.db.databaseManager import DatabaseManager
+from src.db.schema import SCHEMA_VERSION, maintain, migrate
+from src.util.settings import DEFAULT_SETTINGS
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    db_manager = DatabaseManager()
+    db_manager.db_path = str(tmp_path / 'metadata.sqlite')
+    yield db_manager
+    db_manager.close()
+
+
+def user_version(db_manager):
+    return db_manager.execute_query("PRAGMA user_version", fetch=True)[0][0]
+
+
+def test_migration_merges_duplicates(db_manager):
+    # A database written before the schema had any constraints
+    db_manager.create_table("books", "Isbn TEXT PRIMARY KEY, Ocn TEXT")
+    db_manager.create_table("lccn", "Lccn_id INTEGER PRIMARY KEY AUTOINCREMENT, Lccn TEXT, Source TEXT")
+    db_manager.create_table("book_lccn", "Isbn TEXT, Lccn_id INTEGER")
+    for row in [(1, 'QA76.73.P98L88 2013', 'LOC'), (2, 'QA76.73.P98L88 2013', 'Yale'), (3, 'Z699', 'LOC')]:
+        db_manager.insert_data('lccn', row)
+    for row in [('9781449355739', 1), ('9781449355739', 2), ('1449355730', 2), ('1449355730', 3), ('1449355730', 3)]:
+        db_manager.insert_data('book_lccn', row)
+
+    MetadataHarvester.initialize_database(db_manager)
+
+    assert user_version(db_manager) == SCHEMA_VERSION
+    assert db_manager.fetch_data('lccn', "ORDER BY Lccn_id") == [(1, 'QA76.73.P98L88 2013', 'LOC'), (3, 'Z699', 'LOC')]
+    assert sorted(db_manager.fetch_data('book_lccn')) == [('1449355730', 1), ('1449355730', 3), ('9781449355739', 1)]
+    indexes = {row[1] for row in db_manager.fetch_data('sqlite_master', "WHERE type = 'index'")}
+    assert {'lccn_lccn', 'book_lccn_isbn', 'books_ocn'} <= indexes
+
+    # Migrating again changes nothing
+    migrate(db_manager)
+    assert user_version(db_manager) == SCHEMA_VERSION
+
+
+def test_negative_cache_lookup_uses_an_index(db_manager):
+    MetadataHarvester.initialize_database(db_manager)
+    plan = db_manager.execute_query("EXPLAIN QUERY PLAN SELECT Source, Field, Checked FROM negative_cache "
+                                    "WHERE Id_type = ? AND Identifier = ?", ('isbn', '9781449355739'), fetch=True)
+    assert [row[-1] for row in plan] == ['SEARCH negative_cache USING INDEX negative_cache_identifier (Id_type=? AND Identifier=?)']
+
+
+def test_upserts(db_manager):
+    MetadataHarvester.initialize_database(db_manager)
+    harvester = MetadataHarvester(db_manager, {}, [], dict(DEFAULT_SETTINGS))
+
+    harvester.update_database_with_existing_data('9781449355739', {
+        'isbn': ['9781449355739', '1449355730'], 'ocn': '', 'lccn': ['QA76.73.P98L88 2013'], 'lccn_source': ['LOC']}, 'isbn')
+    harvester.update_database_with_existing_data('9781449355739', {
+        'isbn': ['9781449355739'], 'ocn': '835310128', 'lccn': ['QA76.73.P98L88 2013', 'Z699'], 'lccn_source': ['Yale', 'Yale']}, 'isbn')
+    # An empty OCN does not replace a known one
+    harvester.update_database_with_existing_data('1449355730', {'isbn': ['1449355730'], 'ocn': ''}, 'isbn')
+
+    assert sorted(db_manager.fetch_data('books')) == [('1449355730', ''), ('9781449355739', '835310128')]
+    # A known LCCN keeps its first source
+    assert db_manager.execute_query("SELECT Lccn, Source FROM lccn ORDER BY Lccn_id", fetch=True) == \
+        [('QA76.73.P98L88 2013', 'LOC'), ('Z699', 'Yale')]
+    links = db_manager.execute_query("SELECT Isbn, Lccn FROM book_lccn JOIN lccn USING (Lccn_id)", fetch=True)
+    assert sorted(links) == [('1449355730', 'QA76.73.P98L88 2013'), ('9781449355739', 'QA76.73.P98L88 2013'),
+                             ('9781449355739', 'Z699')]
+
+
+def test_maintain_compacts_a_mostly_empty_database(db_manager):
+    MetadataHarvester.initialize_database(db_manager)
+    with db_manager.transaction():
+        for i in range(2000):
+            db_manager.insert_data('books', (f'isbn{i}', 'x' * 200))
+    db_manager.delete_data('books', "1 = 1")
+    assert db_manager.execute_query("PRAGMA freelist_count", fetch=True)[0][0] > 0
+
+    maintain(db_manager)
+    assert db_manager.execute_query("PRAGMA freelist_count", fetch=True)[0][0] == 0
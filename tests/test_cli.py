@@ -0,0 +1,101 @@
+import io
+import json
+
+import pytest
+
+from src import cli
+from src.core.checkpoint import JobCheckpoint
+
+ISBNS = ['9780805376135', '9780805368444', '9781292092621']
+
+
+def resolve(tmp_path, *argv):
+    return cli.resolve_options(cli.build_parser().parse_args(list(argv)), tmp_path)
+
+
+def test_command_line_overrides_config_and_settings(tmp_path):
+    (tmp_path / 'settings.json').write_text(json.dumps({'max_workers': 8, 'search_mode': 'parallel'}))
+    config = tmp_path / 'config.json'
+    config.write_text(json.dumps({'workers': 2, 'browsers': 3, 'search-mode': 'hedged', 'fields': 'isbn,lccn'}))
+
+    options = resolve(tmp_path, '-c', str(config), '-w', '6', '-s', 'google, congress')
+
+    assert options['settings']['max_workers'] == 6
+    assert options['settings']['browser_pool_size'] == 3
+    assert options['settings']['search_mode'] == 'hedged'
+    assert options['output_options'] == {'isbn': True, 'ocn': False, 'lccn': True, 'lccn_source': False}
+    assert options['priority_list'] == ['Google Books (API)', 'Library of Congress (API)']
+
+
+def test_flags_left_out_do_not_override_the_config(tmp_path):
+    config = tmp_path / 'config.json'
+    config.write_text(json.dumps({'append': True, 'mmap_input': True}))
+
+    options = resolve(tmp_path, '-c', str(config), '-s', 'google')
+
+    assert options['append'] is True
+    assert options['settings']['mmap_input'] is True
+
+
+@pytest.mark.parametrize('argv', [
+    ['--workers', '0'],
+    ['--browsers', '0'],
+    ['--workers', '-1'],
+    ['--fields', 'isbn'],
+    ['--fields', 'isbn,title'],
+    ['--sources', 'library'],
+    ['--sources', 'nowhere'],
+])
+def test_invalid_options_are_rejected(tmp_path, argv):
+    # Zero must not fall back to the saved settings
+    (tmp_path / 'settings.json').write_text(json.dumps({'max_workers': 4, 'browser_pool_size': 2}))
+    with pytest.raises(cli.UsageError):
+        resolve(tmp_path, '-s', 'google', *argv)
+
+
+def test_main_exits_with_usage_error(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(cli, 'get_app_data_directory', lambda: tmp_path)
+    monkeypatch.setattr(cli, 'setup_logging', lambda app_data_dir: None)
+    assert cli.main(['-s', 'google', '-w', '0', '-i', '-']) == cli.EXIT_USAGE
+    assert 'number of workers' in capsys.readouterr().err
+
+
+def test_stdin_job_is_not_resumed_by_its_input(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(cli, 'get_app_data_directory', lambda: tmp_path)
+    monkeypatch.setattr(cli, 'setup_logging', lambda app_data_dir: None)
+    monkeypatch.setattr('sys.stdin', io.StringIO(''.join(isbn + '\n' for isbn in ISBNS)))
+    assert cli.main(['-s', 'google', '-i', '-', '-o', str(tmp_path / 'out.tsv'), '--resume']) == cli.EXIT_USAGE
+    assert '--job-id' in capsys.readouterr().err
+
+
+def test_stdin_job_is_resumed_by_its_id(tmp_path, monkeypatch):
+    text = ''.join(isbn + '\n' for isbn in ISBNS)
+    monkeypatch.setattr('sys.stdin', io.StringIO(text))
+    input_type, data, input_hash = cli.read_identifiers('-')
+    assert (input_type, list(data)) == ('isbn', ISBNS)
+
+    output = str(tmp_path / 'out.tsv')
+    options = {'input': '-', 'output': output, 'output_options': {'isbn': True, 'lccn': True}}
+    checkpoint = cli.find_checkpoint(tmp_path, options, input_type, input_hash)
+
+    # The same lines on standard input identify the same job
+    monkeypatch.setattr('sys.stdin', io.StringIO(text))
+    options = {'job_id': checkpoint.job_id, 'output_options': {}}
+    cli.load_job(tmp_path, options)
+    assert (options['input'], options['output'], options['input_type']) == ('-', output, 'isbn')
+    input_type, data, input_hash = cli.read_identifiers(options['input'], options['input_type'])
+    resumed = cli.find_checkpoint(tmp_path, options, input_type, input_hash)
+    assert resumed.job_id == checkpoint.job_id
+    assert options['output_options'] == {'isbn': True, 'lccn': True}
+
+    # Other lines do not
+    monkeypatch.setattr('sys.stdin', io.StringIO(text.replace(ISBNS[0], '9781009321686')))
+    _, _, other_hash = cli.read_identifiers('-', 'isbn')
+    with pytest.raises(cli.UsageError):
+        cli.find_checkpoint(tmp_path, options, input_type, other_hash)
+
+
+def test_unknown_job_id_is_rejected(tmp_path):
+    with pytest.raises(cli.UsageError):
+        cli.load_job(tmp_path, {'job_id': 'missing'})
+    assert JobCheckpoint.load(tmp_path, 'missing') is None
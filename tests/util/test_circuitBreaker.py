@@ -0,0 +1,54 @@
+import time
+
+from src.util.circuitBreaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker('Test', failure_threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats == {'opened': 1, 'half-opened': 0, 'closed': 0, 'rejected': 1}
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker('Test', failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    # A failed probe opens the breaker again
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+    assert breaker.stats == {'opened': 2, 'half-opened': 2, 'closed': 1, 'rejected': 2}
+
+
+def test_unreported_probe_is_given_up_on():
+    breaker = CircuitBreaker('Test', failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+def test_threshold_zero_never_opens():
+    breaker = CircuitBreaker('Test', failure_threshold=0)
+    for _ in range(100):
+        breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
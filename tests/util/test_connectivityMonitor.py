@@ -0,0 +1,36 @@
+import time
+
+from src.util.connectivityMonitor import ConnectivityMonitor
+
+# Nothing listens on port 1, so connections are refused at once
+UNREACHABLE = 'http://127.0.0.1:1/'
+
+
+def wait_for_state(monitor, online, timeout=5):
+    deadline = time.monotonic() + timeout
+    while monitor.online != online and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return monitor.online == online
+
+
+def test_stale_state_is_probed_in_background():
+    monitor = ConnectivityMonitor(probe_url=UNREACHABLE, retry_interval=60)
+
+    # The first answer does not wait for the probe
+    assert monitor.is_online() is True
+    assert wait_for_state(monitor, False)
+    assert monitor.is_online() is False
+    assert monitor.wait_until_online(timeout=0.05) is False
+
+
+def test_reported_outcomes_update_the_state():
+    monitor = ConnectivityMonitor(probe_url=UNREACHABLE, retry_interval=60)
+    monitor.report_success()
+    # A fresh success is trusted without probing
+    assert monitor.is_online() is True
+    assert monitor._thread is None
+
+    monitor.report_failure()
+    assert wait_for_state(monitor, False)
+    monitor.report_success()
+    assert monitor.wait_until_online(timeout=0) is True
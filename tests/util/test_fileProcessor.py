@@ -0,0 +1,77 @@
+import pytest
+
+from src.util import fileProcessor
+from src.util.fileProcessor import streamFileFormat, streamLineFormat
+
+
+@pytest.fixture(params=[False, True], ids=['buffered', 'mmap'])
+def use_mmap(request):
+    return request.param
+
+
+def test_stream_skips_invalid_and_blank_lines(tmp_path, use_mmap):
+    path = tmp_path / 'isbns.txt'
+    path.write_text('9780805376135\n\n  9780805368444  \n9780805368445\nnot an isbn\n\n9781292092621')
+
+    file_type, items = streamFileFormat(str(path), 'ISBN', use_mmap)
+
+    assert file_type == 'ISBN'
+    assert list(items) == ['9780805376135', '9780805368444', '9781292092621']
+
+
+def test_stream_detects_the_type(tmp_path, use_mmap):
+    path = tmp_path / 'ocns.txt'
+    path.write_text('86074845\n58561723\n9780805376135\n')
+
+    file_type, items = streamFileFormat(str(path), use_mmap=use_mmap)
+
+    assert file_type == 'OCN'
+    assert list(items) == ['86074845', '58561723', '9780805376135']
+
+
+def test_stream_rejects_the_wrong_type(tmp_path, capsys, caplog):
+    path = tmp_path / 'ocns.txt'
+    path.write_text('86074845\n58561723\n')
+    file_type, items = streamFileFormat(str(path), 'ISBN')
+    assert file_type == 'Invalid' and list(items) == []
+    # The warning is logged, since the CLI writes its output to stdout
+    assert "does not seem to match the selected type 'ISBN'" in caplog.text
+    assert capsys.readouterr().out == ''
+
+
+@pytest.mark.parametrize('text', ['', '\n\n', 'title\nauthor\n', '9780805376136\n'])
+def test_stream_rejects_inputs_without_valid_items(tmp_path, use_mmap, text):
+    path = tmp_path / 'input.txt'
+    path.write_text(text)
+    file_type, items = streamFileFormat(str(path), use_mmap=use_mmap)
+    assert file_type == 'Invalid' and list(items) == []
+
+
+def test_stream_reports_unreadable_files(tmp_path, capsys, caplog):
+    file_type, items = streamFileFormat(str(tmp_path / 'missing.txt'), 'ISBN')
+    assert file_type == 'Invalid' and list(items) == []
+    assert 'Error reading file' in caplog.text and capsys.readouterr().out == ''
+
+
+def test_only_the_sample_is_read_up_front(monkeypatch):
+    monkeypatch.setattr(fileProcessor, 'SAMPLE_SIZE', 3)
+    read = []
+
+    def lines():
+        for number in range(10):
+            read.append(number)
+            yield f'{86074840 + number}\n'
+
+    file_type, items = streamLineFormat(lines())
+    assert file_type == 'OCN'
+    assert read == [0, 1, 2]
+    assert len(list(items)) == 10
+    assert len(read) == 10
+
+
+def test_type_is_detected_from_the_sample_only(monkeypatch):
+    monkeypatch.setattr(fileProcessor, 'SAMPLE_SIZE', 2)
+    # Lines after the sample are validated as the type of the sample
+    file_type, items = streamLineFormat(iter(['86074845\n', '58561723\n', '9780805376135\n', 'x\n']))
+    assert file_type == 'OCN'
+    assert list(items) == ['86074845', '58561723', '9780805376135']
@@ -0,0 +1,56 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.util.httpSessions import HttpSessionRegistry
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        # The client port tells which connection the request came in on
+        self.server.client_ports.append(self.client_address[1])
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RecordingHandler)
+    server.client_ports = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    HttpSessionRegistry.close_all()
+
+
+def test_connections_are_reused(server):
+    url = f'http://127.0.0.1:{server.server_port}/'
+    for _ in range(3):
+        assert HttpSessionRegistry.get(url).text == 'ok'
+
+    assert len(server.client_ports) == 3
+    assert len(set(server.client_ports)) == 1
+
+
+def test_one_session_per_host(server):
+    url = f'http://127.0.0.1:{server.server_port}'
+    assert HttpSessionRegistry.get_session(url + '/a') is HttpSessionRegistry.get_session(url + '/b')
+    assert HttpSessionRegistry.get_session(url) is not HttpSessionRegistry.get_session('http://localhost:1/')
+
+
+def test_default_timeouts(server):
+    adapter = HttpSessionRegistry.get_session(f'http://127.0.0.1:{server.server_port}/').get_adapter(
+        f'http://127.0.0.1:{server.server_port}/')
+    assert adapter.timeout == (HttpSessionRegistry.connect_timeout, HttpSessionRegistry.read_timeout)
+    assert adapter._pool_maxsize == HttpSessionRegistry.pool_size
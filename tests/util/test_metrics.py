@@ -0,0 +1,54 @@
+import json
+
+from src.util.metrics import MetricsRegistry
+
+
+def test_counters_gauges_and_histograms():
+    metrics = MetricsRegistry()
+    metrics.increment('lookups_total', source='LOC', outcome='hit')
+    metrics.increment('lookups_total', outcome='hit', source='LOC')
+    metrics.increment('lookups_total', source='LOC', outcome='miss')
+    metrics.set('cache_events', 7, cache='http', event='hits')
+    for seconds in [0.003, 0.2, 0.2, 100]:
+        metrics.observe('latency_seconds', seconds, source='LOC')
+
+    snapshot = metrics.snapshot()
+    assert sorted((entry['labels']['outcome'], entry['value']) for entry in snapshot['counters']['lookups_total']) == \
+        [('hit', 2), ('miss', 1)]
+    assert snapshot['gauges']['cache_events'] == [{'labels': {'cache': 'http', 'event': 'hits'}, 'value': 7}]
+    histogram = snapshot['histograms']['latency_seconds'][0]
+    assert histogram['count'] == 4 and histogram['sum'] == 100.403
+    assert histogram['buckets']['0.005'] == 1
+    assert histogram['buckets']['0.25'] == 3
+    assert histogram['buckets']['60.0'] == 3
+    assert histogram['buckets']['+Inf'] == 4
+
+    metrics.reset()
+    assert metrics.snapshot() == {'counters': {}, 'gauges': {}, 'histograms': {}}
+
+
+def test_prometheus_text_format():
+    metrics = MetricsRegistry()
+    metrics.increment('lookups_total', source='Yale "Orbis"', outcome='hit')
+    with metrics.timer('stage_seconds', stage='write'):
+        pass
+
+    lines = metrics.prometheus_text().splitlines()
+    assert '# TYPE lookups_total counter' in lines
+    assert 'lookups_total{outcome="hit",source="Yale \\"Orbis\\""} 1' in lines
+    assert '# TYPE stage_seconds histogram' in lines
+    assert 'stage_seconds_bucket{stage="write",le="0.001"} 1' in lines
+    assert 'stage_seconds_bucket{stage="write",le="+Inf"} 1' in lines
+    assert 'stage_seconds_count{stage="write"} 1' in lines
+
+
+def test_write_saves_both_formats(tmp_path):
+    metrics = MetricsRegistry()
+    metrics.increment('identifiers_total', outcome='searched')
+    metrics.write(tmp_path, job_id='20261018-000000-abcdef12')
+
+    snapshot = json.loads((tmp_path / 'metrics.json').read_text())
+    assert snapshot['job_id'] == '20261018-000000-abcdef12'
+    assert snapshot['counters']['identifiers_total'] == [{'labels': {'outcome': 'searched'}, 'value': 1}]
+    assert 'identifiers_total{outcome="searched"} 1' in (tmp_path / 'metrics.prom').read_text()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['metrics.json', 'metrics.prom']
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.util.rateScheduler import RateScheduler, TokenBucket
+
+
+def test_bucket_allows_a_burst_then_queues_callers():
+    bucket = TokenBucket(calls=2, period=1)
+    now = bucket.updated
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == 0
+    # Later callers are queued behind each other at the bucket's rate
+    assert bucket.reserve(now) == pytest.approx(0.5)
+    assert bucket.reserve(now) == pytest.approx(1.0)
+    # The balance refills with time, but never beyond the burst size
+    assert bucket.reserve(now + 10) == 0
+    assert bucket.tokens == pytest.approx(1)
+
+
+def test_refund_gives_the_token_to_the_next_caller():
+    bucket = TokenBucket(calls=1, period=1)
+    now = bucket.updated
+    bucket.reserve(now)
+    assert bucket.reserve(now) == pytest.approx(1.0)
+    bucket.refund()
+    assert bucket.reserve(now) == pytest.approx(1.0)
+    # Refunds never raise the balance beyond the burst size
+    bucket.refund()
+    bucket.refund()
+    bucket.refund()
+    assert bucket.tokens == 1
+
+
+def test_hosts_are_throttled_separately():
+    scheduler = RateScheduler()
+    scheduler.configure('slow.example', 1, 10)
+    assert scheduler.try_acquire('slow.example') == 0
+    assert scheduler.try_acquire('slow.example') > 9
+    assert scheduler.try_acquire('fast.example') == 0
+    assert scheduler.try_acquire('fast.example') == 0
+    assert scheduler.queue_depths() == {'slow.example': 1}
+
+
+def test_configure_keeps_the_first_limit():
+    scheduler = RateScheduler()
+    scheduler.configure('example.org', 1, 10)
+    scheduler.configure('example.org', 100, 1)
+    scheduler.try_acquire('example.org')
+    assert scheduler.try_acquire('example.org') > 9
+
+
+def test_cancelled_waiter_refunds_its_permit():
+    scheduler = RateScheduler()
+    scheduler.configure('example.org', 1, 0.2)
+    scheduler.try_acquire('example.org')
+
+    async def abandon():
+        task = asyncio.ensure_future(scheduler.acquire_async('example.org'))
+        await asyncio.sleep(0.01)
+        assert scheduler.queue_depths() == {'example.org': 1}
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(abandon())
+    assert scheduler.queue_depths() == {'example.org': 0}
+    # The permit taken by the cancelled waiter is available again
+    assert scheduler.try_acquire('example.org') == pytest.approx(0.2, abs=0.05)
+
+
+def test_waiting_threads_are_spaced_at_the_rate():
+    scheduler = RateScheduler()
+    scheduler.configure('example.org', 1, 0.1)
+    times = []
+
+    def request():
+        scheduler.acquire('example.org')
+        times.append(time.monotonic())
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    times.sort()
+    assert all(later - earlier >= 0.08 for earlier, later in zip(times, times[1:]))
+    assert scheduler.queue_depths() == {'example.org': 0}
+
+
+def test_penalize_pauses_a_host_without_a_limit():
+    scheduler = RateScheduler()
+    scheduler.penalize('example.org', 5)
+    assert scheduler.try_acquire('example.org') == pytest.approx(5, abs=0.1)
+    assert scheduler.try_acquire('other.example') == 0
+    # A shorter pause does not cut the longer one short
+    scheduler.penalize('example.org', 1)
+    assert scheduler.try_acquire('example.org') == pytest.approx(5, abs=0.1)
+
+
+def test_penalize_restarts_the_bucket_after_the_pause():
+    scheduler = RateScheduler()
+    scheduler.configure('example.org', 10, 1)
+    scheduler.penalize('example.org', 1)
+    # Only one request goes out when the pause ends, the next ones follow at the configured rate
+    assert scheduler.try_acquire('example.org') == pytest.approx(1, abs=0.05)
+    assert scheduler.try_acquire('example.org') == pytest.approx(1.1, abs=0.05)
@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from src.util.tsvWriter import TsvWriter
+
+OUTPUT_OPTIONS = {'isbn': True, 'ocn': True, 'lccn': True, 'lccn_source': False}
+DATA = {'ocn': '1', 'lccn': ['Z699'], 'lccn_source': ['Test']}
+
+
+@pytest.fixture
+def flushes():
+    return []
+
+
+def make_writer(path, flushes, **options):
+    return TsvWriter(str(path), OUTPUT_OPTIONS, 'isbn', on_flush=lambda offsets, position: flushes.append((list(offsets), position)),
+                     **options)
+
+
+def read_rows(path):
+    return path.read_text().splitlines()
+
+
+def test_rows_are_flushed_once_enough_are_waiting(tmp_path, flushes):
+    path = tmp_path / 'out.tsv'
+    writer = make_writer(path, flushes, flush_rows=2, flush_interval=60)
+
+    writer.write_row('9781449355739', DATA, offset=0)
+    assert '9781449355739' not in path.read_text()
+    assert flushes == []
+
+    writer.write_row('9780596007126', DATA, offset=1)
+    assert read_rows(path)[1:] == ['9781449355739\t1\tZ699', '9780596007126\t1\tZ699']
+    assert flushes == [([0, 1], path.stat().st_size)]
+    writer.close()
+
+
+def test_rows_are_flushed_after_the_interval(tmp_path, flushes):
+    path = tmp_path / 'out.tsv'
+    writer = make_writer(path, flushes, flush_rows=100, flush_interval=0.05)
+
+    writer.write_row('9781449355739', DATA, offset=0)
+    deadline = time.monotonic() + 2
+    while not flushes and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert read_rows(path)[1:] == ['9781449355739\t1\tZ699']
+    assert flushes == [([0], path.stat().st_size)]
+    writer.close()
+
+
+def test_close_flushes_the_remaining_rows(tmp_path, flushes):
+    path = tmp_path / 'out.tsv'
+    writer = make_writer(path, flushes, flush_rows=100, flush_interval=60)
+
+    writer.write_row('9781449355739', DATA, offset=0)
+    writer.close()
+
+    assert read_rows(path)[1:] == ['9781449355739\t1\tZ699']
+    assert flushes == [([0], path.stat().st_size)]
+    # Flushing a closed writer does nothing rather than fail
+    writer.flush()
+
+
+def test_flush_reports_offsets_in_the_order_rows_were_written(tmp_path, flushes):
+    path = tmp_path / 'out.tsv'
+    writer = make_writer(path, flushes, flush_rows=3, flush_interval=60)
+
+    # Rows are written as their searches finish, which is not the order of the input
+    for offset in (2, 0, 4, 1, 3):
+        writer.write_row(f'978000000000{offset}', DATA, offset=offset)
+    assert flushes[0][0] == [2, 0, 4]
+    writer.close()
+
+    assert [offsets for offsets, _ in flushes] == [[2, 0, 4], [1, 3]]
+    # Each position reported ends right after the rows of the offsets reported so far
+    lines = path.read_bytes().splitlines(keepends=True)
+    assert [position for _, position in flushes] == [len(b''.join(lines[:4])), len(b''.join(lines))]
+    assert [row.split('\t')[0][-1] for row in read_rows(path)[1:]] == ['2', '0', '4', '1', '3']
+
+
+def test_empty_rows_are_skipped_but_reported(tmp_path, flushes):
+    path = tmp_path / 'out.tsv'
+    writer = TsvWriter(str(path), {'lccn': True, 'lccn_source': True}, 'isbn', flush_rows=1, flush_interval=60,
+                       on_flush=lambda offsets, position: flushes.append((list(offsets), position)))
+
+    writer.write_row('9781449355739', {}, offset=0)
+    writer.close()
+
+    assert read_rows(path) == ['LCCN\tLCCN_Source']
+    assert flushes == [([0], path.stat().st_size)]
+
+
+def test_header_is_written_once(tmp_path, flushes):
+    path = tmp_path / 'out.tsv'
+    for identifier in ('9781449355739', '9780596007126'):
+        writer = make_writer(path, flushes)
+        writer.write_row(identifier, DATA)
+        writer.close()
+
+    assert read_rows(path) == ['ISBN\tOCN\tLCCN', '9781449355739\t1\tZ699', '9780596007126\t1\tZ699']
+    # Rows without an offset are not reported
+    assert flushes == []
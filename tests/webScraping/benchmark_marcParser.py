@@ -0,0 +1,95 @@
+"""
+Benchmark of the MARC text parser against the str.index parsing the scrapers used before it,
+on the saved MARC views in tests/data/marc.
+
+    python tests/webScraping/benchmark_marcParser.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'src')))
+
+from webScraping.marcParser import METADATA_TAGS, parse_marc_text
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'marc'))
+
+# Fixture, and the markers of the 050 fields and subfields its catalog's scraper searched for
+FIXTURES = [
+    ('cornell_librarian_view.txt', ["050    4 ‡a", "050 0 0 ‡a"], "‡a", "‡b"),
+    ('columbia_librarian_view.txt', ["050    4", "050 0 0", "050 1 4"], "|a ", "|b "),
+    ('indiana_librarian_view.txt', ["050    4", "050 1 4"], "a| ", "b| "),
+    ('jhu_source_record.txt', ["050 #4$a", "050 00$a", "050 14$a"], "$a", "$b"),
+    ('ncsu_marc_view.txt', ["050 0 0 ", "050 4 "], "|a", "|b"),
+    ('large_librarian_view.txt', ["050    4 ‡a", "050 0 0 ‡a"], "‡a", "‡b"),
+]
+
+
+def find_occurrences_using_index(input_string, search_string):
+    indices = []
+    start_index = 0
+
+    while True:
+        try:
+            index = input_string.index(search_string, start_index)
+            indices.append(index)
+            start_index = index + 1
+        except ValueError:
+            break
+
+    return indices
+
+
+def legacy_parse(page_text, fifty_patterns, a_marker, b_marker):
+    """The OCN and call numbers as the scrapers found them before, from the page text without line breaks."""
+    body_text = page_text.replace("\n", " ")
+    ocn = ""
+    lccns = []
+    try:
+        index_of_ocn = body_text.index("(OCoLC)")
+        ocn = body_text[index_of_ocn + 7: body_text.index(" ", index_of_ocn)]
+    except ValueError:
+        pass
+
+    indexes_of_fifty = []
+    for pattern in fifty_patterns:
+        indexes_of_fifty += find_occurrences_using_index(body_text, pattern)
+
+    for index_of_fifty in indexes_of_fifty:
+        try:
+            index_of_first_portion = body_text.index(a_marker, index_of_fifty)
+            first_portion = body_text[index_of_first_portion + len(a_marker): body_text.index(" ", index_of_first_portion + len(a_marker))]
+            index_of_second_portion = body_text.index(b_marker, index_of_fifty)
+            index_of_intermediate_space = body_text.index(" ", index_of_second_portion + len(b_marker))
+            index_of_final_space = body_text.index(" ", index_of_intermediate_space + 1)
+            lccns.append(first_portion + body_text[index_of_second_portion + len(b_marker): index_of_final_space])
+        except ValueError:
+            break
+    return ocn, lccns
+
+
+def marc_parse(page_text, tags):
+    record = parse_marc_text(page_text, tags)
+    return record.oclc_number(), record.call_numbers()
+
+
+def best_time(function, number):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+
+def main():
+    print(f"{'fixture':32} {'size':>8} {'legacy':>10} {'all fields':>11} {'metadata':>10} {'speedup':>8}")
+    for name, fifty_patterns, a_marker, b_marker in FIXTURES:
+        with open(os.path.join(DATA_DIR, name), encoding='utf-8') as f:
+            page_text = f.read()
+        number = 20 if len(page_text) > 50000 else 2000
+
+        legacy = best_time(lambda: legacy_parse(page_text, fifty_patterns, a_marker, b_marker), number)
+        full = best_time(lambda: marc_parse(page_text, None), number)
+        metadata = best_time(lambda: marc_parse(page_text, METADATA_TAGS), number)
+        print(f"{name:32} {len(page_text):>8} {legacy * 1e6:>8.1f}us {full * 1e6:>9.1f}us "
+              f"{metadata * 1e6:>8.1f}us {legacy / metadata:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
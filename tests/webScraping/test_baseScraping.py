@@ -0,0 +1,107 @@
+import time
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+
+from src.webScraping.cornellLibraryAPI import CornellLibraryAPI
+from src.webScraping.johnsHopkinsLibraryAPI import JohnsHopkinsLibraryAPI
+from src.webScraping.yaleLibraryAPI import YaleLibraryAPI
+# The module the scrapers import, rather than a copy of it under src
+from webScraping import baseScraping
+from webScraping.baseScraping import PageTimeoutError, ScrapingFailedError
+
+ISBN = '9781449355739'
+
+
+class FakeDriver:
+    """
+    A driver of a catalog whose pages have no results, loading each page after `ready_after`
+    seconds. The elements matching the locator values in `shown` appear `shown_after` seconds later.
+    """
+
+    def __init__(self, ready_after=0.0, error=None, shown=(), shown_after=0.0):
+        self.ready_after = ready_after
+        self.error = error
+        self.shown = shown
+        self.shown_after = shown_after
+        self.current_url = None
+        self.loaded = None
+
+    def get(self, url):
+        self.current_url = url
+        self.loaded = time.monotonic()
+
+    def execute_script(self, script):
+        return "complete" if time.monotonic() - self.loaded >= self.ready_after else "loading"
+
+    def find_elements(self, by, value):
+        if value in self.shown and time.monotonic() - self.loaded >= self.ready_after + self.shown_after:
+            return [object()]
+        return []
+
+    def find_element(self, by, value):
+        if self.error is not None:
+            raise self.error
+        raise NoSuchElementException(f"no {value}")
+
+
+@pytest.fixture
+def scraper(monkeypatch):
+    pool = {}
+    scrapers = {}
+    monkeypatch.setattr(baseScraping.WebDriverManager, 'checkout', lambda: pool['driver'])
+    monkeypatch.setattr(baseScraping.WebDriverManager, 'checkin', lambda driver, healthy=True: None)
+
+    def lend(driver, scraper_class=CornellLibraryAPI):
+        """Return the scraper of a catalog, looking up with `driver` as its browser."""
+        pool['driver'] = driver
+        if scraper_class not in scrapers:
+            # Without __init__, which starts a browser
+            scraper = scrapers[scraper_class] = scraper_class.__new__(scraper_class)
+            scraper.blacklight = None
+            scraper.page_timeout = 0.3
+            scraper.is_online = lambda: True
+        return scrapers[scraper_class]
+    return lend
+
+
+def test_search_without_results_is_an_empty_answer(scraper):
+    result = scraper(FakeDriver()).lookup(ISBN, 'isbn')
+    assert result['isbn'] == [ISBN] and result['lccn'] == []
+
+
+def test_page_that_did_not_load_in_time_fails(scraper):
+    with pytest.raises(PageTimeoutError):
+        scraper(FakeDriver(ready_after=10)).lookup(ISBN, 'isbn')
+
+
+def test_unexpected_error_fails(scraper):
+    with pytest.raises(ScrapingFailedError) as raised:
+        scraper(FakeDriver(error=KeyError('title'))).lookup(ISBN, 'isbn')
+    assert isinstance(raised.value.__cause__, KeyError)
+
+
+def test_fetch_metadata_swallows_failures(scraper):
+    assert scraper(FakeDriver(ready_after=10)).fetch_metadata(ISBN, 'isbn')['lccn'] == []
+
+
+def test_timeout_is_not_carried_over_to_the_next_lookup(scraper):
+    with pytest.raises(PageTimeoutError):
+        scraper(FakeDriver(ready_after=10)).lookup(ISBN, 'isbn')
+    assert scraper(FakeDriver()).lookup(ISBN, 'isbn')['lccn'] == []
+
+
+@pytest.mark.parametrize('scraper_class', [JohnsHopkinsLibraryAPI, YaleLibraryAPI])
+def test_dynamic_search_without_results_is_an_empty_answer(scraper, scraper_class):
+    marker = scraper_class.no_results[1]
+    started = time.monotonic()
+    result = scraper(FakeDriver(shown=[marker], shown_after=0.1), scraper_class).lookup(ISBN, 'isbn')
+    assert result['isbn'] == [ISBN] and result['lccn'] == []
+    # The page loaded at once, but its results are filled in with scripts afterwards
+    assert time.monotonic() - started < 0.3
+
+
+@pytest.mark.parametrize('scraper_class', [JohnsHopkinsLibraryAPI, YaleLibraryAPI])
+def test_dynamic_search_that_never_finished_fails(scraper, scraper_class):
+    with pytest.raises(PageTimeoutError):
+        scraper(FakeDriver(), scraper_class).lookup(ISBN, 'isbn')
@@ -0,0 +1,148 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from src.webScraping.blacklightFetcher import BlacklightFetchError, BlacklightFetcher, html_to_text
+from src.webScraping.cornellLibraryAPI import CornellLibraryAPI
+from src.webScraping.indianaLibraryAPI import IndianaLibraryAPI
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'marc'))
+
+ISBN = '9781449355739'
+OCN = '835310128'
+MISSING_ISBN = '9780000000002'
+
+
+def read_fixture(name):
+    with open(os.path.join(DATA_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+class CatalogHandler(BaseHTTPRequestHandler):
+    """
+    Serves saved pages of two catalogs: Cornell, which has a JSON search API, and Indiana,
+    which only has HTML search results pages. Both find the book for its ISBN and its OCN.
+    """
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query).get('q', [''])[0]
+        found = query in (ISBN, OCN)
+        self.server.paths.append(url.path)
+        routes = {
+            '/cornell/catalog.json': ('application/json', read_fixture('cornell_search.json') if found else '{"data": []}'),
+            '/cornell/catalog/10219387/librarian_view': ('text/html', read_fixture('cornell_librarian_view.html')),
+            '/indiana/catalog': ('text/html', read_fixture('indiana_search_results.html' if found
+                                                           else 'indiana_search_no_results.html')),
+            '/indiana/catalog/14417931/librarian_view': ('text/html', read_fixture('indiana_librarian_view.html')),
+            '/maintenance/catalog': ('text/html', '<html><body>Down for maintenance</body></html>'),
+        }
+        if url.path not in routes:
+            self.send_error(404)
+            return
+        content_type, body = routes[url.path]
+        body = body.encode('utf-8')
+        self.send_response(200)
+        # No charset, which Blacklight leaves out as well
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CatalogHandler)
+    server.paths = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fetcher(server, catalog):
+    return BlacklightFetcher(f'http://127.0.0.1:{server.server_port}/{catalog}', {'search_field': 'all_fields'})
+
+
+def test_html_to_text_follows_selenium_text():
+    html = ('<html><head><title>Record</title><script>var x = "<div>";</script></head><body>'
+            '<div>Librarian\n   View</div><table><tr><td>020</td><td>\xa0\xa0</td><td>$a 978</td></tr>'
+            '<tr><th>050</th><td>\xa04</td><td>$a QA76</td></tr></table><p>Back&nbsp;&nbsp;to <b>item</b></p></body></html>')
+    assert html_to_text(html) == 'Librarian View\n020    $a 978\n050  4 $a QA76\nBack  to item'
+
+
+def test_html_to_text_matches_the_saved_selenium_text():
+    assert html_to_text(read_fixture('cornell_librarian_view.html')) == read_fixture('cornell_librarian_view.txt').rstrip('\n')
+
+
+@pytest.mark.parametrize('identifier', [ISBN, OCN])
+@pytest.mark.parametrize('catalog, record_id', [('cornell', '10219387'), ('indiana', '14417931')])
+def test_find_record_id(server, catalog, record_id, identifier):
+    assert fetcher(server, catalog).find_record_id(identifier) == record_id
+
+
+@pytest.mark.parametrize('catalog', ['cornell', 'indiana'])
+def test_search_without_results(server, catalog):
+    assert fetcher(server, catalog).find_record_id(MISSING_ISBN) is None
+
+
+def test_results_page_is_read_when_there_is_no_json(server):
+    server.paths.clear()
+    fetcher(server, 'indiana').find_record_id(ISBN)
+    assert server.paths == ['/indiana/catalog.json', '/indiana/catalog']
+
+
+@pytest.mark.parametrize('catalog', ['maintenance', 'nowhere'])
+def test_unreadable_catalog_raises(server, catalog):
+    with pytest.raises(BlacklightFetchError):
+        fetcher(server, catalog).find_record_id(ISBN)
+    with pytest.raises(BlacklightFetchError):
+        fetcher(server, catalog).fetch_view('1')
+
+
+def test_fetch_view(server):
+    text = fetcher(server, 'cornell').fetch_view('10219387')
+    # Pages without a charset are read as UTF-8
+    assert '‡a 9781449355739 (pbk.)' in text
+    assert text == read_fixture('cornell_librarian_view.txt').rstrip('\n')
+
+
+def make_scraper(scraper_class, blacklight):
+    # Without __init__, which starts a browser
+    scraper = scraper_class.__new__(scraper_class)
+    scraper.blacklight = blacklight
+    return scraper
+
+
+def selenium_result(scraper, name, identifier, input_type):
+    """The result of the browser path, which parses the text Selenium read from the MARC view."""
+    scraper.catalog_data = {"ISBN": [], "OCN": "", "LCCN": [], "LCCN_Source": []}
+    if input_type == 'ISBN':
+        scraper.catalog_data["ISBN"].append(identifier)
+    else:
+        scraper.catalog_data["OCN"] = identifier
+    scraper.parse_librarian_view(read_fixture(name), input_type)
+    return scraper.send_dictionary()
+
+
+@pytest.mark.parametrize('identifier, input_type', [(ISBN, 'ISBN'), (OCN, 'OCN')])
+@pytest.mark.parametrize('scraper_class, catalog', [(CornellLibraryAPI, 'cornell'), (IndianaLibraryAPI, 'indiana')])
+def test_http_path_matches_the_selenium_path(server, scraper_class, catalog, identifier, input_type):
+    scraper = make_scraper(scraper_class, fetcher(server, catalog))
+
+    result = scraper.fetch_over_http(identifier, input_type.lower())
+
+    assert result == selenium_result(scraper, f'{catalog}_librarian_view.txt', identifier, input_type)
+    assert result['lccn'] and result['isbn'] and result['ocn']
+
+
+def test_http_path_without_a_record(server):
+    scraper = make_scraper(IndianaLibraryAPI, fetcher(server, 'indiana'))
+    result = scraper.fetch_over_http(MISSING_ISBN, 'isbn')
+    assert result['lccn'] == [] and result['ocn'] == ''
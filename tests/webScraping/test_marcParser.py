@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from src.webScraping.marcParser import METADATA_TAGS, parse_marc_text
+
+# Saved text of the MARC views of the catalogs, one for each way of marking subfields
+FIXTURES = {
+    'cornell_librarian_view.txt': ('835310128', ['9781449355739', '1449355730'], ['QA76.73.P98L88 2013']),
+    'columbia_librarian_view.txt': ('ocn835310128', ['9781449355739', '1449355730', '9781449355720'],
+                                    ['QA76.73.P98L88 2013']),
+    'indiana_librarian_view.txt': ('835310128', ['9781449355739', '1449355730'],
+                                   ['QA76.73.P98L88 2013', 'QA76.73.P98L877 2013']),
+    'jhu_source_record.txt': ('835310128', ['9781449355739', '1449355730', '9781449355715'], ['QA76.73.P98L88 2013']),
+    'ncsu_marc_view.txt': ('835310128', ['9781449355739', '1449355730'], ['QA76.73.P98L88 2013']),
+    'large_librarian_view.txt': ('835310128', ['9781449355739', '1449355730'], ['QA76.73.P98L88 2013']),
+}
+
+
+@pytest.fixture(scope='module')
+def data_dir():
+    current_dir = os.path.dirname(__file__)
+    return os.path.abspath(os.path.join(current_dir, '..', 'data', 'marc'))
+
+
+def read_fixture(data_dir, name):
+    with open(os.path.join(data_dir, name), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("name", FIXTURES)
+def test_metadata(name, data_dir):
+    """The OCN, ISBNs and call numbers are found in every style of MARC view."""
+    ocn, isbns, call_numbers = FIXTURES[name]
+    text = read_fixture(data_dir, name)
+
+    for record in (parse_marc_text(text), parse_marc_text(text, METADATA_TAGS)):
+        assert record.oclc_number() == ocn
+        assert record.isbns() == isbns
+        assert record.call_numbers() == call_numbers
+
+
+@pytest.mark.parametrize("name", FIXTURES)
+def test_only_requested_tags(name, data_dir):
+    record = parse_marc_text(read_fixture(data_dir, name), METADATA_TAGS)
+    assert record.fields
+    assert {field.tag for field in record.fields} <= set(METADATA_TAGS)
+
+
+def test_fields(data_dir):
+    """Tags, indicators and subfields are read, with blank indicators on lines of their own."""
+    record = parse_marc_text(read_fixture(data_dir, 'cornell_librarian_view.txt'))
+
+    assert [field.tag for field in record.fields][:4] == ['010', '020', '020', '035']
+    title = record.get_fields('245')[0]
+    assert title.indicators == '10'
+    assert title.subfields == [('a', 'Learning Python /'), ('c', 'Mark Lutz.')]
+    call_number = record.get_fields('050')[0]
+    assert call_number.indicators == ' 4'
+    assert call_number.values('b') == ['L88 2013']
+    assert record.get_fields('040')[0].values('d') == ['OCLCO', 'BTCTA', 'NYP', 'COO']
+    # Control fields have no subfields and are skipped
+    assert not record.get_fields('001', '005', '008')
+
+
+@pytest.mark.parametrize("text, indicators", [
+    ("050 0 0 ‡a QA76", '00'),
+    ("050    4 ‡a QA76", ' 4'),
+    ("050 #4$aQA76", ' 4'),
+    ("050 14 a| QA76", '14'),
+    ("100 1   |a Lutz", '1 '),
+    ("020       |a 1449355730", '  '),
+])
+def test_indicators(text, indicators):
+    assert parse_marc_text(text).fields[0].indicators == indicators
+
+
+def test_page_without_record():
+    record = parse_marc_text("No results found for 2013 in 123 catalogs")
+    assert record.fields == []
+    assert record.oclc_number() == ''
+    assert record.isbns() == []
+    assert record.call_numbers() == []
+
+
+def test_stops_after_requested_tags():
+    """A record keeps its fields in tag order, so nothing after the last requested tag is read."""
+    text = "050 0 0 ‡a QA76 ‡b .L88\n245 1 0 ‡a Learning Python\n949     ‡a Holdings\n050 0 0 ‡a Z999"
+
+    assert [field.tag for field in parse_marc_text(text, ['050', '245']).fields] == ['050', '245']
+    assert parse_marc_text(text, ['050']).call_numbers() == ['QA76.L88']
+    assert parse_marc_text(text, ['999']).fields == []
+    assert len(parse_marc_text(text).get_fields('050')) == 2
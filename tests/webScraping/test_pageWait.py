@@ -0,0 +1,105 @@
+import time
+
+import pytest
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+
+from src.webScraping import pageWait
+
+
+class FakeElement:
+    def __init__(self, displayed=True, stale=False):
+        self.displayed = displayed
+        self.stale = stale
+
+    def is_displayed(self):
+        if self.stale:
+            raise StaleElementReferenceException()
+        return self.displayed
+
+
+class FakeDriver:
+    """A driver whose page finishes loading, shows its elements and navigates after given delays."""
+
+    def __init__(self, elements=(), elements_after=0.0, ready_after=0.0, url='https://catalog.example/', navigate_after=None):
+        self.started = time.monotonic()
+        self.elements = list(elements)
+        self.elements_after = elements_after
+        self.ready_after = ready_after
+        self.url = url
+        self.navigate_after = navigate_after
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def find_elements(self, by, value):
+        return self.elements if self.elapsed() >= self.elements_after else []
+
+    def execute_script(self, script):
+        assert script == "return document.readyState"
+        return "complete" if self.elapsed() >= self.ready_after else "loading"
+
+    @property
+    def current_url(self):
+        if self.navigate_after is not None and self.elapsed() >= self.navigate_after:
+            return self.url + 'view/1'
+        return self.url
+
+
+def test_element_is_returned_once_present():
+    element = FakeElement()
+    driver = FakeDriver([element], elements_after=0.2, ready_after=1)
+    assert pageWait.wait_for_element(driver, By.ID, 'marc', 5, catalog='Fake') is element
+    assert driver.elapsed() < 1
+
+
+def test_element_missing_from_a_loaded_page_is_not_waited_for():
+    driver = FakeDriver(ready_after=0.2)
+    assert pageWait.wait_for_element(driver, By.ID, 'marc', 5, catalog='Fake') is None
+    assert driver.elapsed() < 1
+
+
+def test_dynamic_page_is_waited_for_after_it_loaded():
+    element = FakeElement()
+    driver = FakeDriver([element], elements_after=0.3)
+    assert pageWait.wait_for_element(driver, By.ID, 'marc', 5, dynamic=True, catalog='Fake') is element
+    assert driver.elapsed() >= 0.3
+
+
+def test_visible_waits_for_a_displayed_element():
+    hidden = FakeDriver([FakeElement(displayed=False)])
+    assert pageWait.wait_for_element(hidden, By.ID, 'marc', 0.3, visible=True, catalog='Fake') is None
+    stale = FakeDriver([FakeElement(stale=True)])
+    assert pageWait.wait_for_element(stale, By.ID, 'marc', 0.3, visible=True, catalog='Fake') is None
+    element = FakeElement()
+    assert pageWait.wait_for_element(FakeDriver([element]), By.ID, 'marc', 0.3, visible=True, catalog='Fake') is element
+
+
+def test_url_change():
+    assert pageWait.wait_for_url_change(FakeDriver(navigate_after=0.2), 'https://catalog.example/', 5, catalog='Fake')
+    assert not pageWait.wait_for_url_change(FakeDriver(), 'https://catalog.example/', 0.3, catalog='Fake')
+
+
+def test_document_ready():
+    assert pageWait.wait_for_document_ready(FakeDriver(ready_after=0.2), 5, catalog='Fake')
+    assert not pageWait.wait_for_document_ready(FakeDriver(ready_after=10), 0.3, catalog='Fake')
+
+
+def test_statistics_count_waits_and_timeouts():
+    pageWait.wait_for_document_ready(FakeDriver(), 1, catalog='Statistics')
+    pageWait.wait_for_document_ready(FakeDriver(ready_after=10), 0.2, catalog='Statistics')
+
+    stats = pageWait.wait_statistics()['Statistics']['document_ready']
+    assert (stats['count'], stats['timeouts']) == (2, 1)
+    assert 0.2 <= stats['max'] <= stats['total'] < 1
+
+
+def test_raise_on_timeout():
+    with pytest.raises(TimeoutException):
+        pageWait.wait_for_element(FakeDriver(ready_after=10), By.ID, 'marc', 0.2, catalog='Fake', raise_on_timeout=True)
+    with pytest.raises(TimeoutException):
+        pageWait.wait_for_url_change(FakeDriver(), 'https://catalog.example/', 0.2, catalog='Fake', raise_on_timeout=True)
+    with pytest.raises(TimeoutException):
+        pageWait.wait_for_document_ready(FakeDriver(ready_after=10), 0.2, catalog='Fake', raise_on_timeout=True)
+    # A page that loaded without the element is not a timeout
+    assert pageWait.wait_for_element(FakeDriver(), By.ID, 'marc', 0.2, catalog='Fake', raise_on_timeout=True) is None
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from src.webScraping.webDriverManager import WebDriverManager
+
+
+class FakeDriver:
+    """A browser that can be broken, remembering whether it was quit."""
+
+    def __init__(self, number):
+        self.number = number
+        self.broken = False
+        self.quit_called = False
+
+    @property
+    def current_url(self):
+        if self.broken:
+            raise WebDriverException("chrome not reachable")
+        return 'about:blank'
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def started(monkeypatch):
+    """The drivers the pool started, in order. The pool starts empty, with room for two browsers."""
+    drivers = []
+
+    def initialize_driver():
+        drivers.append(FakeDriver(len(drivers)))
+        return drivers[-1]
+    monkeypatch.setattr(WebDriverManager, '_initialize_driver', staticmethod(initialize_driver))
+    monkeypatch.setattr(WebDriverManager, '_condition', threading.Condition())
+    monkeypatch.setattr(WebDriverManager, '_idle', [])
+    monkeypatch.setattr(WebDriverManager, '_health', {})
+    monkeypatch.setattr(WebDriverManager, '_starting', 0)
+    monkeypatch.setattr(WebDriverManager, 'pool_size', 2)
+    return drivers
+
+
+def test_pool_size_bounds_the_browsers(started):
+    first = WebDriverManager.checkout()
+    second = WebDriverManager.checkout()
+    with pytest.raises(RuntimeError):
+        WebDriverManager.checkout(timeout=0.1)
+
+    # A lookup waiting for a browser gets the next one handed back
+    borrowed = []
+    waiting = threading.Thread(target=lambda: borrowed.append(WebDriverManager.checkout(timeout=5)))
+    waiting.start()
+    time.sleep(0.1)
+    assert not borrowed
+    WebDriverManager.checkin(first)
+    waiting.join()
+
+    assert borrowed == [first] and len(started) == 2
+    assert [health['busy'] for health in WebDriverManager.health()] == [True, True]
+    WebDriverManager.checkin(first)
+    WebDriverManager.checkin(second)
+    assert WebDriverManager.checkout() in (first, second) and len(started) == 2
+
+
+def test_driver_is_discarded_after_max_failures(started):
+    driver = WebDriverManager.checkout()
+    for _ in range(WebDriverManager.max_failures - 1):
+        WebDriverManager.checkin(driver, healthy=False)
+        # It still answers the probe, so it is lent out again
+        assert WebDriverManager.checkout() is driver
+    WebDriverManager.checkin(driver, healthy=False)
+
+    assert driver.quit_called
+    assert WebDriverManager.checkout() is started[1]
+
+
+def test_unhealthy_driver_failing_the_probe_is_discarded(started):
+    driver = WebDriverManager.checkout()
+    WebDriverManager.checkin(driver, healthy=False)
+    driver.broken = True
+
+    assert WebDriverManager.checkout() is started[1]
+    assert driver.quit_called
+
+
+def test_replace_swaps_a_broken_browser(started):
+    driver = WebDriverManager.checkout()
+    WebDriverManager.checkout()
+    driver.broken = True
+
+    # The pool is full, so the new browser takes the place of the broken one
+    replacement = WebDriverManager.replace(driver)
+
+    assert driver.quit_called
+    assert replacement is started[2]
+    assert len(WebDriverManager.health()) == 2